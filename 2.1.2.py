@@ -1,13 +1,7 @@
-from openpyxl import Workbook
-from openpyxl.styles import Border, Side, Alignment, Font
-from openpyxl.utils import get_column_letter
-import matplotlib.pyplot as plt
-import matplotlib
-import numpy as np
+import re
 import csv
 import math
 from datetime import datetime
-from prettytable import PrettyTable
 from typing import *
 
 NAME = 0
@@ -48,7 +42,6 @@ class Report:
         self.cities_partitions = {}
         self.read_file()
         self.calculate_file()
-        self.Wb = Workbook()
 
     def read_file(self):
         first = False
@@ -73,7 +66,7 @@ class Report:
                         cur_city = row[AREA_NAME]
                         self.years_sums[cur_year] = self.years_sums.get(cur_year, 0) + cur_salary
                         self.years_length[cur_year] = self.years_length.get(cur_year, 0) + 1
-                        if name in cur_name:
+                        if self.name in cur_name:
                             self.years_sums_cur[cur_year] = self.years_sums_cur.get(cur_year, 0) + cur_salary
                             self.years_length_cur[cur_year] = self.years_length_cur.get(cur_year, 0) + 1
                         if cur_city not in self.cities:
@@ -113,13 +106,21 @@ class Report:
         print("Доля вакансий по городам (в порядке убывания):", self.cities_partitions)
 
     def generate_excel(self):
+        from openpyxl import Workbook
+        from openpyxl.styles import Border, Side, Alignment, Font, NamedStyle
+
+        self.Wb = Workbook()
         self.years_stat_sheet = self.Wb.create_sheet(title="Статистика по годам")
         self.cities_stat_sheet = self.Wb.create_sheet(title="Статистика по городам")
         self.Wb.remove(self.Wb["Sheet"])
         sd = Side(border_style='thin', color="000000")
-        self.border = Border(right=sd, top=sd, bottom=sd, left=sd)
-        self.header_alignment = Alignment(horizontal='left')
-        self.data_alignment = Alignment(horizontal='right')
+        border = Border(right=sd, top=sd, bottom=sd, left=sd)
+        self.Wb.add_named_style(NamedStyle("header", border=border, alignment=Alignment(horizontal='left'),
+                                           font=Font(bold=True)))
+        self.Wb.add_named_style(NamedStyle("data", border=border, alignment=Alignment(horizontal='right')))
+        self.Wb.add_named_style(NamedStyle("data_left", border=border, alignment=Alignment(horizontal='left')))
+        self.data_style = "data"
+        self.widths = {}
         self.cities_stat_sheet["a1"] = 12
         self.report_years()
         self.report_cities()
@@ -143,34 +144,32 @@ class Report:
     def fill_matrix(self, sheet, matrix, offset=(0, 0)):
         for row in range(len(matrix)):
             for col in range(len(matrix[0])):
-                address = f"{get_column_letter(col + 1 + offset[0])}{row + 1 + offset[1]}"
-                sheet[address] = matrix[row][col]
-                sheet[address].border = self.border
-                sheet[address].alignment = self.data_alignment
-                sheet.column_dimensions[get_column_letter(col + 1)].auto_size = 1
+                self.write_cell(sheet, row + 1 + offset[1], col + 1 + offset[0], matrix[row][col], self.data_style)
+        self.set_auto_size(sheet, len(matrix[0]))
 
     def set_headers(self, sheet, headers, offset=(0, 0)):
         for col in range(0, len(headers)):
-            address = f"{get_column_letter(col + 1 + offset[0])}{1 + offset[1]}"
-            sheet[address] = headers[col]
-            sheet[address].border = self.border
-            sheet[address].alignment = self.header_alignment
-            sheet[address].font = Font(bold=True)
+            self.write_cell(sheet, 1 + offset[1], col + 1 + offset[0], headers[col], "header")
+        self.set_auto_size(sheet, len(headers))
+
+    def write_cell(self, sheet, row, col, value, style):
+        sheet.cell(row=row, column=col, value=value).style = style
+        widths = self.widths.setdefault(sheet.title, {})
+        widths[col] = max(widths.get(col, 0), len(str(value)))
+
+    def set_auto_size(self, sheet, columns):
+        from openpyxl.utils import get_column_letter
+
+        for col in range(columns):
             sheet.column_dimensions[get_column_letter(col + 1)].auto_size = 1
 
     def fit_cells(self):
-        for sheet_name in self.Wb.sheetnames:
-            sheet = self.Wb[sheet_name]
+        from openpyxl.utils import get_column_letter
+
+        for sheet in self.Wb.worksheets:
+            widths = self.widths.get(sheet.title, {})
             for col in range(1, sheet.max_column + 1):
-                width = None
-                for row in range(1, sheet.max_row + 1):
-                    value = sheet[f"{get_column_letter(col)}{row}"].value
-                    if value is not None and (width is None or len(str(value)) > width):
-                        width = len(str(value))
-                if width is not None:
-                    sheet.column_dimensions[f"{get_column_letter(col)}"].width = width + 2
-                else:
-                    sheet.column_dimensions[f"{get_column_letter(col)}"].width = + 2
+                sheet.column_dimensions[get_column_letter(col)].width = widths.get(col, 0) + 2
 
     def report_cities(self):
         headers_payment = ["Город", "Уровень зарплат"]
@@ -178,15 +177,19 @@ class Report:
         self.set_headers(self.cities_stat_sheet, headers_payment)
         self.set_headers(self.cities_stat_sheet, headers_percent, (3, 0))
 
-        self.data_alignment = Alignment(horizontal='left')
+        self.data_style = "data_left"
         self.fill_matrix(self.cities_stat_sheet, [[i] for i in self.ans_cities_sums.keys()], offset=(0, 1))
         matrix = {key: f"{(val * 10000) // 1 / 100}%" for key, val in self.cities_partitions.items()}
         self.fill_matrix(self.cities_stat_sheet, [[i] for i in list(matrix.keys())], offset=(3, 1))
-        self.data_alignment = Alignment(horizontal='right')
+        self.data_style = "data"
         self.fill_matrix(self.cities_stat_sheet, [[i] for i in list(self.ans_cities_sums.values())], offset=(1, 1))
         self.fill_matrix(self.cities_stat_sheet, [[i] for i in list(matrix.values())], offset=(4, 1))
 
     def generate_image(self):
+        import matplotlib
+        import matplotlib.pyplot as plt
+        import numpy as np
+
         matplotlib.rc("font", size=8)
         fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(nrows=2, ncols=2)
         width = 0.3
@@ -246,6 +249,16 @@ def parse_money(amount):
     return "".join(reversed(nseq)).strip()
 
 
+HTML_TAG = re.compile(r"<[^>]*>")
+
+
+def clean_html(text):
+    text = HTML_TAG.sub("", text.strip()).strip()
+    if "\n" in text:
+        return [" ".join(line.split()) for line in text.split("\n")]
+    return " ".join(text.split())
+
+
 def try_parse(val):
     if val == math.nan:
         return "nan"
@@ -435,20 +448,7 @@ class DataSet:
         for vacancy in reader:
             appendix = {}
             for i in range(len(vacancy)):
-                append_item = vacancy[i].strip()
-                tag_start = append_item.find("<")
-                while tag_start != -1:
-                    tag_end = append_item.find(">", tag_start)
-                    append_item = append_item.replace(append_item[tag_start: tag_end + 1], "")
-                    tag_start = append_item.find("<", tag_start)
-                append_item = append_item.strip()
-                while append_item.find("  ") != -1:
-                    append_item = append_item.replace("  ", " ")
-                if append_item.find("\n") != -1:
-                    append_item = [" ".join(i.split()) for i in append_item.split("\n")]
-                else:
-                    append_item = " ".join(append_item.split())
-                appendix[list_naming[i]] = append_item
+                appendix[list_naming[i]] = clean_html(vacancy[i])
             self.vacancies_objects.append(Vacancy(appendix))
 
     def filter_vacancies(self, filter_key, filter_val):
@@ -464,6 +464,8 @@ class DataSet:
         self.sort_vacancies(sort_name, reverse)
 
     def print_vacancies(self, filter_key, filter_val, sort_name, dic_naming, reverse=False, row_indexes=None):
+        from prettytable import PrettyTable
+
         if row_indexes is None:
             row_indexes = []
         self.prettify_vacancies(filter_key, filter_val, sort_name, reverse)
@@ -535,9 +537,10 @@ class Vacancy:
                 "published_at_date": ".".join(self.published_at.split("T")[0].split('-')[::-1])}
 
 
-filename = input("Введите название файла: ")
-name = input("Введите название профессии: ")
+if __name__ == '__main__':
+    filename = input("Введите название файла: ")
+    name = input("Введите название профессии: ")
 
-rep = Report(filename, name)
-rep.print_file()
-rep.generate_image()
+    rep = Report(filename, name)
+    rep.print_file()
+    rep.generate_image()
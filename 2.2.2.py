@@ -1,17 +1,20 @@
-from openpyxl import Workbook
-from openpyxl.styles import Border, Side, Alignment, Font
-from openpyxl.utils import get_column_letter
-import matplotlib.pyplot as plt
-import matplotlib
-import numpy as np
-from jinja2 import Environment, FileSystemLoader
-import pdfkit
 import os
+import re
+import sys
 import csv
+import time
+import json
 import math
+import mmap
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
 from datetime import datetime
-from prettytable import PrettyTable
+from functools import lru_cache
+from itertools import accumulate, islice
 from typing import *
+import argparse
 
 NAME = 0
 SALARY_FROM = 1
@@ -19,6 +22,9 @@ SALARY_TO = 2
 SALARY_CURRENCY = 3
 AREA_NAME = 4
 PUBLISHED_AT = 5
+EXCEL_MAX_ROWS = 1048576
+EXCEL_MAX_CELL_LENGTH = 32767
+UNKNOWN_PUBLISHED = 0
 
 currency_to_rub = {
     "AZN": 35.68,
@@ -51,7 +57,6 @@ class Report:
         self.cities_partitions = {}
         self.read_file()
         self.calculate_file()
-        self.Wb = Workbook()
 
     def read_file(self):
         first = False
@@ -76,7 +81,7 @@ class Report:
                         cur_city = row[AREA_NAME]
                         self.years_sums[cur_year] = self.years_sums.get(cur_year, 0) + cur_salary
                         self.years_length[cur_year] = self.years_length.get(cur_year, 0) + 1
-                        if name in cur_name:
+                        if self.name in cur_name:
                             self.years_sums_cur[cur_year] = self.years_sums_cur.get(cur_year, 0) + cur_salary
                             self.years_length_cur[cur_year] = self.years_length_cur.get(cur_year, 0) + 1
                         if cur_city not in self.cities:
@@ -116,13 +121,21 @@ class Report:
         print("Доля вакансий по городам (в порядке убывания):", self.cities_partitions)
 
     def generate_excel(self):
+        from openpyxl import Workbook
+        from openpyxl.styles import Border, Side, Alignment, Font, NamedStyle
+
+        self.Wb = Workbook()
         self.years_stat_sheet = self.Wb.create_sheet(title="Статистика по годам")
         self.cities_stat_sheet = self.Wb.create_sheet(title="Статистика по городам")
         self.Wb.remove(self.Wb["Sheet"])
         sd = Side(border_style='thin', color="000000")
-        self.border = Border(right=sd, top=sd, bottom=sd, left=sd)
-        self.header_alignment = Alignment(horizontal='left')
-        self.data_alignment = Alignment(horizontal='right')
+        border = Border(right=sd, top=sd, bottom=sd, left=sd)
+        self.Wb.add_named_style(NamedStyle("header", border=border, alignment=Alignment(horizontal='left'),
+                                           font=Font(bold=True)))
+        self.Wb.add_named_style(NamedStyle("data", border=border, alignment=Alignment(horizontal='right')))
+        self.Wb.add_named_style(NamedStyle("data_left", border=border, alignment=Alignment(horizontal='left')))
+        self.data_style = "data"
+        self.widths = {}
         self.cities_stat_sheet["a1"] = 12
         self.report_years()
         self.report_cities()
@@ -146,34 +159,32 @@ class Report:
     def fill_matrix(self, sheet, matrix, offset=(0, 0)):
         for row in range(len(matrix)):
             for col in range(len(matrix[0])):
-                address = f"{get_column_letter(col + 1 + offset[0])}{row + 1 + offset[1]}"
-                sheet[address] = matrix[row][col]
-                sheet[address].border = self.border
-                sheet[address].alignment = self.data_alignment
-                sheet.column_dimensions[get_column_letter(col + 1)].auto_size = 1
+                self.write_cell(sheet, row + 1 + offset[1], col + 1 + offset[0], matrix[row][col], self.data_style)
+        self.set_auto_size(sheet, len(matrix[0]))
 
     def set_headers(self, sheet, headers, offset=(0, 0)):
         for col in range(0, len(headers)):
-            address = f"{get_column_letter(col + 1 + offset[0])}{1 + offset[1]}"
-            sheet[address] = headers[col]
-            sheet[address].border = self.border
-            sheet[address].alignment = self.header_alignment
-            sheet[address].font = Font(bold=True)
+            self.write_cell(sheet, 1 + offset[1], col + 1 + offset[0], headers[col], "header")
+        self.set_auto_size(sheet, len(headers))
+
+    def write_cell(self, sheet, row, col, value, style):
+        sheet.cell(row=row, column=col, value=value).style = style
+        widths = self.widths.setdefault(sheet.title, {})
+        widths[col] = max(widths.get(col, 0), len(str(value)))
+
+    def set_auto_size(self, sheet, columns):
+        from openpyxl.utils import get_column_letter
+
+        for col in range(columns):
             sheet.column_dimensions[get_column_letter(col + 1)].auto_size = 1
 
     def fit_cells(self):
-        for sheet_name in self.Wb.sheetnames:
-            sheet = self.Wb[sheet_name]
+        from openpyxl.utils import get_column_letter
+
+        for sheet in self.Wb.worksheets:
+            widths = self.widths.get(sheet.title, {})
             for col in range(1, sheet.max_column + 1):
-                width = None
-                for row in range(1, sheet.max_row + 1):
-                    value = sheet[f"{get_column_letter(col)}{row}"].value
-                    if value is not None and (width is None or len(str(value)) > width):
-                        width = len(str(value))
-                if width is not None:
-                    sheet.column_dimensions[f"{get_column_letter(col)}"].width = width + 2
-                else:
-                    sheet.column_dimensions[f"{get_column_letter(col)}"].width = + 2
+                sheet.column_dimensions[get_column_letter(col)].width = widths.get(col, 0) + 2
 
     def report_cities(self):
         headers_payment = ["Город", "Уровень зарплат"]
@@ -181,15 +192,19 @@ class Report:
         self.set_headers(self.cities_stat_sheet, headers_payment)
         self.set_headers(self.cities_stat_sheet, headers_percent, (3, 0))
 
-        self.data_alignment = Alignment(horizontal='left')
+        self.data_style = "data_left"
         self.fill_matrix(self.cities_stat_sheet, [[i] for i in self.ans_cities_sums.keys()], offset=(0, 1))
         matrix = {key: f"{(val * 10000) // 1 / 100}%" for key, val in self.cities_partitions.items()}
         self.fill_matrix(self.cities_stat_sheet, [[i] for i in list(matrix.keys())], offset=(3, 1))
-        self.data_alignment = Alignment(horizontal='right')
+        self.data_style = "data"
         self.fill_matrix(self.cities_stat_sheet, [[i] for i in list(self.ans_cities_sums.values())], offset=(1, 1))
         self.fill_matrix(self.cities_stat_sheet, [[i] for i in list(matrix.values())], offset=(4, 1))
 
     def generate_image(self):
+        import matplotlib
+        import matplotlib.pyplot as plt
+        import numpy as np
+
         matplotlib.rc("font", size=8)
         fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(nrows=2, ncols=2)
         width = 0.3
@@ -230,9 +245,10 @@ class Report:
         plt.savefig("graph.png")
 
     def generate_pdf(self):
+        import pdfkit
+
         self.generate_image()
-        env = Environment(loader=FileSystemLoader('.'))
-        template = env.get_template("pdf_template.html")
+        template = get_pdf_template()
         pt = os.path.abspath("graph.png")
 
         years_stat = {}
@@ -252,6 +268,14 @@ class Report:
         pdfkit.from_string(pdf_template, "report.pdf", configuration=config, options={"enable-local-file-access": ""})
 
 
+@lru_cache(maxsize=None)
+def get_pdf_template():
+    from jinja2 import Environment, FileSystemLoader
+
+    environment = Environment(loader=FileSystemLoader(os.path.dirname(os.path.abspath(__file__))))
+    return environment.get_template("pdf_template.html")
+
+
 def prettify_val(val):
     if type(val) == list:
         val = "\n".join(val)
@@ -261,6 +285,42 @@ def prettify_val(val):
     return val
 
 
+def excel_val(val):
+    if type(val) == list:
+        val = "\n".join(val)
+    if type(val) == str and len(val) > EXCEL_MAX_CELL_LENGTH:
+        val = val[:EXCEL_MAX_CELL_LENGTH - 3] + "..."
+    return val
+
+
+def save_split_sheets(file_name, title, header, rows, widths=None, max_rows=EXCEL_MAX_ROWS):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    bold = Font(bold=True)
+    workbook = Workbook(write_only=True)
+    sheet, sheet_rows, written = None, max_rows, 0
+    for row in rows:
+        if sheet_rows == max_rows:
+            sheet = workbook.create_sheet(title if sheet is None else f"{title} {len(workbook.worksheets) + 1}")
+            for col, width in enumerate(widths or [], 1):
+                sheet.column_dimensions[get_column_letter(col)].width = width
+            header_cells = []
+            for value in header:
+                cell = WriteOnlyCell(sheet, value=value)
+                cell.font = bold
+                header_cells.append(cell)
+            sheet.append(header_cells)
+            sheet_rows = 1
+        sheet.append(row)
+        sheet_rows, written = sheet_rows + 1, written + 1
+    if sheet is not None:
+        workbook.save(file_name)
+    return written, len(workbook.worksheets)
+
+
 def parse_money(amount):
     nseq = []
     seq = list(reversed(list(str(amount))))
@@ -271,6 +331,16 @@ def parse_money(amount):
     return "".join(reversed(nseq)).strip()
 
 
+HTML_TAG = re.compile(r"<[^>]*>")
+
+
+def clean_html(text):
+    text = HTML_TAG.sub("", text.strip()).strip()
+    if "\n" in text:
+        return [" ".join(line.split()) for line in text.split("\n")]
+    return " ".join(text.split())
+
+
 def try_parse(val):
     if val == math.nan:
         return "nan"
@@ -286,51 +356,117 @@ def try_parse(val):
 
 def skills_filter(vac, *args):
     for skill in args[1].split(", "):
-        if skill not in vac["key_skills"]:
+        if skill not in vac.key_skills:
             return False
     return True
 
 
+def parse_salary_range(val):
+    bounds = [int(bound) for bound in val.split("-")]
+    return bounds[0], bounds[-1]
+
+
 def salary_filter(vac, *args):
-    return int(vac["salary_from"]) <= int(args[1]) <= int(vac["salary_to"])
+    low, high = args[1]
+    return int(vac.salary.salary_from) <= high and low <= int(vac.salary.salary_to)
+
+
+def parse_date_range(val):
+    bounds = [datetime.strptime(bound.strip(), "%d.%m.%Y").toordinal() for bound in val.split("-")]
+    return bounds[0], bounds[-1]
 
 
 def publish_filter(vac, *args):
-    # return datetime.strptime(vac["published_at_date"], "%d.%m.%Y") == datetime.strptime(args[1], "%d.%m.%Y")
-    return datetime.strptime(".".join(vac["published_at"].split("T")[0].split("-")[::-1]),
-                             "%d.%m.%Y") == datetime.strptime(args[1], "%d.%m.%Y")
+    low, high = args[1]
+    return low <= vac.published_date <= high
 
 
-def parameter_filter(vac, *args):
-    return DIC_PARAM[vac[dic_terms[args[0]]]] == args[1]
+def join_text(val):
+    return " ".join(val) if type(val) == list else val
+
+
+def stem_token(token):
+    if "а" <= token[0] <= "я":
+        for ending in RUSSIAN_ENDINGS:
+            if token.endswith(ending) and len(token) - len(ending) >= 3:
+                return token[:-len(ending)]
+    return token
+
+
+def tokenize(text, stem=True):
+    tokens = TOKEN_PATTERN.findall(text.lower().replace("ё", "е"))
+    return [stem_token(token) for token in tokens] if stem else tokens
+
+
+def parse_sort_spec(text):
+    spec = []
+    for sort_name in text.split(", "):
+        descending = sort_name.endswith(SORT_DESCENDING)
+        for suffix in (SORT_DESCENDING, SORT_ASCENDING):
+            if sort_name.endswith(suffix):
+                sort_name = sort_name[:-len(suffix)]
+        spec.append((sort_name, descending))
+    return spec
 
 
-def premium_filter(vac, *args):
-    return dic_joke[vac["premium"]] == args[1]
+def parse_search_query(text, stem=True):
+    phrases = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', text):
+        tokens = tokenize(phrase or word, stem)
+        if tokens:
+            phrases.append(tokens)
+    return phrases
 
 
-def simple_parameter_filter(vac, *args):
-    return vac[dic_terms[args[0]]] == args[1]
+def contains_phrase(tokens, phrase):
+    return any(tokens[i:i + len(phrase)] == phrase for i in range(len(tokens) - len(phrase) + 1))
+
+
+def search_filter(vac, *args):
+    tokens = tokenize(vac.search_text(), TEXT_STEMMING)
+    phrases = parse_search_query(args[1], TEXT_STEMMING)
+    return bool(phrases) and all(contains_phrase(tokens, phrase) for phrase in phrases)
+
+
+def parameter_filter(vac, *args):
+    return DIC_INDEX[args[0]](vac) == args[1]
 
 
 def get_filter(func, *args):
+    if args[0] in DIC_VALUE_PARSERS:
+        args = args[0], DIC_VALUE_PARSERS[args[0]](args[1])
+
     def parameter_func(vac):
         return func(vac, *args)
 
     return parameter_func
 
 
+def parse_filter_query(text):
+    query = []
+    for clause in text.split("||"):
+        predicates = []
+        for predicate in clause.split("&&"):
+            filter_params = predicate.strip().split(": ")
+            predicates.append((filter_params[0], filter_params[1:]))
+        query.append(predicates)
+    return query
+
+
 DIC_FILTER = {"Навыки": skills_filter,
+              "Поиск": search_filter,
               "Оклад": salary_filter,
               "Дата публикации вакансии": publish_filter,
               "Опыт работы": parameter_filter,
-              "Премиум-вакансия": premium_filter,
+              "Премиум-вакансия": parameter_filter,
               "Идентификатор валюты оклада": parameter_filter,
-              "Название": simple_parameter_filter,
-              "Название региона": simple_parameter_filter,
-              "Компания": simple_parameter_filter,
+              "Название": parameter_filter,
+              "Название региона": parameter_filter,
+              "Компания": parameter_filter,
               "": lambda *x: True
               }
+DIC_VALUE_PARSERS = {"Оклад": parse_salary_range,
+                     "Дата публикации вакансии": parse_date_range}
 DIC_PARAM = {
     # exp
     "noExperience": "Нет опыта",
@@ -378,22 +514,6 @@ dic_trans = {"№": "№",
              "area_name": "Название региона",
              # "published_at": "Дата и время публикации вакансии",
              "published_at_date": "Дата публикации вакансии"}
-dic_terms = {
-    "Название": "name",
-    "Описание": "description",
-    "Навыки": "key_skills",
-    "Опыт работы": "experience_id",
-    "Премиум-вакансия": "premium",
-    "Компания": "employer_name",
-    "Нижняя граница вилки оклада": "salary_from",
-    "Верхняя граница вилки оклада": "salary_to",
-    "Оклад указан до вычета налогов": "salary_gross",
-    "Идентификатор валюты оклада": "salary_currency",
-    "Оклад": "salary",
-    "Название региона": "area_name",
-    "Дата и время публикации вакансии": "published_at",
-    "Дата публикации вакансии": "published_at_date"
-}
 currency_to_rub = {
     "AZN": 35.68,
     "BYR": 23.91,
@@ -413,7 +533,7 @@ exp_list = ["Нет опыта",
 dic_sorters = {
     "": lambda v: True,
     "Название": lambda v: v.name,
-    "Описание": lambda v: v.description,
+    "Описание": lambda v: "\n".join(v.description) if type(v.description) == list else v.description,
     "Компания": lambda v: v.employer_name,
     "Название региона": lambda v: v.area_name,
     "Опыт работы": lambda v: exp_list.index(DIC_PARAM[v.experience_id]),
@@ -421,15 +541,353 @@ dic_sorters = {
     "Оклад": lambda v: (int(v.salary.salary_from) + int(v.salary.salary_to)) / 2 * currency_to_rub[
         v.salary.salary_currency],
     "Навыки": lambda v: len(v.key_skills) if type(v.key_skills) == list else 1,
-    "Дата публикации вакансии": lambda v: [datetime.strptime(v.published_at, "%Y-%m-%dT%H:%M:%S%z")]
+    "Дата публикации вакансии": lambda v: v.published_timestamp
 }
+DIC_INDEX = {
+    "Название": lambda v: v.name,
+    "Название региона": lambda v: v.area_name,
+    "Компания": lambda v: v.employer_name,
+    "Опыт работы": lambda v: DIC_PARAM[v.experience_id],
+    "Премиум-вакансия": lambda v: dic_joke[v.premium],
+    "Идентификатор валюты оклада": lambda v: DIC_PARAM[v.salary.salary_currency]
+}
+INDEXED_FILTERS = set(DIC_INDEX) | {"Оклад", "Дата публикации вакансии", "Поиск", "Навыки"}
+TOKEN_PATTERN = re.compile(r"[0-9a-zа-я]+")
+RUSSIAN_ENDINGS = sorted(["ами", "ями", "ого", "его", "ому", "ему", "ыми", "ими", "ых", "их", "ой", "ей", "ий",
+                          "ый", "ая", "яя", "ое", "ее", "ые", "ие", "ую", "юю", "ов", "ев", "ам", "ям", "ах", "ях",
+                          "ом", "ем", "ия", "ть", "а", "я", "о", "е", "ы", "и", "у", "ю", "ь"], key=len, reverse=True)
+TEXT_STEMMING = True
+TEXT_INDEX_SUFFIX = ".idx"
+TEXT_INDEX_MAGIC = b"VIDX"
+TEXT_INDEX_VERSION = 1
+BM25_K1 = 1.2
+BM25_B = 0.75
+SORT_ASCENDING = " по возрастанию"
+SORT_DESCENDING = " по убыванию"
+QUERY_CACHE_MAX_BYTES = 64 * 2 ** 20
+QUERY_CACHE_MAX_ENTRIES = 256
+SORT_RANKS_MIN_SHARE = 16
+
+
+class IntervalIndex:
+    def __init__(self, intervals):
+        self.root = self.build([(start, end, pos) for pos, (start, end) in enumerate(intervals)])
+        self.starts = sorted(start for start, _ in intervals)
+        self.ends = sorted(end for _, end in intervals)
+
+    def build(self, intervals):
+        if not intervals:
+            return None
+        starts = sorted(start for start, _, _ in intervals)
+        center = starts[len(starts) // 2]
+        left = [interval for interval in intervals if interval[1] < center]
+        right = [interval for interval in intervals if interval[0] > center]
+        middle = [interval for interval in intervals if interval[0] <= center <= interval[1]]
+        return (center,
+                sorted(middle, key=lambda interval: interval[0]),
+                sorted(middle, key=lambda interval: interval[1], reverse=True),
+                self.build(left),
+                self.build(right))
+
+    def overlap(self, low, high):
+        found = []
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop()
+            if node is None:
+                continue
+            center, by_start, by_end, left, right = node
+            if high < center:
+                for start, _, pos in by_start:
+                    if start > high:
+                        break
+                    found.append(pos)
+                nodes.append(left)
+            elif low > center:
+                for _, end, pos in by_end:
+                    if end < low:
+                        break
+                    found.append(pos)
+                nodes.append(right)
+            else:
+                found.extend(pos for _, _, pos in by_start)
+                nodes.append(left)
+                nodes.append(right)
+        return sorted(found)
+
+    def stab(self, point):
+        return self.overlap(point, point)
+
+    def count(self, low, high):
+        return max(bisect_right(self.starts, high) - bisect_left(self.ends, low), 0)
+
+
+class SortedIndex:
+    def __init__(self, keys):
+        pairs = sorted((key, pos) for pos, key in enumerate(keys))
+        self.keys = [key for key, _ in pairs]
+        self.positions = [pos for _, pos in pairs]
+
+    def range(self, low, high):
+        return sorted(self.positions[bisect_left(self.keys, low):bisect_right(self.keys, high)])
+
+    def count(self, low, high):
+        return max(bisect_right(self.keys, high) - bisect_left(self.keys, low), 0)
+
+
+def positions_bitmap(positions, size):
+    bits = bytearray(size // 8 + 1)
+    for pos in positions:
+        bits[pos >> 3] |= 1 << (pos & 7)
+    return int.from_bytes(bits, "little")
+
+
+def bitmap_positions(bitmap):
+    bits = bin(bitmap)[:1:-1]
+    positions, pos = [], bits.find("1")
+    while pos != -1:
+        positions.append(pos)
+        pos = bits.find("1", pos + 1)
+    return positions
+
+
+def bitmap_count(bitmap):
+    return bin(bitmap).count("1")
+
+
+class SkillIndex:
+    def __init__(self, skill_lists):
+        listed, single = {}, {}
+        for pos, skills in enumerate(skill_lists):
+            if type(skills) == list:
+                for skill in skills:
+                    listed.setdefault(skill, []).append(pos)
+            else:
+                single.setdefault(skills, []).append(pos)
+        self.size = len(skill_lists)
+        self.bitmaps = {skill: positions_bitmap(positions, self.size) for skill, positions in listed.items()}
+        self.single = {skill: positions_bitmap(positions, self.size) for skill, positions in single.items()}
+
+    def get_bitmap(self, skill):
+        bitmap = self.bitmaps.get(skill, 0)
+        for skills, single in self.single.items():
+            if skill in skills:
+                bitmap |= single
+        return bitmap
+
+    def get_conjunction(self, skills):
+        bitmap = (1 << self.size) - 1
+        for skill in skills.split(", "):
+            bitmap &= self.get_bitmap(skill)
+        return bitmap
+
+    def match(self, skills):
+        return bitmap_positions(self.get_conjunction(skills))
+
+    def count(self, skills):
+        return bitmap_count(self.get_conjunction(skills))
+
+    def co_occurrence(self, skills):
+        bitmap = self.get_conjunction(skills)
+        counts = {other: bitmap_count(bitmap & other_bitmap) for other, other_bitmap in self.bitmaps.items()
+                  if other not in skills.split(", ")}
+        return {other: count for other, count in counts.items() if count}
+
+
+def build_text_index(texts, stem=True, source=None):
+    postings = {}
+    lengths = array("I")
+    for doc, text in enumerate(texts):
+        tokens = tokenize(text, stem)
+        lengths.append(len(tokens))
+        for position, token in enumerate(tokens):
+            postings.setdefault(token, {}).setdefault(doc, []).append(position)
+    term_offsets, term_meta, data, terms = array("I", [0]), array("I"), array("I"), bytearray()
+    for term in sorted(postings):
+        docs = postings[term]
+        term_meta.extend([len(data), len(docs)])
+        data.extend(docs)
+        data.extend(len(positions) for positions in docs.values())
+        for positions in docs.values():
+            data.extend(positions)
+        terms += term.encode("utf-8")
+        term_offsets.append(len(terms))
+    sections, body, size = {}, [], 0
+    for name, section in [("lengths", lengths), ("term_offsets", term_offsets), ("term_meta", term_meta),
+                          ("postings", data), ("terms", terms)]:
+        section = bytes(section)
+        sections[name] = [size, size + len(section)]
+        body.append(section)
+        size += len(section)
+    header = json.dumps({"version": TEXT_INDEX_VERSION, "byteorder": sys.byteorder, "stem": stem, "source": source,
+                         "average_length": sum(lengths) / len(lengths) if lengths else 0,
+                         "sections": sections}).encode("utf-8")
+    padding = b" " * (-(len(header) + 8) % 4)
+    return b"".join([TEXT_INDEX_MAGIC, (len(header) + len(padding)).to_bytes(4, "little"), header, padding] + body)
+
+
+def get_source_stamp(file_name):
+    stat = os.stat(file_name)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class TextIndex:
+    def __init__(self, buffer):
+        self.buffer = buffer
+        view = memoryview(buffer)
+        if bytes(view[:4]) != TEXT_INDEX_MAGIC:
+            raise ValueError("Неизвестный формат индекса")
+        header_length = int.from_bytes(view[4:8], "little")
+        self.header = json.loads(bytes(view[8:8 + header_length]).decode("utf-8"))
+        if self.header["version"] != TEXT_INDEX_VERSION or self.header["byteorder"] != sys.byteorder:
+            raise ValueError("Индекс создан другой версией программы")
+        sections = {name: view[8 + header_length + begin:8 + header_length + end]
+                    for name, (begin, end) in self.header["sections"].items()}
+        self.lengths = sections["lengths"].cast("I")
+        self.term_offsets = sections["term_offsets"].cast("I")
+        self.term_meta = sections["term_meta"].cast("I")
+        self.postings = sections["postings"].cast("I")
+        self.terms = sections["terms"]
+        self.stem = self.header["stem"]
+
+    @staticmethod
+    def open(path):
+        try:
+            with open(path, "rb") as file:
+                return TextIndex(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def close(self):
+        for view in (self.lengths, self.term_offsets, self.term_meta, self.postings, self.terms):
+            view.release()
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def get_term_bytes(self, number):
+        return bytes(self.terms[self.term_offsets[number]:self.term_offsets[number + 1]])
+
+    def get_term(self, term):
+        key = term.encode("utf-8")
+        low, high = 0, len(self.term_offsets) - 1
+        while low < high:
+            mid = (low + high) // 2
+            if self.get_term_bytes(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        if low < len(self.term_offsets) - 1 and self.get_term_bytes(low) == key:
+            return self.term_meta[2 * low], self.term_meta[2 * low + 1]
+        return None
+
+    def get_frequencies(self, term):
+        offset, count = self.get_term(term) or (0, 0)
+        return dict(zip(self.postings[offset:offset + count].tolist(),
+                        self.postings[offset + count:offset + 2 * count].tolist()))
+
+    def get_positions(self, term, docs):
+        offset, count = self.get_term(term)
+        slots = dict(zip(self.postings[offset:offset + count].tolist(), range(count)))
+        starts = list(accumulate(self.postings[offset + count:offset + 2 * count].tolist(), initial=offset + 2 * count))
+        return {doc: set(self.postings[starts[slots[doc]]:starts[slots[doc] + 1]].tolist()) for doc in docs}
+
+    def match_phrase(self, phrase, docs):
+        starts = self.get_positions(phrase[0], docs)
+        for shift, term in enumerate(phrase[1:], 1):
+            following = self.get_positions(term, starts)
+            starts = {doc: {start for start in found if start + shift in following[doc]}
+                      for doc, found in starts.items()}
+            starts = {doc: found for doc, found in starts.items() if found}
+        return set(starts)
+
+    def count(self, text):
+        terms = {term for phrase in parse_search_query(text, self.stem) for term in phrase}
+        return min(((self.get_term(term) or (0, 0))[1] for term in terms), default=0)
+
+    def search(self, text):
+        phrases = parse_search_query(text, self.stem)
+        frequencies = {term: self.get_frequencies(term) for phrase in phrases for term in phrase}
+        if not frequencies:
+            return {}
+        ordered = sorted(frequencies.values(), key=len)
+        docs = set(ordered[0]).intersection(*ordered[1:])
+        for phrase in phrases:
+            if len(phrase) > 1 and docs:
+                docs = self.match_phrase(phrase, docs)
+        total, average = len(self.lengths), self.header["average_length"]
+        scores = dict.fromkeys(docs, 0.0)
+        for term, found in frequencies.items():
+            idf = math.log(1 + (total - len(found) + 0.5) / (len(found) + 0.5))
+            for doc in docs:
+                frequency = found[doc]
+                scores[doc] += idf * frequency * (BM25_K1 + 1) / (
+                        frequency + BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[doc] / average))
+        return scores
+
+    def match(self, text):
+        return sorted(self.search(text))
+
+
+def dense_ranks(column):
+    ranks, rank, previous = array("I", bytes(4 * len(column))), -1, None
+    for pos in sorted(range(len(column)), key=column.__getitem__):
+        if rank < 0 or column[pos] != previous:
+            rank, previous = rank + 1, column[pos]
+        ranks[pos] = rank
+    return ranks
+
+
+class QueryCache:
+    def __init__(self, max_bytes=QUERY_CACHE_MAX_BYTES, max_entries=QUERY_CACHE_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, matched, ordered):
+        self.discard(key)
+        size = matched.itemsize * len(matched) + ordered.itemsize * len(ordered)
+        if size > self.max_bytes:
+            return
+        self.entries[key] = matched, ordered
+        self.size += size
+        while self.size > self.max_bytes or len(self.entries) > self.max_entries:
+            self.discard(next(iter(self.entries)))
+
+    def discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= sum(positions.itemsize * len(positions) for positions in entry)
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    def stats(self):
+        return (f"Кэш запросов: попаданий {self.hits}, промахов {self.misses}, записей {len(self.entries)}, "
+                f"{self.size / 2 ** 10:.1f} КБ из {self.max_bytes / 2 ** 10:.0f} КБ")
 
 
 class DataSet:
     def __init__(self, file_name: str) -> None:
         self.file_name: str = file_name
         self.vacancies_objects: List[Vacancy] = []
+        self.indexes: Dict[str, Dict[str, List[int]]] = {}
+        self.sort_ranks: Dict[str, array] = {}
         self.fill_vacancies()
+        self.fingerprint = (os.path.abspath(file_name), *get_source_stamp(file_name))
+        self.query_cache = QueryCache()
 
     def read_file(self):
         keys = []
@@ -459,58 +917,188 @@ class DataSet:
         for vacancy in reader:
             appendix = {}
             for i in range(len(vacancy)):
-                append_item = vacancy[i].strip()
-                tag_start = append_item.find("<")
-                while tag_start != -1:
-                    tag_end = append_item.find(">", tag_start)
-                    append_item = append_item.replace(append_item[tag_start: tag_end + 1], "")
-                    tag_start = append_item.find("<", tag_start)
-                append_item = append_item.strip()
-                while append_item.find("  ") != -1:
-                    append_item = append_item.replace("  ", " ")
-                if append_item.find("\n") != -1:
-                    append_item = [" ".join(i.split()) for i in append_item.split("\n")]
-                else:
-                    append_item = " ".join(append_item.split())
-                appendix[list_naming[i]] = append_item
+                appendix[list_naming[i]] = clean_html(vacancy[i])
             self.vacancies_objects.append(Vacancy(appendix))
 
-    def filter_vacancies(self, filter_key, filter_val):
-        filter_func = DIC_FILTER[filter_key]
-        self.vacancies_objects = list(filter(lambda v: get_filter(filter_func, filter_key, *filter_val)(v.to_dict()),
-                                             [vac for vac in self.vacancies_objects]))
+    def get_index(self, index_key):
+        if index_key not in self.indexes:
+            self.indexes[index_key] = self.build_index(index_key)
+        return self.indexes[index_key]
+
+    def build_index(self, index_key):
+        if index_key == "Оклад":
+            return IntervalIndex([(int(v.salary.salary_from), int(v.salary.salary_to)) for v in self.vacancies_objects])
+        if index_key == "Дата публикации вакансии":
+            return SortedIndex([v.published_date for v in self.vacancies_objects])
+        if index_key == "Поиск":
+            return self.load_text_index()
+        if index_key == "Навыки":
+            return SkillIndex([v.key_skills for v in self.vacancies_objects])
+        index = {}
+        for pos, vacancy in enumerate(self.vacancies_objects):
+            index.setdefault(DIC_INDEX[index_key](vacancy), []).append(pos)
+        return index
+
+    def load_text_index(self):
+        texts = (vacancy.search_text() for vacancy in self.vacancies_objects)
+        path = self.file_name + TEXT_INDEX_SUFFIX
+        source = get_source_stamp(self.file_name)
+        index = TextIndex.open(path)
+        if index is not None and index.header["source"] == source and index.stem == TEXT_STEMMING:
+            return index
+        if index is not None:
+            index.close()
+        data = build_text_index(texts, TEXT_STEMMING, source)
+        try:
+            with open(path + ".tmp", "wb") as file:
+                file.write(data)
+            os.replace(path + ".tmp", path)
+        except OSError:
+            if os.path.exists(path + ".tmp"):
+                os.remove(path + ".tmp")
+            return TextIndex(data)
+        return TextIndex.open(path) or TextIndex(data)
+
+    def search_vacancies(self, text, limit=None):
+        scores = self.get_index("Поиск").search(text)
+        if limit is None:
+            return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def get_skill_co_occurrence(self, skills, limit=None):
+        counts = self.get_index("Навыки").co_occurrence(skills)
+        return heapq.nsmallest(limit or len(counts), counts.items(), key=lambda item: (-item[1], item[0]))
+
+    def get_positions(self, filter_key, filter_val):
+        if filter_key == "Оклад":
+            return self.get_index(filter_key).overlap(*parse_salary_range(filter_val[0]))
+        if filter_key == "Дата публикации вакансии":
+            return self.get_index(filter_key).range(*parse_date_range(filter_val[0]))
+        if filter_key in ("Поиск", "Навыки"):
+            return self.get_index(filter_key).match(filter_val[0])
+        return self.get_index(filter_key).get(filter_val[0], [])
+
+    def estimate_filter(self, filter_key, filter_val):
+        if filter_key == "Оклад":
+            return self.get_index(filter_key).count(*parse_salary_range(filter_val[0]))
+        if filter_key == "Дата публикации вакансии":
+            return self.get_index(filter_key).count(*parse_date_range(filter_val[0]))
+        if filter_key == "Поиск" and filter_key not in self.indexes:
+            return len(self.vacancies_objects)
+        if filter_key in ("Поиск", "Навыки"):
+            return self.get_index(filter_key).count(filter_val[0])
+        if filter_key in DIC_INDEX:
+            return len(self.get_index(filter_key).get(filter_val[0], []))
+        return len(self.vacancies_objects)
+
+    def plan_clause(self, clause):
+        predicates = [(filter_key, filter_val) for filter_key, filter_val in clause if filter_key]
+        return sorted(predicates, key=lambda predicate: (self.estimate_filter(*predicate),
+                                                         predicate[0] not in INDEXED_FILTERS))
+
+    def match_clause(self, clause):
+        plan = self.plan_clause(clause)
+        if plan and plan[0][0] in INDEXED_FILTERS:
+            positions = self.get_positions(*plan.pop(0))
+        else:
+            positions = range(len(self.vacancies_objects))
+        if not plan:
+            return list(positions)
+        probes = [get_filter(DIC_FILTER[filter_key], filter_key, *filter_val) for filter_key, filter_val in plan]
+        matched = []
+        for pos in positions:
+            vac = self.vacancies_objects[pos]
+            if all(probe(vac) for probe in probes):
+                matched.append(pos)
+        return matched
+
+    def select_positions(self, filter_query):
+        if len(filter_query) == 1:
+            return self.match_clause(filter_query[0])
+        return sorted(set().union(*[self.match_clause(clause) for clause in filter_query]))
+
+    def filter_vacancies(self, filter_query):
+        return [self.vacancies_objects[pos] for pos in self.select_positions(filter_query)]
+
+    def get_sort_ranks(self, sort_spec):
+        if sort_spec not in self.sort_ranks:
+            spec = parse_sort_spec(sort_spec)
+            if spec == [(sort_spec, False)]:
+                column = [dic_sorters[sort_spec](vacancy) for vacancy in self.vacancies_objects]
+            else:
+                columns = [self.get_sort_ranks(sort_name) for sort_name, _ in spec]
+                column = list(zip(*[[-rank for rank in ranks] if descending else ranks
+                                    for ranks, (_, descending) in zip(columns, spec)]))
+            self.sort_ranks[sort_spec] = dense_ranks(column)
+        return self.sort_ranks[sort_spec]
+
+    def sort_selected(self, positions, sort_spec, reverse=False):
+        for sort_name, descending in reversed(parse_sort_spec(sort_spec)):
+            key = dic_sorters[sort_name]
+            positions = sorted(positions, key=lambda pos: key(self.vacancies_objects[pos]),
+                               reverse=descending != reverse)
+        return positions
+
+    def sort_positions(self, positions, sort_spec, reverse=False, count=None):
+        if sort_spec not in self.sort_ranks and len(positions) * SORT_RANKS_MIN_SHARE < len(self.vacancies_objects):
+            return self.sort_selected(positions, sort_spec, reverse)[:count]
+        key = self.get_sort_ranks(sort_spec).__getitem__
+        if count is None or count >= len(positions):
+            return sorted(positions, key=key, reverse=reverse)
+        if reverse:
+            return heapq.nlargest(count, positions, key=key)
+        return heapq.nsmallest(count, positions, key=key)
 
     def sort_vacancies(self, name, reverse=False):
-        self.vacancies_objects = sorted(self.vacancies_objects, key=dic_sorters[name], reverse=reverse)
+        return [self.vacancies_objects[pos]
+                for pos in self.sort_positions(range(len(self.vacancies_objects)), name, reverse)]
+
+    def prettify_vacancies(self, filter_query, sort_name, reverse=False):
+        return self.get_sorted_vacancies(filter_query, sort_name, reverse)[0]
+
+    def get_query_key(self, filter_query, sort_name, reverse):
+        return (self.fingerprint, tuple(tuple((filter_key, tuple(filter_val)) for filter_key, filter_val in clause)
+                                        for clause in filter_query), sort_name, reverse)
 
-    def prettify_vacancies(self, filter_key, filter_val, sort_name, reverse=False):
-        self.filter_vacancies(filter_key, filter_val)
-        self.sort_vacancies(sort_name, reverse)
+    def get_sorted_vacancies(self, filter_query, sort_name, reverse=False, count=None):
+        key = self.get_query_key(filter_query, sort_name, reverse)
+        entry = self.query_cache.get(key)
+        matched, ordered = entry if entry is not None else (array("I", self.select_positions(filter_query)), None)
+        if ordered is None or len(ordered) < min(len(matched), len(matched) if count is None else count):
+            top_count = count if ordered is None else None
+            ordered = array("I", self.sort_positions(matched, sort_name, reverse, top_count))
+            self.query_cache.put(key, matched, ordered)
+        return [self.vacancies_objects[pos] for pos in islice(ordered, count)], len(matched)
+
+    def print_vacancies(self, filter_query, sort_name, dic_naming, reverse=False, row_indexes=None):
+        from prettytable import PrettyTable
 
-    def print_vacancies(self, filter_key, filter_val, sort_name, dic_naming, reverse=False, row_indexes=None):
         if row_indexes is None:
             row_indexes = []
-        self.prettify_vacancies(filter_key, filter_val, sort_name, reverse)
-        pretty_vacancies = [vacancy.to_pretty_dict() for vacancy in self.vacancies_objects]
+        count = None
+        if len(row_indexes) > 1 and row_indexes[1] - 1 and 0 <= row_indexes[0] - 1 <= row_indexes[1] - 1:
+            count = row_indexes[1] - 1
+        top_vacancies, added = self.get_sorted_vacancies(filter_query, sort_name, reverse, count)
         if not row_indexes:
-            row_indexes = [1, len(pretty_vacancies) + 1]
+            row_indexes = [1, added + 1]
         if len(row_indexes) == 1:
-            row_indexes = [row_indexes[0], len(pretty_vacancies) + 1]
-        added, count = 0, 1
-        output = PrettyTable(hrules=1, start=row_indexes[0] - 1, end=row_indexes[1] - 1)
+            row_indexes = [row_indexes[0], added + 1]
+        start, end = row_indexes[0] - 1, row_indexes[1] - 1 or None
+        output = PrettyTable(hrules=1)
         output.align = "l"
-        for vac in pretty_vacancies:
-            if not output.field_names:
-                output.field_names = [name for name in dic_trans.keys() if vac.get(name, None) or name == "№"]
-                dict_max = {}
-                for key in output.field_names:
-                    dict_max[dic_trans[key]] = 20
-                output._max_width = dict_max
+        if top_vacancies:
+            first = top_vacancies[0].to_pretty_dict()
+            output.field_names = [name for name in dic_trans.keys() if first.get(name, None) or name == "№"]
+            dict_max = {}
+            for key in output.field_names:
+                dict_max[dic_trans[key]] = 20
+            output._max_width = dict_max
+        for count, vacancy in list(enumerate(top_vacancies, 1))[start:end]:
+            vac = vacancy.to_pretty_dict()
             vac["№"] = count
             addable = []
             for key in output.field_names:
                 addable.append(prettify_val(vac.get(key)))
-            count, added = count + 1, added + 1
             output.add_row(addable)
         output.field_names = [dic_trans[name] for name in output.field_names]
         if added != 0 and added >= row_indexes[0]:
@@ -518,6 +1106,28 @@ class DataSet:
         else:
             print("Ничего не найдено")
 
+    def export_vacancies(self, file_name, filter_query, sort_name, dic_naming, reverse=False, row_indexes=None,
+                         max_rows=EXCEL_MAX_ROWS):
+        vacancies, _ = self.get_sorted_vacancies(filter_query, sort_name, reverse)
+        start, end = (row_indexes or [1])[0], None
+        if row_indexes and len(row_indexes) > 1:
+            end = row_indexes[1]
+        fields = list(dic_naming.keys())
+
+        def get_rows():
+            for number, vacancy in enumerate(islice(vacancies, start - 1, None if end is None else end - 1), start):
+                vac = vacancy.to_pretty_dict()
+                vac["№"] = number
+                yield [excel_val(vac.get(key)) for key in fields]
+
+        exported, sheets = save_split_sheets(file_name, "Вакансии", [dic_naming[key] for key in fields], get_rows(),
+                                             [8 if key == "№" else 30 for key in fields], max_rows)
+        if not exported:
+            print("Ничего не найдено")
+            return 0
+        print(f"Выгружено вакансий: {exported}, листов: {sheets}")
+        return exported
+
 
 class Salary:
     def __init__(self, params):
@@ -538,6 +1148,15 @@ class Vacancy:
         self.salary = Salary(params)
         self.area_name = params["area_name"]
         self.published_at = params["published_at"]
+        try:
+            published = datetime.strptime(self.published_at, "%Y-%m-%dT%H:%M:%S%z")
+            self.published_timestamp = int(published.timestamp())
+            self.published_date = published.toordinal()
+        except ValueError:
+            self.published_timestamp, self.published_date = UNKNOWN_PUBLISHED, UNKNOWN_PUBLISHED
+
+    def search_text(self):
+        return f"{self.name} {join_text(self.description)}"
 
     def to_dict(self):
         return {"name": self.name, "description": self.description, "key_skills": self.key_skills,
@@ -564,66 +1183,180 @@ class InputConnect:
     message: str = None
     sort_reverse: bool = False
     sort_param: str
-    filter_key: str
-    filter_val: List[str]
+    filter_query: List[List[Tuple[str, List[str]]]]
     dict_init: Dict[str, str]
     filename: str
     rows: List[int]
 
-    def __init__(self):
-        self.filename = input("Введите название файла: ")
-        filter_params = input("Введите параметр фильтрации: ")
-        if ':' not in filter_params and filter_params != "":
-            if self.message is None:
-                self.message = "Формат ввода некорректен"
-            self.is_ok = False
-        filter_params = filter_params.split(": ")
-        if filter_params[0] not in DIC_FILTER.keys() and filter_params != "":
-            if self.message is None:
-                self.message = "Параметр поиска некорректен"
-            self.is_ok = False
-        if filter_params != "":
-            self.filter_key, self.filter_val = filter_params[0], filter_params[1:]
-        self.sort_param = input("Введите параметр сортировки: ")
-        if not (self.sort_param in dic_terms.keys() or self.sort_param == ""):
-            self.is_ok = False
-            if self.message is None:
-                self.message = "Параметр сортировки некорректен"
-        sort_reverse_input = input("Обратный порядок сортировки (Да / Нет): ")
+    def __init__(self, interactive=True):
+        self.filter_query, self.sort_param, self.rows, self.dict_init = parse_filter_query(""), "", [], dic_trans
+        if interactive:
+            self.filename = input("Введите название файла: ")
+            self.set_filter(input("Введите параметр фильтрации: "))
+            self.set_sort(input("Введите параметр сортировки: "))
+            self.set_reverse(input("Обратный порядок сортировки (Да / Нет): "))
+            self.set_rows(input("Введите диапазон вывода: "))
+            self.set_columns(input("Введите требуемые столбцы: "))
+
+    def set_error(self, message):
+        if self.message is None:
+            self.message = message
+        self.is_ok = False
+
+    def set_filter(self, filter_params):
+        filter_query = parse_filter_query(filter_params)
+        predicates = [predicate for clause in filter_query for predicate in clause]
+        if filter_params != "" and any(":" not in filter_key and not filter_val
+                                       for filter_key, filter_val in predicates):
+            self.set_error("Формат ввода некорректен")
+        if any(filter_key not in DIC_FILTER.keys() for filter_key, _ in predicates):
+            self.set_error("Параметр поиска некорректен")
+        for filter_key, filter_val in predicates:
+            try:
+                if filter_key in DIC_VALUE_PARSERS and filter_val:
+                    DIC_VALUE_PARSERS[filter_key](filter_val[0])
+            except ValueError:
+                self.set_error("Значение параметра поиска некорректно")
+        if self.is_ok:
+            self.filter_query = filter_query
+        return self.is_ok
+
+    def set_sort(self, sort_param):
+        sort_names = [sort_name for sort_name, _ in parse_sort_spec(sort_param)]
+        if not (all(sort_name in dic_sorters.keys() and sort_name for sort_name in sort_names) or sort_param == ""):
+            self.set_error("Параметр сортировки некорректен")
+            return False
+        self.sort_param = sort_param
+        return True
+
+    def set_reverse(self, sort_reverse_input):
         if not (sort_reverse_input in ["Да", "Нет", ""]):
-            self.is_ok = False
-            if self.message is None:
-                self.message = "Порядок сортировки задан некорректно"
-        if sort_reverse_input == "Да":
-            self.sort_reverse = True
-        else:
-            self.sort_reverse = False
-        self.rows = [int(i) for i in input("Введите диапазон вывода: ").split()]
+            self.set_error("Порядок сортировки задан некорректно")
+            return False
+        self.sort_reverse = sort_reverse_input == "Да"
+        return True
+
+    def set_rows(self, rows_input):
+        try:
+            self.rows = [int(i) for i in rows_input.split()]
+        except ValueError:
+            self.set_error("Диапазон вывода задан некорректно")
+            return False
+        return True
 
+    def set_columns(self, columns_input):
+        fields = columns_input.split(", ")
+        if fields == [""]:
+            self.dict_init = dic_trans
+            return True
+        keys = {val: key for key, val in dic_trans.items()}
+        if any(field not in keys for field in fields):
+            self.set_error("Столбцы заданы некорректно")
+            return False
         self.dict_init = {"№": "№"}
-        fields = input("Введите требуемые столбцы: ").split(", ")
-        if fields and fields != ['']:
-            keys = [list(dic_trans.keys())[list(dic_trans.values()).index(i)] for i in fields]
-            vals = [dic_trans[key] for key in keys]
-            for i in range(len(keys)):
-                self.dict_init[keys[i]] = vals[i]
+        for field in fields:
+            self.dict_init[keys[field]] = field
+        return True
+
+
+class Session:
+    commands = {"Фильтр": "set_filter",
+                "Сортировка": "set_sort",
+                "Обратный порядок": "set_reverse",
+                "Диапазон": "set_rows",
+                "Столбцы": "set_columns"}
+
+    def __init__(self, data_set):
+        self.data_set = data_set
+        self.settings = InputConnect(interactive=False)
+
+    def run(self):
+        print("Команды: " + ", ".join(f"{name}: ..." for name in self.commands) + ", Далее, Назад, Кэш, Выход")
+        while True:
+            try:
+                command = input("> ").strip()
+            except EOFError:
+                break
+            if command == "Выход":
+                break
+            if command:
+                self.execute(command)
+
+    def execute(self, command):
+        name, _, value = command.partition(":")
+        if name in ("Далее", "Назад"):
+            self.turn_page(1 if name == "Далее" else -1)
+        elif name == "Кэш":
+            print(self.data_set.query_cache.stats())
+            return
+        elif name in self.commands:
+            self.settings.is_ok, self.settings.message = True, None
+            if not getattr(self.settings, self.commands[name])(value.strip()):
+                print(self.settings.message)
+                return
         else:
-            self.dict_init = dic_trans
-
+            print("Неизвестная команда")
+            return
+        hits, start = self.data_set.query_cache.hits, time.perf_counter()
+        self.data_set.print_vacancies(self.settings.filter_query, self.settings.sort_param, self.settings.dict_init,
+                                      self.settings.sort_reverse, self.settings.rows)
+        cached = " (из кэша)" if self.data_set.query_cache.hits > hits else ""
+        print(f"Запрос выполнен за {(time.perf_counter() - start) * 1000:.1f} мс{cached}")
+
+    def turn_page(self, step):
+        if len(self.settings.rows) == 2:
+            size = self.settings.rows[1] - self.settings.rows[0]
+            start = max(self.settings.rows[0] + step * size, 1)
+            self.settings.rows = [start, start + size]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--xlsx", help="Выгрузить отобранные вакансии в xlsx-файл вместо печати таблицы")
+    parser.add_argument("--search", help="Найти вакансии по словам и фразам в кавычках в названии и описании")
+    parser.add_argument("--limit", type=int, default=20, help="Количество строк в результатах --search и --co-skills")
+    parser.add_argument("--no-stem", action="store_true", help="Искать по словам без отбрасывания окончаний")
+    parser.add_argument("--co-skills", help="Вывести навыки, которые чаще всего требуются вместе с указанными")
+    parser.add_argument("--session", action="store_true",
+                        help="Загрузить файл один раз и выполнять запросы к нему, пока не будет введено Выход")
+    args = parser.parse_args()
+    TEXT_STEMMING = not args.no_stem
+
+    if args.search:
+        ds = DataSet(input("Введите название файла: "))
+        found = ds.search_vacancies(args.search, args.limit)
+        for pos, score in found:
+            print(f"{pos + 1}\t{score:.3f}\t{ds.vacancies_objects[pos].name}")
+        if not found:
+            print("Ничего не найдено")
+    elif args.co_skills:
+        ds = DataSet(input("Введите название файла: "))
+        total = ds.get_index("Навыки").count(args.co_skills)
+        print(f"Вакансий с навыками {args.co_skills}: {total}")
+        for skill, count in ds.get_skill_co_occurrence(args.co_skills, args.limit):
+            print(f"{skill}\t{count}\t{count / total:.1%}")
+    elif args.session:
+        loading_start = time.perf_counter()
+        ds = DataSet(input("Введите название файла: "))
+        print(f"Загружено вакансий: {len(ds.vacancies_objects)} за {time.perf_counter() - loading_start:.2f} с")
+        Session(ds).run()
+    elif input("Введите данные для печати: ") == "":
+        input_connect: InputConnect = InputConnect()
+        if input_connect.is_ok:
+            ds = DataSet(input_connect.filename)
+            if args.xlsx:
+                ds.export_vacancies(args.xlsx, input_connect.filter_query, input_connect.sort_param,
+                                    input_connect.dict_init, input_connect.sort_reverse, input_connect.rows)
+            else:
+                ds.print_vacancies(input_connect.filter_query, input_connect.sort_param, input_connect.dict_init,
+                                   input_connect.sort_reverse, input_connect.rows)
+        else:
+            print(input_connect.message)
 
-if input("Введите данные для печати: ") == "":
-    input_connect: InputConnect = InputConnect()
-    if input_connect.is_ok:
-        ds = DataSet(input_connect.filename)
-        ds.print_vacancies(input_connect.filter_key, input_connect.filter_val, input_connect.sort_param,
-                           input_connect.dict_init, input_connect.sort_reverse, input_connect.rows)
     else:
-        print(input_connect.message)
-
-else:
-    filename = input("Введите название файлика: ")
-    name = input("Введите название профессии: ")
+        filename = input("Введите название файлика: ")
+        name = input("Введите название профессии: ")
 
-    rep = Report(filename, name)
-    rep.print_file()
-    rep.generate_pdf()
+        rep = Report(filename, name)
+        rep.print_file()
+        rep.generate_pdf()
@@ -1,14 +1,11 @@
 from csv import reader as csv_reader
 from re import sub
-from typing import List
+from functools import lru_cache
+import os
+from typing import List, TYPE_CHECKING
 
-import matplotlib.pyplot as plt
-import numpy as np
-import pdfkit
-from jinja2 import Environment, FileSystemLoader
-from openpyxl import Workbook
-from openpyxl.styles import Font, Border, Side
-from openpyxl.styles.numbers import FORMAT_PERCENTAGE_00
+if TYPE_CHECKING:
+    from openpyxl import Workbook
 
 
 def custom_quit(msg: str) -> None:
@@ -419,15 +416,14 @@ class Report:
     data : dict
         Словарь данных, получаемый из DataSet.
     """
-    workbook: Workbook
+    workbook: 'Workbook'
     data: dict
 
     def __init__(self, data: dict, **kwargs):
-        """Инициализирует объект Report. Создаёт пустой Workbook, распаковывает kwargs.
+        """Инициализирует объект Report, распаковывает kwargs. Workbook создаётся в generate_excel.
 
         :param data: Словарь с данными из DataSet.
         """
-        self.workbook = Workbook()
         self.data = data
         for key, value in kwargs.items():
             self.__setattr__(key, value)
@@ -438,6 +434,9 @@ class Report:
 
         :param file_name: название Excel-файла с явно указанным расширением.
         """
+        from openpyxl import Workbook
+
+        self.workbook = Workbook()
         self.fill_with_statistics()
         self.workbook.save(file_name)
 
@@ -512,6 +511,8 @@ class Report:
     def set_column_percent(column: list) -> None:
         """Устанавливает процентный формат для всех ячеек в этом столбце.
         """
+        from openpyxl.styles.numbers import FORMAT_PERCENTAGE_00
+
         for cell in column:
             cell.number_format = FORMAT_PERCENTAGE_00
 
@@ -529,6 +530,8 @@ class Report:
 
         :param ws: страница Excel-файла.
         """
+        from openpyxl.styles import Font, Border, Side
+
         isFirstRow = True
         for row in ws.rows:
             for cell in row:
@@ -567,6 +570,8 @@ class Report:
         :param file_name: Название для сохранения изображения.
         :param show_result: Показывать ли изображение после генерации. По-умолчанию False.
         """
+        import matplotlib.pyplot as plt
+
         self.draw_graphs()
         plt.tight_layout()
         plt.savefig(file_name, dpi=300)
@@ -577,6 +582,8 @@ class Report:
         """Рисует 4 графика на сетке 2x2. Каждый график строится на основании данных каждого ключа из data.
 
         """
+        import matplotlib.pyplot as plt
+
         figure, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2)
         self.draw_bar_graph(ax1, "Уровень зарплат по годам")
         self.draw_bar_graph(ax2, "Количество вакансий по годам")
@@ -589,6 +596,8 @@ class Report:
         :param subplot: Подобласть для отрисовки графика.
         :param name: Название графика. Должен соответствовать ключу из data.
         """
+        import numpy as np
+
         bar_width = 0.4
         first_label = 'средняя з/п'
         second_label = f'з/п {ui.profession_name}'
@@ -655,13 +664,14 @@ class Report:
 
         :param name: Название сохраняемого PDF-файла с явно указанным расширением.
         """
+        import pdfkit
+
         image_file = "graph.png"
         header_year = ["Год", "Средняя зарплата", f"Средняя зарплата - {ds.profession_name}", "Количество вакансий",
                        f"Количество вакансий - {ds.profession_name}"]
         header_city = ["Город", "Уровень зарплат", '', "Город", "Доля вакансий"]
 
-        env = Environment(loader=FileSystemLoader('.'))
-        template = env.get_template("pdf_template.html")
+        template = get_pdf_template()
 
         salaries_by_years = self.data["Уровень зарплат по годам"][0]
         vacancies_by_years = self.data["Количество вакансий по годам"][0]
@@ -703,6 +713,18 @@ class Report:
     # endregion
 
 
+@lru_cache(maxsize=None)
+def get_pdf_template():
+    """
+    Возвращает шаблон PDF-файла pdf_template.html из папки скрипта. Шаблон загружается и компилируется один раз
+    в процессе, а не при каждом формировании отчёта.
+    """
+    from jinja2 import Environment, FileSystemLoader
+
+    environment = Environment(loader=FileSystemLoader(os.path.dirname(os.path.abspath(__file__))))
+    return environment.get_template("pdf_template.html")
+
+
 def parse_html(line: str) -> str:
     """Убирает HTML-теги из строки.
 
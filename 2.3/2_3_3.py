@@ -1,17 +1,19 @@
 from csv import reader as csv_reader
 from datetime import datetime
 from re import sub
-from typing import List
-from line_profiler_pycharm import profile
+from functools import lru_cache
+import os
+from typing import List, TYPE_CHECKING
+try:
+    from line_profiler_pycharm import profile
+except ImportError:
+    def profile(func):
+        return func
 
 # from datetime import datetime
-import matplotlib.pyplot as plt
-import numpy as np
-import pdfkit
-from jinja2 import Environment, FileSystemLoader
-from openpyxl import Workbook
-from openpyxl.styles import Font, Border, Side
-from openpyxl.styles.numbers import FORMAT_PERCENTAGE_00
+
+if TYPE_CHECKING:
+    from openpyxl import Workbook
 
 
 def custom_quit(msg: str) -> None:
@@ -535,17 +537,16 @@ class Report:
     data : dict
         Словарь данных, получаемый из DataSet.
     """
-    workbook: Workbook
+    workbook: 'Workbook'
     data: dict
 
     @profile
     def __init__(self, data: dict, **kwargs):
         """
-        Инициализирует объект Report. Создаёт пустой Workbook, распаковывает kwargs.
+        Инициализирует объект Report, распаковывает kwargs. Workbook создаётся в generate_excel.
 
         :param data: Словарь с данными из DataSet.
         """
-        self.workbook = Workbook()
         self.data = data
         for key, value in kwargs.items():
             self.__setattr__(key, value)
@@ -558,6 +559,9 @@ class Report:
 
         :param file_name: название Excel-файла с явно указанным расширением.
         """
+        from openpyxl import Workbook
+
+        self.workbook = Workbook()
         self.fill_with_statistics()
         self.workbook.save(file_name)
 
@@ -642,6 +646,8 @@ class Report:
         """
         Устанавливает процентный формат для всех ячеек в этом столбце.
         """
+        from openpyxl.styles.numbers import FORMAT_PERCENTAGE_00
+
         for cell in column:
             cell.number_format = FORMAT_PERCENTAGE_00
 
@@ -663,6 +669,8 @@ class Report:
 
         :param ws: страница Excel-файла.
         """
+        from openpyxl.styles import Font, Border, Side
+
         isFirstRow = True
         for row in ws.rows:
             for cell in row:
@@ -704,6 +712,8 @@ class Report:
         :param file_name: Название для сохранения изображения.
         :param show_result: Показывать ли изображение после генерации. По-умолчанию False.
         """
+        import matplotlib.pyplot as plt
+
         self.draw_graphs()
         plt.tight_layout()
         plt.savefig(file_name, dpi=300)
@@ -716,6 +726,8 @@ class Report:
         Рисует 4 графика на сетке 2x2. Каждый график строится на основании данных каждого ключа из data.
 
         """
+        import matplotlib.pyplot as plt
+
         figure, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2)
         self.draw_bar_graph(ax1, "Уровень зарплат по годам")
         self.draw_bar_graph(ax2, "Количество вакансий по годам")
@@ -730,6 +742,8 @@ class Report:
         :param subplot: Подобласть для отрисовки графика.
         :param name: Название графика. Должен соответствовать ключу из data.
         """
+        import numpy as np
+
         bar_width = 0.4
         first_label = 'средняя з/п'
         second_label = f'з/п {ds.profession_name}'
@@ -801,13 +815,14 @@ class Report:
 
         :param name: Название сохраняемого PDF-файла с явно указанным расширением.
         """
+        import pdfkit
+
         image_file = "graph.png"
         header_year = ["Год", "Средняя зарплата", f"Средняя зарплата - {ds.profession_name}", "Количество вакансий",
                        f"Количество вакансий - {ds.profession_name}"]
         header_city = ["Город", "Уровень зарплат", '', "Город", "Доля вакансий"]
 
-        env = Environment(loader=FileSystemLoader('.'))
-        template = env.get_template("pdf_template.html")
+        template = get_pdf_template()
 
         salaries_by_years = self.data["Уровень зарплат по годам"][0]
         vacancies_by_years = self.data["Количество вакансий по годам"][0]
@@ -848,6 +863,19 @@ class Report:
         pdfkit.from_string(pdf_template, name, configuration=config, options={'enable-local-file-access': None})
     # endregion
 
+
+@lru_cache(maxsize=None)
+def get_pdf_template():
+    """
+    Возвращает шаблон PDF-файла pdf_template.html из папки скрипта. Шаблон загружается и компилируется один раз
+    в процессе, а не при каждом формировании отчёта.
+    """
+    from jinja2 import Environment, FileSystemLoader
+
+    environment = Environment(loader=FileSystemLoader(os.path.dirname(os.path.abspath(__file__))))
+    return environment.get_template("pdf_template.html")
+
+
 @profile
 def parse_html(line: str) -> str:
     """
@@ -1,16 +1,31 @@
 import csv
-from re import sub
 import os
-from typing import List
-import matplotlib.pyplot as plt
-import numpy as np
-import pdfkit
-from jinja2 import Environment, FileSystemLoader
-from openpyxl import Workbook
-from openpyxl.styles import Font, Border, Side
+from typing import List, TYPE_CHECKING
+from itertools import zip_longest
 import concurrent.futures
+import multiprocessing
+import asyncio
+import argparse
+import importlib.util
 import time
-from line_profiler_pycharm import profile
+import json
+import socket
+import sys
+from Separate_data import read_csv_title, get_chunks, iter_chunk_rows, parse_html
+from Graph_renderer import IMAGE_DPI, IMAGE_FORMAT, IMAGE_FORMATS, get_shared_renderer
+try:
+    from line_profiler_pycharm import profile
+except ImportError:
+    def profile(func):
+        return func
+
+WKHTMLTOPDF_PATH = r'D:\Programs\wkhtmltopdf\bin\wkhtmltopdf.exe'
+PDF_OPTIONS = {'enable-local-file-access': None}
+PAGE_BREAK = '\n<div style="page-break-before: always"></div>\n'
+
+if TYPE_CHECKING:
+    from Excel_writer import ExcelWriter
+    from Graph_renderer import GraphRenderer
 
 
 def custom_quit(msg: str) -> None:
@@ -333,6 +348,8 @@ class DataSet:
         Год: средняя зарплата среди вакансий, содержащих в своём названии profession_name, за этот период.
     profession_vacancies_by_years : {int, int}
         Год: количество вакансий, содержащих в своём названии profession_name, за этот период.
+    aggregated_fields : List[str]
+        Названия словарей со статистикой, которые складываются в merge_aggregates.
 
     """
 
@@ -343,6 +360,8 @@ class DataSet:
     vacancies_by_years: {int, int}
     profession_salary_by_years: {int, list}
     profession_vacancies_by_years: {int, int}
+    aggregated_fields: List[str] = ['salary_by_years', 'vacancies_by_years', 'profession_salary_by_years',
+                                    'profession_vacancies_by_years']
 
     # salaries_by_cities: {str, list}
     # ratio_vacancy_by_cities: {str, float}
@@ -418,6 +437,35 @@ class DataSet:
         else:
             d[f] += 1
 
+    def get_aggregates(self) -> dict:
+        """
+        Возвращает накопленные суммы и количества до усреднения в get_data. Такие данные, собранные по разным частям
+        файла, можно сложить при помощи merge_aggregates и получить ту же статистику, что и по всему файлу.
+
+        :returns: Словарь {название словаря этого объекта: его копия} и profession_count.
+        """
+        aggregates = {name: dict(self.__getattribute__(name)) for name in self.aggregated_fields}
+        aggregates['profession_count'] = self.profession_count
+        return aggregates
+
+    def merge_aggregates(self, aggregates: dict) -> None:
+        """
+        Добавляет к статистике этого объекта данные, полученные из get_aggregates. Годы могут быть строками,
+        если данные прошли через JSON.
+
+        :param aggregates: Результат get_aggregates.
+        """
+        self.profession_count += aggregates['profession_count']
+        for name in self.aggregated_fields:
+            d = self.__getattribute__(name)
+            for key, value in aggregates[name].items():
+                key = int(key)
+                if type(value) is list:
+                    salary, count = d.get(key, [0, 0])
+                    d[key] = [salary + value[0], count + value[1]]
+                else:
+                    d[key] = d.get(key, 0) + value
+
     # def set_correct_cities_data(self) -> None:
     #     """
     #     Обрабатывает словари, связанные с данными по городам. Сортирует словари по значениям - средней зарплате
@@ -494,186 +542,179 @@ class Report:
 
     Attributes
     ----------
-    workbook : Workbook
-        Класс, содержащий в себе функционал для работы с Excel таблицей.
     data : dict
         Словарь данных, получаемый из DataSet.
+    renderer : GraphRenderer
+        Рендерер изображения с графиками. По-умолчанию создаётся при первом обращении, см. get_renderer.
+    embed_image : bool
+        Встраивать ли изображение с графиками в HTML-разметку PDF-файла вместо ссылки на файл graph.png.
     """
-    workbook: Workbook
     data: dict
     ds: DataSet
+    renderer: 'GraphRenderer' = None
+    embed_image: bool = False
 
     def __init__(self, data: dict, data_set: DataSet, **kwargs):
         """
-        Инициализирует объект Report. Создаёт пустой Workbook, распаковывает kwargs.
+        Инициализирует объект Report, распаковывает kwargs.
 
         :param data: Словарь с данными из DataSet.
         """
-        self.workbook = Workbook()
         self.data = data
         self.ds = data_set
         for key, value in kwargs.items():
             self.__setattr__(key, value)
 
+    # region Outputs
+
+    def generate_outputs(self, directory: str, force: bool = False) -> bool:
+        """
+        Формирует Excel-файл, изображение с графиками и PDF-файл в папке отчётов. Если изображение встраивается
+        в PDF-файл (embed_image), отдельный файл изображения не сохраняется. Если исходные данные отчётов
+        не изменились с прошлого формирования (см. Report_digest) и все файлы на месте, ничего не делает.
+
+        :param directory: Папка отчётов.
+        :param force: Формировать отчёты, даже если исходные данные не изменились. По-умолчанию False.
+        :returns: True, если отчёты сформированы, и False, если они пропущены.
+        """
+        from Report_digest import is_up_to_date, clear_digest, save_digest
+
+        excel_file, image_file, pdf_file = \
+            f'{directory}/report.xlsx', self.get_image_file(directory), f'{directory}/report.pdf'
+        digest = self.get_digest()
+        if not force and is_up_to_date(directory, digest, self.get_outputs(directory)):
+            return False
+
+        clear_digest(directory)
+        self.generate_excel(excel_file)
+        if not self.embed_image:
+            self.generate_image(image_file)
+        self.generate_pdf(pdf_file)
+        save_digest(directory, digest)
+        return True
+
+    def get_outputs(self, directory: str) -> List[str]:
+        """
+        Возвращает пути до файлов отчётов в папке отчётов. Если изображение с графиками встраивается в PDF-файл,
+        его файла среди них нет.
+
+        :param directory: Папка отчётов.
+        """
+        excel_file, image_file, pdf_file = \
+            f'{directory}/report.xlsx', self.get_image_file(directory), f'{directory}/report.pdf'
+        return [excel_file, pdf_file] if self.embed_image else [excel_file, image_file, pdf_file]
+
+    def get_digest(self) -> str:
+        """
+        Возвращает хэш исходных данных отчётов, см. Report_digest.get_digest.
+        """
+        from Report_digest import get_digest
+
+        renderer = self.get_renderer()
+        return get_digest(self.data, self.ds.profession_name, renderer.image_format, renderer.dpi, self.embed_image)
+
+    # endregion
     # region Excel
     def generate_excel(self, file_name: str) -> None:
         """
-        Генерирует и сохраняет Excel-файл.
+        Генерирует и сохраняет Excel-файл. Строки пишутся потоково через ExcelWriter.
 
         :param file_name: название Excel-файла с явно указанным расширением.
         """
-        self.fill_with_statistics()
-        self.workbook.save(file_name)
+        from Excel_writer import ExcelWriter
 
-    def fill_with_statistics(self) -> None:
+        with ExcelWriter(file_name) as writer:
+            self.fill_with_statistics(writer)
+
+    def fill_with_statistics(self, writer: 'ExcelWriter') -> None:
         """
-        Заполняет два листа Excel-файла статистикой.
+        Заполняет листы Excel-файла статистикой.
 
+        :param writer: Excel-файл, открытый на запись.
         """
-        self.fill_salaries_statistics()
-        # self.fill_cities_statistics()
+        self.fill_salaries_statistics(writer)
+        # self.fill_cities_statistics(writer)
 
-    def fill_salaries_statistics(self) -> None:
+    def fill_salaries_statistics(self, writer: 'ExcelWriter') -> None:
         """
         Заполняет первую страницу данными о годах, зарплатах и количествах вакансий.
 
+        :param writer: Excel-файл, открытый на запись.
         """
-        ws = self.workbook.active
-        ws.title = 'Статистика по годам'
         salaries_by_years = self.data["Уровень зарплат по годам"][0]
         vacancies_by_years = self.data["Количество вакансий по годам"][0]
         profession_salaries_by_years = self.data["Уровень зарплат по годам"][1]
         profession_vacancies_by_years = self.data["Количество вакансий по годам"][1]
 
-        self.fill_column('Год', list(salaries_by_years.keys()),
-                         [cell[0] for cell in ws['A1':f'A{len(salaries_by_years) + 1}']])
-
-        self.fill_column('Средняя зарплата', list(salaries_by_years.values()),
-                         [cell[0] for cell in ws['B1':f'B{len(salaries_by_years) + 1}']])
-        self.fill_column(f'Средняя зарплата - {self.ds.profession_name}', list(profession_salaries_by_years.values()),
-                         [cell[0] for cell in ws['C1':f'C{len(profession_salaries_by_years) + 1}']])
+        sheet = writer.add_sheet('Статистика по годам',
+                                 ['Год', 'Средняя зарплата', f'Средняя зарплата - {self.ds.profession_name}',
+                                  'Количество вакансий', f'Количество вакансий - {self.ds.profession_name}'])
+        sheet.extend(zip_longest(salaries_by_years.keys(), salaries_by_years.values(),
+                                 profession_salaries_by_years.values(), vacancies_by_years.values(),
+                                 profession_vacancies_by_years.values()))
 
-        self.fill_column('Количество вакансий', list(vacancies_by_years.values()),
-                         [cell[0] for cell in ws['D1':f'D{len(vacancies_by_years) + 1}']])
-        self.fill_column(f'Количество вакансий - {self.ds.profession_name}',
-                         list(profession_vacancies_by_years.values()),
-                         [cell[0] for cell in ws['E1':f'E{len(profession_vacancies_by_years) + 1}']])
-
-        self.update_worksheet_settings(ws)
-
-    # def fill_cities_statistics(self) -> None:
+    # def fill_cities_statistics(self, writer: 'ExcelWriter') -> None:
     #     """
-    #     Создаёт и переключается на второй лист Excel-файла. Заполняет его данными о городах и зарплатах.
+    #     Создаёт второй лист Excel-файла. Заполняет его данными о городах и зарплатах.
     #
+    #     :param writer: Excel-файл, открытый на запись.
     #     """
-    #     self.workbook.create_sheet("Статистика по городам")
-    #     ws = self.workbook["Статистика по городам"]
     #     salaries_by_cities = self.data["Уровень зарплат по городам"]
     #     vacs_ratio_by_cities = self.data["Доля вакансий по городам"]
     #
-    #     self.fill_column('Город', list(salaries_by_cities.keys()),
-    #                      [cell[0] for cell in ws['A1':f'A{len(salaries_by_cities) + 1}']])
-    #     self.fill_column('Уровень зарплат', list(salaries_by_cities.values()),
-    #                      [cell[0] for cell in ws['B1': f'B{len(salaries_by_cities) + 1}']])
-    #
-    #     self.fill_column('Город', list(vacs_ratio_by_cities.keys()),
-    #                      [cell[0] for cell in ws['D1':f'D{len(vacs_ratio_by_cities) + 1}']])
-    #     self.fill_column('Доля вакансий', list(vacs_ratio_by_cities.values()),
-    #                      [cell[0] for cell in ws['E1': f'E{len(vacs_ratio_by_cities) + 1}']])
-    #
-    #     self.set_column_percent([cell[0] for cell in ws['E2': f'E{len(vacs_ratio_by_cities) + 1}']])
-    #     self.update_worksheet_settings(ws)
-
-    @staticmethod
-    def fill_column(header: str, data: list, column_cells: list) -> None:
-        """
-        Заполняет столбец данными.
-
-        :param header: Заголовок столбца, записывается в первой ячейке из списка клеток.
-        :param data: Данные для записи в клетки.
-        :param column_cells: Список клеток, в которые будут записаны данные.
-        """
-        column_cells[0].value = header
-        for cell, value in zip(column_cells[1:], data):
-            cell.value = value
-
-    # @staticmethod
-    # def set_column_percent(column: list) -> None:
-    #     """
-    #     Устанавливает процентный формат для всех ячеек в этом столбце.
-    #     """
-    #     for cell in column:
-    #         cell.number_format = FORMAT_PERCENTAGE_00
+    #     sheet = writer.add_sheet('Статистика по городам',
+    #                              ['Город', 'Уровень зарплат', '', 'Город', 'Доля вакансий'],
+    #                              [DATA_STYLE, DATA_STYLE, DATA_STYLE, DATA_STYLE, PERCENT_STYLE])
+    #     sheet.extend(zip_longest(salaries_by_cities.keys(), salaries_by_cities.values(), [],
+    #                              vacs_ratio_by_cities.keys(), vacs_ratio_by_cities.values()))
 
-    def update_worksheet_settings(self, ws) -> None:
-        """
-        Устанавливает границы и ширины для страницы Excel-файла.
+    # endregion
+    # region Plot
 
-        :param ws: страница Excel-файла.
+    def generate_image(self, file_name: str, show_result: bool = False) -> None:
         """
-        self.set_borders(ws)
-        self.set_column_width(ws)
+        Генерирует и сохраняет изображение с графиками, на основе данных data.
 
-    @staticmethod
-    def set_borders(ws) -> None:
+        :param file_name: Название для сохранения изображения.
+        :param show_result: Показывать ли изображение после генерации. По-умолчанию False.
         """
-        Устанавливает границы для всех непустых клеток и жирный шрифт для заголовков столбцов.
+        self.get_renderer().render(self.draw_graphs, file_name)
+        if show_result:
+            import matplotlib.pyplot as plt
 
-        :param ws: страница Excel-файла.
-        """
-        is_first_row = True
-        for row in ws.rows:
-            for cell in row:
-                if not cell.value:
-                    continue
-                cell.border = Border(top=Side(border_style="thin", color="000000"),
-                                     left=Side(border_style="thin", color="000000"),
-                                     right=Side(border_style="thin", color="000000"),
-                                     bottom=Side(border_style="thin", color="000000"))
-                if is_first_row:
-                    cell.font = Font(bold=True)
-            is_first_row = False
+            figure = plt.figure()
+            self.draw_graphs(figure)
+            figure.tight_layout()
+            plt.show()
+            plt.close(figure)
 
-    @staticmethod
-    def set_column_width(ws) -> None:
+    def get_renderer(self) -> 'GraphRenderer':
         """
-        Устанавливает ширину столбца, ориентируясь на максимально большую ячейку в нём.
-
-        :param ws: страница Excel-файла.
+        Возвращает рендерер изображения с графиками. Если он не передан в kwargs, создаёт рендерер с параметрами
+        по-умолчанию, без переиспользования фигуры.
         """
-        a = {0: "A", 1: "B", 2: "C", 3: "D", 4: "E", 6: "F", 7: "G"}
-        dims = {}
-        for row in ws.rows:
-            for cell in row:
-                if cell.value:
-                    dims[cell.column] = max((dims.get(cell.column, 0), len(str(cell.value)) + 1))
+        if self.renderer is None:
+            from Graph_renderer import GraphRenderer
 
-        for col, value in dims.items():
-            ws.column_dimensions[a[col - 1]].width = value
-
-    # endregion
-    # region Plot
+            self.renderer = GraphRenderer()
+        return self.renderer
 
-    def generate_image(self, file_name: str, show_result: bool = False) -> None:
+    def get_image_file(self, directory: str) -> str:
         """
-        Генерирует и сохраняет изображение с графиками, на основе данных data.
+        Возвращает путь до изображения с графиками в папке отчётов, с расширением по формату рендерера.
 
-        :param file_name: Название для сохранения изображения.
-        :param show_result: Показывать ли изображение после генерации. По-умолчанию False.
+        :param directory: Папка отчётов.
         """
-        self.draw_graphs()
-        plt.tight_layout()
-        plt.savefig(file_name, dpi=300)
-        if show_result:
-            plt.show()
+        return os.path.join(directory, f"graph.{self.get_renderer().image_format}")
 
-    def draw_graphs(self) -> None:
+    def draw_graphs(self, figure) -> None:
         """
         Рисует 4 графика на сетке 2x2. Каждый график строится на основании данных каждого ключа из data.
 
+        :param figure: Фигура matplotlib, на которой рисуются графики.
         """
-        figure, (ax1, ax2) = plt.subplots(2)
-        # figure, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2)
+        ax1, ax2 = figure.subplots(2)
+        # (ax1, ax2), (ax3, ax4) = figure.subplots(2, 2)
         self.draw_bar_graph(ax1, "Уровень зарплат по годам")
         self.draw_bar_graph(ax2, "Количество вакансий по годам")
         # self.draw_invert_bar_graph(ax3, "Уровень зарплат по городам")
@@ -686,6 +727,8 @@ class Report:
         :param subplot: Подобласть для отрисовки графика.
         :param name: Название графика. Должен соответствовать ключу из data.
         """
+        import numpy as np
+
         bar_width = 0.4
         first_label = 'средняя з/п'
         second_label = f'з/п {self.ds.profession_name}'
@@ -755,14 +798,23 @@ class Report:
 
         :param name: Название сохраняемого PDF-файла с явно указанным расширением.
         """
-        image_file = os.path.join(os.path.dirname(name), "graph.png")
+        render_pdf(self.render_pdf_template(name), name)
+
+    def render_pdf_template(self, name: str) -> str:
+        """
+        Формирует HTML-разметку PDF-файла по шаблону pdf_template.html. Если embed_image, изображение с графиками
+        рисуется в памяти и встраивается в разметку как data URI.
+
+        :param name: Название PDF-файла, рядом с которым лежит изображение с графиками, см. get_image_file.
+        :returns: HTML-разметка для wkhtmltopdf.
+        """
+        image_file = self.get_image_file(os.path.dirname(name))
         header_year = ["Год", "Средняя зарплата", f"Средняя зарплата - {self.ds.profession_name}",
                        "Количество вакансий",
                        f"Количество вакансий - {self.ds.profession_name}"]
         # header_city = ["Город", "Уровень зарплат", '', "Город", "Доля вакансий"]
 
-        env = Environment(loader=FileSystemLoader('.'))
-        template = env.get_template("pdf_template.html")
+        template = get_pdf_template()
 
         salaries_by_years = self.data["Уровень зарплат по годам"][0]
         vacancies_by_years = self.data["Количество вакансий по годам"][0]
@@ -786,8 +838,9 @@ class Report:
         #                            ratio_vacancy_by_cities.keys(),
         #                            ratio_vacancy_by_cities.values()))}
 
-        pdf_template = template.render(
+        return template.render(
             {'image_file': image_file,
+             'image_data': self.get_renderer().render_to_data_uri(self.draw_graphs) if self.embed_image else None,
              'image_style': 'style="max-width:1024px; max-height:680px"',
              'salary_data': salary_data,
              # 'city_data': city_data,
@@ -799,22 +852,21 @@ class Report:
              'cell_style_none': "style=''",
              'cell_style': 'style="border:1px solid black; border-collapse: collapse; font-size: 16px; height: 19pt;'
                            'padding: 5px; text-align:center"'})
-
-        config = pdfkit.configuration(wkhtmltopdf=r'D:\Programs\wkhtmltopdf\bin\wkhtmltopdf.exe')
-        pdfkit.from_string(pdf_template, name, configuration=config, options={'enable-local-file-access': None})
     # endregion
 
 
-def parse_html(line: str) -> str:
+def render_pdf(html: str, name: str, options: dict = None) -> None:
     """
-    Убирает HTML-теги из строки.
+    Формирует PDF-файл по HTML-разметке одним запуском wkhtmltopdf.
 
-    :param line: Строка для обработки.
-    :returns: Возвращает строку без HTML-тегов.
+    :param html: HTML-разметка PDF-файла.
+    :param name: Название сохраняемого PDF-файла.
+    :param options: Параметры wkhtmltopdf. По-умолчанию PDF_OPTIONS.
     """
-    line = sub('<.*?>', '', line)
-    res = [' '.join(word.split()) for word in line.replace("\r\n", "\n").split('\n')]
-    return res[0] if len(res) == 1 else res  # Спасибо Яндекс.Контесту за еще один костыль!
+    import pdfkit
+
+    config = pdfkit.configuration(wkhtmltopdf=WKHTMLTOPDF_PATH)
+    pdfkit.from_string(html, name, configuration=config, options=options or PDF_OPTIONS)
 
 
 def parse_row_vacancy(header: list, row_vacs: list) -> dict:
@@ -892,15 +944,59 @@ def generate_csvs_by_years(vacs_by_years_dicts: list) -> None:
         generate_csv_vacancies(vacs, list(vacs.keys())[0], csvs_directory_name)
 
 
-@profile
-def process_csv_file(file_path: os.path, p_name: str) -> None:
+def get_pdf_template():
+    """
+    Возвращает шаблон PDF-файла pdf_template.html из кэша шаблонов Templates. Шаблон компилируется один раз
+    в процессе, а при запуске через forkserver - один раз для всех рабочих процессов, при импорте модуля Preload.
+    """
+    from Templates import get_template
+    return get_template()
+
+
+def get_mp_context(start_method: str = 'forkserver', preload: bool = True) -> multiprocessing.context.BaseContext:
+    """
+    Возвращает контекст multiprocessing для рабочих процессов. При запуске через forkserver модуль Preload с тяжёлыми
+    библиотеками и шаблоном PDF-файла загружается один раз в процессе forkserver, а рабочие процессы получают их уже
+    загруженными через fork. Если способ запуска недоступен (forkserver на Windows), используется spawn.
+
+    :param start_method: Способ запуска процессов: forkserver, spawn или fork. По-умолчанию forkserver.
+    :param preload: Предзагружать ли библиотеки и шаблон в процессе forkserver.
+    """
+    if start_method not in multiprocessing.get_all_start_methods():
+        start_method = 'spawn'
+    context = multiprocessing.get_context(start_method)
+    if start_method == 'forkserver' and preload:
+        context.set_forkserver_preload(['Preload'])
+    return context
+
+
+def get_report_directory(file_path: str) -> str:
+    """
+    Определяет и при необходимости создаёт папку для отчётов по CSV-файлу с вакансиями за год.
+
+    :param file_path: Путь до CSV-файла вида vacancies_by_YYYY.csv.
+    :returns: Путь до папки с названием года рядом с CSV-файлом.
+    """
     file_name = os.path.basename(file_path)
     year = file_name.split('.')[0][-4:]
     csv_directory = file_path.replace(file_name, '')
     final_path = os.path.join(csv_directory, year)
 
-    if year not in os.listdir(csv_directory):
+    if year not in os.listdir(csv_directory or os.curdir):
         os.mkdir(final_path)
+    return final_path
+
+
+def get_statistics(file_path: str, p_name: str) -> (str, dict, DataSet):
+    """
+    Первая стадия обработки: читает CSV-файл, разбирает вакансии и собирает по ним статистику.
+
+    :param file_path: Путь до CSV-файла.
+    :param p_name: Название профессии для сбора статистики.
+    :returns: Папка для отчётов, статистика из DataSet.get_data и сам DataSet без списка вакансий, чтобы
+        не передавать его между процессами.
+    """
+    final_path = get_report_directory(file_path)
 
     csv_data = CSV(file_path)
     title, row_vacancies = csv_data.title, csv_data.rows
@@ -910,25 +1006,649 @@ def process_csv_file(file_path: os.path, p_name: str) -> None:
 
     ds = DataSet(vacancies, p_name)
     statistics = ds.get_data()
+    ds.vacancies = []
+    return final_path, statistics, ds
+
+
+def generate_reports(final_path: str, statistics: dict, ds: DataSet, force: bool = False,
+                     embed_image: bool = False, image_format: str = IMAGE_FORMAT, dpi: int = IMAGE_DPI) -> str:
+    """
+    Вторая стадия обработки: формирует Excel-файл, изображение с графиками и PDF-файл. Отчёты, исходные данные
+    которых не изменились с прошлого запуска, не формируются заново, см. Report.generate_outputs.
+
+    :param final_path: Папка, в которую сохраняются отчёты.
+    :param statistics: Статистика из DataSet.get_data.
+    :param ds: DataSet, по которому собрана статистика.
+    :param force: Формировать отчёты, даже если исходные данные не изменились.
+    :param embed_image: Встраивать ли изображение с графиками в PDF-файл вместо сохранения graph.png.
+    :param image_format: Формат изображения с графиками: png или svg.
+    :param dpi: Разрешение изображения с графиками.
+    :returns: Папка с готовыми отчётами.
+    """
+    Report(statistics, ds, renderer=get_shared_renderer(image_format, dpi), embed_image=embed_image) \
+        .generate_outputs(final_path, force)
+    return final_path
+
+
+@profile
+def process_csv_file(file_path: os.path, p_name: str, force: bool = False, embed_image: bool = False,
+                     image_format: str = IMAGE_FORMAT, dpi: int = IMAGE_DPI) -> None:
+    generate_reports(*get_statistics(file_path, p_name), force, embed_image, image_format, dpi)
 
-    report = Report(statistics, ds)
+
+def process_csv_files_pipelined(paths: List[str], p_name: str, render_workers: int = 2,
+                                mp_context: multiprocessing.context.BaseContext = None, force: bool = False,
+                                embed_image: bool = False, image_format: str = IMAGE_FORMAT,
+                                dpi: int = IMAGE_DPI) -> None:
+    """
+    Обрабатывает CSV-файлы конвейером из двух пулов процессов. Первый пул разбирает файлы и собирает статистику,
+    второй, ограниченный render_workers процессами, формирует отчёты по мере готовности статистики. Таким образом
+    разбор следующего года идёт одновременно с формированием отчётов по предыдущему.
+
+    :param paths: Пути до CSV-файлов.
+    :param p_name: Название профессии для сбора статистики.
+    :param render_workers: Количество процессов для формирования отчётов.
+    :param mp_context: Контекст multiprocessing для пулов процессов, см. get_mp_context.
+    :param force: Формировать отчёты, даже если исходные данные не изменились.
+    :param embed_image: Встраивать ли изображение с графиками в PDF-файл вместо сохранения graph.png.
+    :param image_format: Формат изображения с графиками: png или svg.
+    :param dpi: Разрешение изображения с графиками.
+    """
+    with concurrent.futures.ProcessPoolExecutor(mp_context=mp_context) as compute_executor, \
+            concurrent.futures.ProcessPoolExecutor(max_workers=render_workers, mp_context=mp_context) \
+            as render_executor:
+        statistics_futures = [compute_executor.submit(get_statistics, path, p_name) for path in paths]
+        report_futures = [render_executor.submit(generate_reports, *future.result(), force, embed_image, image_format,
+                                                 dpi)
+                          for future in concurrent.futures.as_completed(statistics_futures)]
+        for future in concurrent.futures.as_completed(report_futures):
+            future.result()
+
+
+def prepare_pdf(file_path: str, p_name: str, force: bool = False, embed_image: bool = False,
+                image_format: str = IMAGE_FORMAT, dpi: int = IMAGE_DPI) -> (str, str or None, str):
+    """
+    Собирает статистику по CSV-файлу, формирует Excel-файл и изображение с графиками, а вместо PDF-файла возвращает
+    его HTML-разметку, чтобы wkhtmltopdf запускался в родительском процессе. Со встроенным изображением разметка
+    не ссылается на файлы, и wkhtmltopdf может работать на машине без доступа к папке отчётов.
+
+    Если исходные данные отчётов не изменились и все файлы на месте (см. Report_digest), ничего не формирует
+    и возвращает None вместо разметки. Иначе удаляет сохранённый хэш: новый хэш сохраняет вызывающий код,
+    когда PDF-файл готов.
+
+    :param file_path: Путь до CSV-файла.
+    :param p_name: Название профессии для сбора статистики.
+    :param force: Формировать отчёты, даже если исходные данные не изменились.
+    :param embed_image: Встраивать ли изображение с графиками в PDF-файл вместо сохранения graph.png.
+    :param image_format: Формат изображения с графиками: png или svg.
+    :param dpi: Разрешение изображения с графиками.
+    :returns: Путь до PDF-файла, его HTML-разметка или None и хэш исходных данных отчётов.
+    """
+    from Report_digest import is_up_to_date, clear_digest
+
+    final_path, statistics, ds = get_statistics(file_path, p_name)
+    report = Report(statistics, ds, renderer=get_shared_renderer(image_format, dpi), embed_image=embed_image)
+    pdf_name, digest = f'{final_path}/report.pdf', report.get_digest()
+    if not force and is_up_to_date(final_path, digest, report.get_outputs(final_path)):
+        return pdf_name, None, digest
+
+    clear_digest(final_path)
     report.generate_excel(f'{final_path}/report.xlsx')
-    report.generate_image(f'{final_path}/graph.png')
-    report.generate_pdf(f'{final_path}/report.pdf')
+    if not embed_image:
+        report.generate_image(report.get_image_file(final_path))
+    return pdf_name, report.render_pdf_template(pdf_name), digest
+
+
+async def render_pdf_async(html: str, name: str, semaphore: asyncio.Semaphore) -> float:
+    """
+    Запускает wkhtmltopdf в отдельном процессе и передаёт ему HTML-разметку через stdin.
+
+    :param html: HTML-разметка PDF-файла.
+    :param name: Название сохраняемого PDF-файла.
+    :param semaphore: Ограничение количества одновременно запущенных wkhtmltopdf.
+    :returns: Время работы wkhtmltopdf в секундах.
+    """
+    options = []
+    for key, value in PDF_OPTIONS.items():
+        options += [f'--{key}'] if value is None else [f'--{key}', str(value)]
+
+    async with semaphore:
+        start_time = time.perf_counter()
+        process = await asyncio.create_subprocess_exec(WKHTMLTOPDF_PATH, '--quiet', *options, '-', name,
+                                                       stdin=asyncio.subprocess.PIPE,
+                                                       stdout=asyncio.subprocess.PIPE,
+                                                       stderr=asyncio.subprocess.PIPE)
+        _, stderr = await process.communicate(html.encode('utf-8'))
+        if process.returncode != 0:
+            raise IOError(f'wkhtmltopdf завершился с кодом {process.returncode}: {stderr.decode(errors="replace")}')
+        return time.perf_counter() - start_time
+
+
+async def process_csv_files_async(paths: List[str], p_name: str, limit: int = None,
+                                  mp_context: multiprocessing.context.BaseContext = None, force: bool = False,
+                                  embed_image: bool = False, image_format: str = IMAGE_FORMAT,
+                                  dpi: int = IMAGE_DPI) -> {str, float}:
+    """
+    Обрабатывает CSV-файлы в пуле процессов, а PDF-файлы формирует через asyncio: wkhtmltopdf для года запускается
+    сразу, как только готова его HTML-разметка, но одновременно работает не больше limit процессов wkhtmltopdf.
+    Годы, отчёты которых не устарели, пропускаются, см. prepare_pdf.
+
+    :param paths: Пути до CSV-файлов.
+    :param p_name: Название профессии для сбора статистики.
+    :param limit: Максимальное количество одновременно запущенных wkhtmltopdf. По-умолчанию количество ядер.
+    :param mp_context: Контекст multiprocessing для пула процессов, см. get_mp_context.
+    :param force: Формировать отчёты, даже если исходные данные не изменились.
+    :param embed_image: Встраивать ли изображение с графиками в PDF-файл вместо сохранения graph.png.
+    :param image_format: Формат изображения с графиками: png или svg.
+    :param dpi: Разрешение изображения с графиками.
+    :returns: Словарь {PDF-файл: время работы wkhtmltopdf в секундах} по сформированным PDF-файлам.
+    """
+    from Report_digest import save_digest
+
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(limit or os.cpu_count())
+
+    async def process(path: str) -> (str, float) or None:
+        pdf_name, html, digest = await loop.run_in_executor(executor, prepare_pdf, path, p_name, force, embed_image,
+                                                            image_format, dpi)
+        if html is None:
+            return None
+        latency = await render_pdf_async(html, pdf_name, semaphore)
+        save_digest(os.path.dirname(pdf_name), digest)
+        return pdf_name, latency
+
+    with concurrent.futures.ProcessPoolExecutor(mp_context=mp_context) as executor:
+        return dict(filter(None, await asyncio.gather(*map(process, paths))))
+
+
+def get_bundle_html(pages: List[str]) -> str:
+    """
+    Склеивает HTML-разметку нескольких отчётов в один документ: содержимое <body> каждого отчёта идёт подряд,
+    а между отчётами ставится разрыв страницы. Заголовок документа берётся из первого отчёта.
+
+    :param pages: HTML-разметка отчётов, см. Report.render_pdf_template.
+    :returns: HTML-разметка общего PDF-файла.
+    """
+    first = pages[0]
+    head, tail = first[:first.index('<body>') + len('<body>')], first[first.rindex('</body>'):]
+    bodies = [page[page.index('<body>') + len('<body>'):page.rindex('</body>')] for page in pages]
+    return head + PAGE_BREAK.join(bodies) + tail
+
+
+def split_pdf_bundle(bundle_name: str, pdf_names: List[str]) -> None:
+    """
+    Разрезает общий PDF-файл на PDF-файлы отчётов. Начало каждого отчёта находится по оглавлению PDF-файла:
+    wkhtmltopdf делает элемент оглавления верхнего уровня для заголовка h1 каждого отчёта.
+
+    :param bundle_name: Общий PDF-файл, см. process_csv_files_bundled.
+    :param pdf_names: Названия PDF-файлов отчётов в порядке их следования в общем файле.
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    reader = PdfReader(bundle_name)
+    starts = [reader.get_destination_page_number(item) for item in reader.outline if not isinstance(item, list)]
+    if len(starts) != len(pdf_names):
+        raise ValueError(f'В оглавлении {bundle_name} {len(starts)} отчётов вместо {len(pdf_names)}')
+    for name, start, end in zip(pdf_names, starts, starts[1:] + [len(reader.pages)]):
+        writer = PdfWriter()
+        for page in reader.pages[start:end]:
+            writer.add_page(page)
+        with open(name, 'wb') as file:
+            writer.write(file)
+
+
+def process_csv_files_bundled(paths: List[str], p_name: str, bundle_name: str, split: bool = False,
+                              mp_context: multiprocessing.context.BaseContext = None, force: bool = False,
+                              embed_image: bool = False, image_format: str = IMAGE_FORMAT,
+                              dpi: int = IMAGE_DPI) -> List[str]:
+    """
+    Обрабатывает CSV-файлы в пуле процессов и формирует PDF-отчёты всех годов одним запуском wkhtmltopdf - в один
+    общий PDF-файл, по отчёту на страницу. Excel-файлы и изображения с графиками формируются как обычно.
+
+    Отчёты года готовы только вместе с его PDF-файлом, поэтому неизменившиеся годы (см. Report_digest) пропускаются
+    только со split. Если не устарел ни один год и общий PDF-файл на месте, wkhtmltopdf не запускается. Если устарел
+    хотя бы один год, общий PDF-файл формируется заново по всем годам.
+
+    :param paths: Пути до CSV-файлов.
+    :param p_name: Название профессии для сбора статистики.
+    :param bundle_name: Название общего PDF-файла.
+    :param split: Разрезать ли общий PDF-файл на PDF-файлы отчётов по годам. Нужна библиотека pypdf.
+    :param mp_context: Контекст multiprocessing для пула процессов, см. get_mp_context.
+    :param force: Формировать отчёты, даже если исходные данные не изменились.
+    :param embed_image: Встраивать ли изображение с графиками в PDF-файл вместо сохранения graph.png.
+    :param image_format: Формат изображения с графиками: png или svg.
+    :param dpi: Разрешение изображения с графиками.
+    :returns: Названия PDF-файлов отчётов по годам в порядке их следования в общем файле.
+    """
+    from Report_digest import save_digest
+
+    force = force or not split or not os.path.exists(bundle_name)
+    with concurrent.futures.ProcessPoolExecutor(mp_context=mp_context) as executor:
+        reports = list(executor.map(prepare_pdf, paths, [p_name] * len(paths), [force] * len(paths),
+                                    [embed_image] * len(paths), [image_format] * len(paths), [dpi] * len(paths)))
+        fresh = [path for path, (_, html, _) in zip(paths, reports) if html is None]
+        if len(fresh) < len(paths):
+            prepared = dict(zip(fresh, executor.map(prepare_pdf, fresh, [p_name] * len(fresh), [True] * len(fresh),
+                                                    [embed_image] * len(fresh), [image_format] * len(fresh),
+                                                    [dpi] * len(fresh))))
+            reports = [prepared.get(path, report) for path, report in zip(paths, reports)]
+    reports.sort(key=lambda report: report[0])
+    pdf_names = [pdf_name for pdf_name, _, _ in reports]
+    if len(fresh) == len(paths):
+        return pdf_names
+
+    render_pdf(get_bundle_html([html for _, html, _ in reports]), bundle_name, {**PDF_OPTIONS, 'outline': None})
+    if split:
+        split_pdf_bundle(bundle_name, pdf_names)
+        for pdf_name, _, digest in reports:
+            save_digest(os.path.dirname(pdf_name), digest)
+    return pdf_names
+
+
+def get_aggregates(file_path: str, p_name: str, start: int = None, end: int = None) -> dict:
+    """
+    Собирает суммируемую статистику по куску CSV-файла. Вакансии разбираются так же, как в get_statistics.
+
+    :param file_path: Путь до CSV-файла.
+    :param p_name: Название профессии для сбора статистики.
+    :param start: Смещение начала куска в байтах, должно приходиться на начало записи. По-умолчанию начало данных.
+    :param end: Смещение конца куска в байтах. По-умолчанию конец файла.
+    :returns: Результат DataSet.get_aggregates.
+    """
+    title, data_start = read_csv_title(file_path)
+    start = data_start if start is None else start
+    end = os.path.getsize(file_path) if end is None else end
+
+    row_vacancies = [row for row in iter_chunk_rows(file_path, start, end)
+                     if len(list(filter(lambda word: word != '', row))) == len(title)]
+    vacancies = [Vacancy(parse_row_vacancy(title, row_vac)) for row_vac in row_vacancies]
+    return DataSet(vacancies, p_name).get_aggregates()
+
+
+def get_tasks(paths: List[str], p_name: str, chunk_size: int = None) -> List[dict]:
+    """
+    Разбивает CSV-файлы на задачи для рабочих процессов: кусок файла и профессия.
+
+    :param paths: Пути до CSV-файлов. Пути передаются рабочим процессам как есть, поэтому рабочие процессы на других
+        машинах должны видеть файлы по тем же путям относительно папки 3.2.
+    :param p_name: Название профессии для сбора статистики.
+    :param chunk_size: Примерный размер куска в байтах. По-умолчанию одна задача на файл.
+    :returns: Список задач {file, start, end, profession} в порядке следования кусков в файлах.
+    """
+    tasks = []
+    for path in paths:
+        _, data_start = read_csv_title(path)
+        for start, end in get_chunks(path, data_start, chunk_size or os.path.getsize(path) or 1):
+            tasks.append({'file': path, 'start': start, 'end': end, 'profession': p_name})
+    return tasks
+
+
+async def send_message(writer: asyncio.StreamWriter, message: dict) -> None:
+    """
+    Отправляет сообщение протокола координатора - одну строку JSON.
+    """
+    writer.write((json.dumps(message, ensure_ascii=False) + '\n').encode('utf-8'))
+    await writer.drain()
+
+
+class Coordinator:
+    """
+    Координатор распределённой обработки. Раздаёт задачи рабочим процессам, подключающимся по TCP, и собирает
+    результаты. Протокол - строки JSON: координатор отправляет {"type": "task", "id", "file", "start", "end",
+    "profession"} или {"type": "stop"}, рабочий процесс отвечает {"type": "result", "id", "aggregates"} или
+    {"type": "error", "id", "message"}. Если рабочий процесс отключился или не ответил за task_timeout секунд,
+    его задача возвращается в очередь и достаётся другому рабочему процессу.
+
+    Attributes
+    ----------
+    tasks : List[dict]
+        Задачи, см. get_tasks.
+    results : {int, dict}
+        Номер задачи: результат DataSet.get_aggregates.
+    errors : {int, str}
+        Номер задачи: описание ошибки, если задачу не удалось выполнить.
+    attempts : {int, int}
+        Номер задачи: сколько раз задача выдавалась рабочим процессам.
+    reassigned : int
+        Сколько раз задачи возвращались в очередь после отключения рабочего процесса.
+    pending : asyncio.Queue
+        Номера задач, ожидающих выдачи рабочим процессам.
+    finished : asyncio.Event
+        Устанавливается, когда все задачи выполнены или работа прервана, см. abort.
+    server : asyncio.AbstractServer
+        Сервер, принимающий подключения рабочих процессов. None до вызова start.
+    """
+
+    tasks: List[dict]
+    results: {int, dict}
+    errors: {int, str}
+    attempts: {int, int}
+    reassigned: int
+    pending: asyncio.Queue
+    finished: asyncio.Event
+    server: asyncio.AbstractServer or None
+
+    def __init__(self, tasks: List[dict], host: str = '127.0.0.1', port: int = 0, task_timeout: float = None,
+                 max_attempts: int = 3):
+        """
+        Инициализирует объект Coordinator.
+
+        :param tasks: Задачи, см. get_tasks.
+        :param host: Адрес, на котором координатор принимает подключения.
+        :param port: Порт. 0 - выбрать свободный порт, он будет доступен в поле port после start.
+        :param task_timeout: Сколько секунд ждать результата задачи. По-умолчанию без ограничения.
+        :param max_attempts: Сколько раз выдавать задачу, прежде чем считать её невыполнимой.
+        """
+        self.tasks = tasks
+        self.host = host
+        self.port = port
+        self.task_timeout = task_timeout
+        self.max_attempts = max_attempts
+        self.results = {}
+        self.errors = {}
+        self.attempts = {}
+        self.reassigned = 0
+        self.pending = asyncio.Queue()
+        for task_id in range(len(tasks)):
+            self.pending.put_nowait(task_id)
+        self.finished = asyncio.Event()
+        if not tasks:
+            self.finished.set()
+        self.server = None
+
+    async def start(self) -> None:
+        """
+        Запускает приём подключений рабочих процессов.
+        """
+        self.server = await asyncio.start_server(self.handle_worker, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def wait(self) -> {int, dict}:
+        """
+        Ждёт выполнения всех задач и останавливает приём подключений.
+
+        :returns: Словарь {номер задачи: результат}.
+        """
+        await self.finished.wait()
+        self.server.close()
+        await self.server.wait_closed()
+        if self.errors:
+            raise RuntimeError(f'Не удалось выполнить задачи: {self.errors}')
+        return self.results
+
+    async def get_task(self) -> int or None:
+        """
+        Ждёт следующую задачу из очереди.
+
+        :returns: Номер задачи или None, если все задачи уже выполнены.
+        """
+        task = asyncio.ensure_future(self.pending.get())
+        finished = asyncio.ensure_future(self.finished.wait())
+        await asyncio.wait([task, finished], return_when=asyncio.FIRST_COMPLETED)
+        finished.cancel()
+        if task.done():
+            return task.result()
+        task.cancel()
+        return None
+
+    def complete(self, task_id: int, result: dict = None, error: str = None) -> None:
+        """
+        Сохраняет результат или ошибку задачи и отмечает окончание работы, если выполнены все задачи.
+        """
+        if error is not None:
+            self.errors[task_id] = error
+        else:
+            self.results[task_id] = result
+        if len(self.results) + len(self.errors) == len(self.tasks):
+            self.finished.set()
+
+    def abort(self, reason: str) -> None:
+        """
+        Отмечает все невыполненные задачи ошибкой и заканчивает работу, например, когда не осталось рабочих процессов.
+
+        :param reason: Описание ошибки для невыполненных задач.
+        """
+        for task_id in range(len(self.tasks)):
+            if task_id not in self.results and task_id not in self.errors:
+                self.errors[task_id] = reason
+        self.finished.set()
+
+    async def handle_worker(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Обслуживает подключение одного рабочего процесса: выдаёт задачи по одной, пока они есть.
+        """
+        task_id = None
+        try:
+            while True:
+                task_id = await self.get_task()
+                if task_id is None:
+                    await send_message(writer, {'type': 'stop'})
+                    break
+                self.attempts[task_id] = self.attempts.get(task_id, 0) + 1
+                await send_message(writer, {'type': 'task', 'id': task_id, **self.tasks[task_id]})
+
+                line = await asyncio.wait_for(reader.readline(), self.task_timeout)
+                if not line:
+                    break
+                message = json.loads(line)
+                if message['type'] == 'result':
+                    self.complete(task_id, result=message['aggregates'])
+                else:
+                    self.complete(task_id, error=message['message'])
+                task_id = None
+        except (ConnectionError, asyncio.TimeoutError, ValueError):
+            pass
+        finally:
+            if task_id is not None:
+                if self.attempts[task_id] >= self.max_attempts:
+                    self.complete(task_id, error='рабочие процессы отключались при выполнении задачи')
+                else:
+                    self.reassigned += 1
+                    self.pending.put_nowait(task_id)
+            writer.close()
+
+
+def merge_task_results(tasks: List[dict], results: {int, dict}) -> {str, DataSet}:
+    """
+    Складывает результаты задач по файлам. Куски складываются в порядке следования в файле, поэтому порядок годов
+    в статистике совпадает с обработкой файла целиком.
+
+    :param tasks: Задачи, см. get_tasks.
+    :param results: Словарь {номер задачи: результат DataSet.get_aggregates}.
+    :returns: Словарь {путь до CSV-файла: DataSet со сложенной статистикой и без списка вакансий}.
+    """
+    data_sets = {}
+    for task_id, task in enumerate(tasks):
+        if task['file'] not in data_sets:
+            data_sets[task['file']] = DataSet([], task['profession'])
+        data_sets[task['file']].merge_aggregates(results[task_id])
+    return data_sets
+
+
+def generate_merged_reports(file_path: str, ds: DataSet, force: bool = False, embed_image: bool = False,
+                            image_format: str = IMAGE_FORMAT, dpi: int = IMAGE_DPI) -> str:
+    """
+    Формирует отчёты по статистике, собранной рабочими процессами.
+
+    :param file_path: Путь до CSV-файла.
+    :param ds: DataSet со сложенной статистикой, см. merge_task_results.
+    :param force: Формировать отчёты, даже если исходные данные не изменились.
+    :param embed_image: Встраивать ли изображение с графиками в PDF-файл вместо сохранения graph.png.
+    :param image_format: Формат изображения с графиками: png или svg.
+    :param dpi: Разрешение изображения с графиками.
+    :returns: Папка с готовыми отчётами.
+    """
+    return generate_reports(get_report_directory(file_path), ds.get_data(), ds, force, embed_image, image_format, dpi)
+
+
+async def run_coordinator(paths: List[str], p_name: str, host: str = '127.0.0.1', port: int = 0,
+                          chunk_size: int = None, local_workers: int = 0, task_timeout: float = None) -> {str, DataSet}:
+    """
+    Раздаёт обработку CSV-файлов рабочим процессам и складывает их результаты.
+
+    :param paths: Пути до CSV-файлов.
+    :param p_name: Название профессии для сбора статистики.
+    :param host: Адрес, на котором координатор принимает подключения.
+    :param port: Порт координатора. 0 - выбрать свободный порт.
+    :param chunk_size: Примерный размер задачи в байтах. По-умолчанию одна задача на файл.
+    :param local_workers: Сколько рабочих процессов запустить на этой машине. Если все они завершились раньше, чем
+        выполнены задачи, выбрасывается RuntimeError.
+    :param task_timeout: Сколько секунд ждать результата задачи. По-умолчанию без ограничения.
+    :returns: Словарь {путь до CSV-файла: DataSet со сложенной статистикой}.
+    """
+    tasks = get_tasks(paths, p_name, chunk_size)
+    coordinator = Coordinator(tasks, host, port, task_timeout)
+    await coordinator.start()
+    print(f'Координатор: {coordinator.host}:{coordinator.port}, задач: {len(tasks)}')
+
+    worker_host = '127.0.0.1' if host in ('', '0.0.0.0') else host
+    workers = [await asyncio.create_subprocess_exec(sys.executable, os.path.abspath(__file__), '--worker',
+                                                    '--host', worker_host, '--port', str(coordinator.port),
+                                                    cwd=os.path.dirname(os.path.abspath(__file__)))
+               for _ in range(local_workers)]
+    try:
+        if workers:
+            exits = asyncio.ensure_future(asyncio.gather(*(worker.wait() for worker in workers)))
+            finished = asyncio.ensure_future(coordinator.finished.wait())
+            await asyncio.wait([exits, finished], return_when=asyncio.FIRST_COMPLETED)
+            finished.cancel()
+            if not coordinator.finished.is_set():
+                coordinator.abort('все рабочие процессы завершились, не выполнив задачу')
+        results = await coordinator.wait()
+    finally:
+        for worker in workers:
+            await worker.wait()
+    if coordinator.reassigned:
+        print(f'Задач передано другим рабочим процессам: {coordinator.reassigned}')
+    return merge_task_results(tasks, results)
+
+
+def run_worker(host: str, port: int, connect_timeout: float = 10) -> int:
+    """
+    Рабочий процесс: подключается к координатору и выполняет задачи, пока не получит {"type": "stop"}.
+
+    :param host: Адрес координатора.
+    :param port: Порт координатора.
+    :param connect_timeout: Сколько секунд пытаться подключиться, если координатор ещё не запущен.
+    :returns: Количество выполненных задач.
+    """
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        try:
+            connection = socket.create_connection((host, port))
+            break
+        except ConnectionRefusedError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+    done = 0
+    with connection, connection.makefile('rwb') as stream:
+        for line in stream:
+            message = json.loads(line)
+            if message['type'] == 'stop':
+                break
+            try:
+                response = {'type': 'result', 'id': message['id'],
+                            'aggregates': get_aggregates(message['file'], message['profession'], message['start'],
+                                                         message['end'])}
+                done += 1
+            except Exception as error:
+                response = {'type': 'error', 'id': message['id'], 'message': f'{message["file"]}: {error!r}'}
+            stream.write((json.dumps(response, ensure_ascii=False) + '\n').encode('utf-8'))
+            stream.flush()
+    return done
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Разбирает аргументы командной строки. Для --split-pdf сразу проверяет, что установлена библиотека pypdf,
+    чтобы не узнать об этом только после формирования общего PDF-файла.
+    """
+    parser = argparse.ArgumentParser(description='Формирование отчётов по CSV-файлам с вакансиями за каждый год.')
+    parser.add_argument('--directory', default='csvs_by_years', help='Папка с CSV-файлами по годам.')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='Разделить разбор файлов и формирование отчётов на два пула процессов.')
+    parser.add_argument('--render-workers', type=int, default=2,
+                        help='Количество процессов для формирования отчётов в режиме --pipeline.')
+    parser.add_argument('--async-pdf', action='store_true',
+                        help='Формировать PDF-файлы через asyncio, запуская wkhtmltopdf из родительского процесса.')
+    parser.add_argument('--pdf-limit', type=int, default=None,
+                        help='Максимальное количество одновременно запущенных wkhtmltopdf в режиме --async-pdf.')
+    parser.add_argument('--bundle-pdf', default=None,
+                        help='Сформировать PDF-отчёты всех годов одним запуском wkhtmltopdf в указанный PDF-файл.')
+    parser.add_argument('--split-pdf', action='store_true',
+                        help='Разрезать общий PDF-файл из --bundle-pdf на PDF-файлы по годам. Нужна библиотека pypdf.')
+    parser.add_argument('--force', action='store_true',
+                        help='Формировать отчёты заново, даже если статистика, шаблон и параметры не изменились.')
+    parser.add_argument('--embed-image', action='store_true',
+                        help='Встраивать изображение с графиками в PDF-файл, не сохраняя graph.png.')
+    parser.add_argument('--image-format', default=IMAGE_FORMAT, choices=IMAGE_FORMATS,
+                        help='Формат изображения с графиками.')
+    parser.add_argument('--dpi', type=int, default=IMAGE_DPI, help='Разрешение изображения с графиками.')
+    parser.add_argument('--start-method', default='forkserver', choices=['forkserver', 'spawn', 'fork'],
+                        help='Способ запуска рабочих процессов. По-умолчанию forkserver с предзагрузкой библиотек.')
+    parser.add_argument('--no-preload', action='store_true',
+                        help='Не предзагружать библиотеки и шаблон в процессе forkserver.')
+    parser.add_argument('--coordinator', action='store_true',
+                        help='Раздавать обработку файлов рабочим процессам по TCP и формировать отчёты по их данным.')
+    parser.add_argument('--worker', action='store_true',
+                        help='Работать рабочим процессом координатора, запущенного с --coordinator.')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='Адрес координатора. Чтобы принимать рабочие процессы с других машин - 0.0.0.0.')
+    parser.add_argument('--port', type=int, default=8765, help='Порт координатора.')
+    parser.add_argument('--local-workers', type=int, default=0,
+                        help='Сколько рабочих процессов координатор запускает на этой машине.')
+    parser.add_argument('--chunk-size', type=float, default=None,
+                        help='Примерный размер задачи для рабочего процесса в мегабайтах. По-умолчанию файл целиком.')
+    parser.add_argument('--task-timeout', type=float, default=None,
+                        help='Через сколько секунд без ответа передать задачу другому рабочему процессу.')
+    args = parser.parse_args()
+    if args.split_pdf and importlib.util.find_spec('pypdf') is None:
+        parser.error('для --split-pdf нужна библиотека pypdf: pip install pypdf')
+    return args
 
 
 if __name__ == '__main__':
     start = time.perf_counter()
 
+    args = parse_arguments()
+    if args.worker:
+        print(f'Выполнено задач: {run_worker(args.host, args.port)}')
+        quit()
+    context = get_mp_context(args.start_method, not args.no_preload)
     ui = UserInterface()
-    chunks_directory = "csvs_by_years"
+    chunks_directory = args.directory
     paths_to_csvs = []
 
     for f_name in filter(lambda name: name.endswith(".csv"), os.listdir(chunks_directory)):
         paths_to_csvs.append(os.path.join(chunks_directory, f_name))
 
-    with concurrent.futures.ProcessPoolExecutor() as executor:
-        executor.map(process_csv_file, paths_to_csvs, [ui.profession_name for n in range(len(paths_to_csvs))])
+    if args.async_pdf:
+        pdf_latencies = asyncio.run(process_csv_files_async(paths_to_csvs, ui.profession_name, args.pdf_limit,
+                                                           context, args.force, args.embed_image,
+                                                           args.image_format, args.dpi))
+        for pdf_name, latency in sorted(pdf_latencies.items()):
+            print(f'{pdf_name}: {latency:.3f}')
+    elif args.bundle_pdf:
+        process_csv_files_bundled(paths_to_csvs, ui.profession_name, args.bundle_pdf, args.split_pdf, context,
+                                  args.force, args.embed_image, args.image_format, args.dpi)
+    elif args.coordinator:
+        chunk_size = int(args.chunk_size * 1024 * 1024) if args.chunk_size else None
+        merged = asyncio.run(run_coordinator(paths_to_csvs, ui.profession_name, args.host, args.port, chunk_size,
+                                             args.local_workers, args.task_timeout))
+        with concurrent.futures.ProcessPoolExecutor(mp_context=context) as executor:
+            list(executor.map(generate_merged_reports, merged.keys(), merged.values(), [args.force] * len(merged),
+                              [args.embed_image] * len(merged), [args.image_format] * len(merged),
+                              [args.dpi] * len(merged)))
+    elif args.pipeline:
+        process_csv_files_pipelined(paths_to_csvs, ui.profession_name, args.render_workers, context, args.force,
+                                    args.embed_image, args.image_format, args.dpi)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(mp_context=context) as executor:
+            executor.map(process_csv_file, paths_to_csvs, [ui.profession_name for n in range(len(paths_to_csvs))],
+                         [args.force] * len(paths_to_csvs), [args.embed_image] * len(paths_to_csvs),
+                         [args.image_format] * len(paths_to_csvs), [args.dpi] * len(paths_to_csvs))
 
     final = time.perf_counter()
     print(final - start)
@@ -0,0 +1,180 @@
+"""
+Потоковая запись Excel-файлов через режим write-only библиотеки openpyxl.
+
+В режиме write-only строки сразу сериализуются во временный файл, поэтому лист любого размера не хранится в памяти
+целиком. Стили ячеек - общие именованные стили книги, а не новые объекты Border и Font для каждой ячейки. Ширины
+столбцов в этом режиме нужно задать до первой записанной строки, поэтому первые sample_rows строк листа копятся
+в памяти, по ним вычисляются ширины, а остальные строки записываются сразу.
+"""
+from typing import List
+
+HEADER_STYLE = 'header'
+DATA_STYLE = 'data'
+PERCENT_STYLE = 'percent'
+
+
+class ExcelSheet:
+    """
+    Лист Excel-файла, открытый на запись.
+
+    Attributes
+    ----------
+    worksheet : WriteOnlyWorksheet
+        Лист книги openpyxl в режиме write-only.
+    column_styles : List[str]
+        Названия именованных стилей для ячеек данных по столбцам, None - без стиля.
+    widths : {int, int}
+        Номер столбца с 1: ширина столбца, по самой длинной непустой ячейке.
+    rows_count : int
+        Количество записанных строк, включая заголовки.
+    """
+
+    column_styles: List[str]
+    widths: {int, int}
+    rows_count: int
+
+    def __init__(self, worksheet, header: list, column_styles: List[str] = None, sample_rows: int = 1000):
+        """
+        Инициализирует объект ExcelSheet и добавляет строку заголовков.
+
+        :param worksheet: Лист книги openpyxl в режиме write-only.
+        :param header: Заголовки столбцов.
+        :param column_styles: Стили ячеек данных по столбцам. По-умолчанию DATA_STYLE для всех столбцов. None - столбец
+            без стиля: значения записываются как есть, без создания объектов ячеек, это быстрее для больших листов.
+        :param sample_rows: Сколько первых строк учитывать при вычислении ширины столбцов.
+        """
+        self.worksheet = worksheet
+        self.column_styles = column_styles or [DATA_STYLE] * len(header)
+        self.sample_rows = sample_rows
+        self.widths = {}
+        self.rows_count = 0
+        self._buffer = []
+        self._append_row(header, [HEADER_STYLE] * len(header))
+
+    def append(self, row: list) -> None:
+        """
+        Добавляет строку данных. Пустые значения и нули записываются без стиля и не влияют на ширину столбца.
+
+        :param row: Значения ячеек строки.
+        """
+        self._append_row(row, self.column_styles)
+
+    def extend(self, rows) -> None:
+        """
+        Добавляет строки данных из любого итерируемого объекта, не собирая их в список.
+
+        :param rows: Итерируемый объект со строками данных.
+        """
+        for row in rows:
+            self.append(row)
+
+    def _append_row(self, row: list, styles: List[str]) -> None:
+        """
+        Запоминает ширины ячеек строки и записывает её в буфер или сразу на лист.
+        """
+        from openpyxl.cell import WriteOnlyCell
+
+        cells = []
+        for column, (value, style) in enumerate(zip(row, styles), 1):
+            if not value:
+                cells.append(value)
+                continue
+            width = len(str(value)) + 1
+            if width > self.widths.get(column, 0):
+                self.widths[column] = width
+            if style is None:
+                cells.append(value)
+                continue
+            cell = WriteOnlyCell(self.worksheet, value=value)
+            cell.style = style
+            cells.append(cell)
+
+        self.rows_count += 1
+        if self._buffer is None:
+            self.worksheet.append(cells)
+            return
+        self._buffer.append(cells)
+        if len(self._buffer) > self.sample_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Устанавливает ширины столбцов по накопленным строкам и записывает их на лист. После этого строки
+        записываются сразу, а ширины столбцов больше не меняются.
+        """
+        from openpyxl.utils import get_column_letter
+
+        if self._buffer is None:
+            return
+        for column, width in self.widths.items():
+            self.worksheet.column_dimensions[get_column_letter(column)].width = width
+        for cells in self._buffer:
+            self.worksheet.append(cells)
+        self._buffer = None
+
+
+class ExcelWriter:
+    """
+    Excel-файл, записываемый в режиме write-only. Используется как контекстный менеджер: при выходе файл сохраняется.
+
+    Attributes
+    ----------
+    file_name : str
+        Название Excel-файла с явно указанным расширением.
+    workbook : Workbook
+        Книга openpyxl в режиме write-only.
+    sheets : List[ExcelSheet]
+        Листы в порядке создания.
+    """
+
+    file_name: str
+    sheets: List[ExcelSheet]
+
+    def __init__(self, file_name: str, sample_rows: int = 1000):
+        """
+        Инициализирует объект ExcelWriter, создаёт книгу и регистрирует в ней именованные стили.
+
+        :param file_name: Название Excel-файла с явно указанным расширением.
+        :param sample_rows: Сколько первых строк каждого листа учитывать при вычислении ширины столбцов.
+        """
+        from openpyxl import Workbook
+        from openpyxl.styles import Font, Border, Side, NamedStyle
+        from openpyxl.styles.numbers import FORMAT_PERCENTAGE_00
+
+        self.file_name = file_name
+        self.sample_rows = sample_rows
+        self.sheets = []
+        self.workbook = Workbook(write_only=True)
+
+        side = Side(border_style="thin", color="000000")
+        border = Border(top=side, left=side, right=side, bottom=side)
+        self.workbook.add_named_style(NamedStyle(HEADER_STYLE, font=Font(bold=True), border=border))
+        self.workbook.add_named_style(NamedStyle(DATA_STYLE, border=border))
+        self.workbook.add_named_style(NamedStyle(PERCENT_STYLE, border=border, number_format=FORMAT_PERCENTAGE_00))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.save()
+
+    def add_sheet(self, title: str, header: list, column_styles: List[str] = None) -> ExcelSheet:
+        """
+        Создаёт лист со строкой заголовков.
+
+        :param title: Название листа.
+        :param header: Заголовки столбцов.
+        :param column_styles: Стили ячеек данных по столбцам, см. ExcelSheet. По-умолчанию DATA_STYLE для всех столбцов.
+        """
+        sheet = ExcelSheet(self.workbook.create_sheet(title), header, column_styles, self.sample_rows)
+        self.sheets.append(sheet)
+        return sheet
+
+    def save(self) -> None:
+        """
+        Записывает оставшиеся в буферах строки и сохраняет файл. Книгу в режиме write-only можно сохранить один раз.
+        """
+        for sheet in self.sheets:
+            sheet.flush()
+        self.workbook.save(self.file_name)
@@ -0,0 +1,135 @@
+"""
+Отрисовка графиков через объектный API matplotlib и холст Agg.
+
+Фигуры создаются напрямую как matplotlib.figure.Figure и не регистрируются в pyplot, поэтому не копятся в его
+глобальном состоянии: фигура освобождается, как только на неё не остаётся ссылок. Для долгоживущих процессов,
+формирующих много отчётов подряд, рендерер может переиспользовать одну фигуру, очищая её перед каждым графиком.
+"""
+import base64
+import io
+from typing import BinaryIO, Callable, Tuple, Union
+
+IMAGE_DPI = 300
+IMAGE_FORMAT = 'png'
+MIME_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+IMAGE_FORMATS = tuple(MIME_TYPES)
+
+_shared_renderer = None
+
+
+class GraphRenderer:
+    """
+    Рендерер изображений с графиками.
+
+    Attributes
+    ----------
+    figsize : (float, float)
+        Размер фигуры в дюймах. По-умолчанию размер фигуры matplotlib.
+    dpi : int
+        Разрешение сохраняемого изображения.
+    image_format : str
+        Формат изображения: png или svg.
+    reuse_figure : bool
+        Переиспользовать ли одну фигуру для всех изображений.
+    """
+
+    figsize: Tuple[float, float]
+    dpi: int
+    image_format: str
+    reuse_figure: bool
+
+    def __init__(self, figsize: Tuple[float, float] = None, dpi: int = IMAGE_DPI, image_format: str = IMAGE_FORMAT,
+                 reuse_figure: bool = False):
+        """
+        Инициализирует объект GraphRenderer.
+
+        :param figsize: Размер фигуры в дюймах. По-умолчанию размер фигуры matplotlib.
+        :param dpi: Разрешение сохраняемого изображения.
+        :param image_format: Формат изображения: png или svg.
+        :param reuse_figure: Переиспользовать ли одну фигуру для всех изображений.
+        """
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f'Неизвестный формат изображения: {image_format}')
+        self.figsize = figsize
+        self.dpi = dpi
+        self.image_format = image_format
+        self.reuse_figure = reuse_figure
+        self._figure = None
+
+    def get_figure(self):
+        """
+        Возвращает пустую фигуру с холстом Agg: новую или очищенную переиспользуемую.
+        """
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        if self._figure is not None:
+            self._figure.clear()
+            return self._figure
+        figure = Figure(figsize=self.figsize)
+        FigureCanvasAgg(figure)
+        if self.reuse_figure:
+            self._figure = figure
+        return figure
+
+    def render(self, draw: Callable, file_name: Union[str, BinaryIO]) -> None:
+        """
+        Рисует графики на фигуре и сохраняет изображение. Новая фигура после сохранения очищается и больше
+        не используется, переиспользуемая - остаётся у рендерера до следующего вызова.
+
+        :param draw: Функция, рисующая графики на переданной ей фигуре.
+        :param file_name: Название для сохранения изображения или открытый на запись бинарный файл.
+        """
+        figure = self.get_figure()
+        try:
+            draw(figure)
+            figure.tight_layout()
+            figure.savefig(file_name, dpi=self.dpi, format=self.image_format)
+        finally:
+            if figure is not self._figure:
+                figure.clear()
+
+    def render_to_bytes(self, draw: Callable) -> bytes:
+        """
+        Рисует графики и возвращает изображение, не сохраняя его на диск.
+
+        :param draw: Функция, рисующая графики на переданной ей фигуре.
+        """
+        buffer = io.BytesIO()
+        self.render(draw, buffer)
+        return buffer.getvalue()
+
+    def render_to_data_uri(self, draw: Callable) -> str:
+        """
+        Рисует графики и возвращает изображение в виде data URI для атрибута src тега img. Такое изображение
+        встраивается в HTML-разметку, и wkhtmltopdf не нужно читать его с диска.
+
+        :param draw: Функция, рисующая графики на переданной ей фигуре.
+        """
+        data = base64.b64encode(self.render_to_bytes(draw)).decode('ascii')
+        return f'data:{MIME_TYPES[self.image_format]};base64,{data}'
+
+    def close(self) -> None:
+        """
+        Освобождает переиспользуемую фигуру.
+        """
+        if self._figure is not None:
+            self._figure.clear()
+            self._figure = None
+
+
+def get_shared_renderer(image_format: str = IMAGE_FORMAT, dpi: int = IMAGE_DPI) -> GraphRenderer:
+    """
+    Возвращает общий для процесса рендерер с переиспользуемой фигурой. Рабочие процессы пулов формируют отчёты
+    для нескольких годов подряд, и каждый из них рисует графики на одной и той же фигуре. Если запрошены другие
+    формат или разрешение, общий рендерер создаётся заново.
+
+    :param image_format: Формат изображения: png или svg.
+    :param dpi: Разрешение сохраняемого изображения.
+    """
+    global _shared_renderer
+    if _shared_renderer is None or (_shared_renderer.image_format, _shared_renderer.dpi) != (image_format, dpi):
+        if _shared_renderer is not None:
+            _shared_renderer.close()
+        _shared_renderer = GraphRenderer(dpi=dpi, image_format=image_format, reuse_figure=True)
+    return _shared_renderer
@@ -1,17 +1,21 @@
 import csv
-from re import sub
 import os
-from typing import List
-import matplotlib.pyplot as plt
-import numpy as np
-import pdfkit
+from typing import List, TYPE_CHECKING
+from itertools import zip_longest
 # import doctest
-from jinja2 import Environment, FileSystemLoader
-from openpyxl import Workbook
-from openpyxl.styles import Font, Border, Side
 import multiprocessing
 import time
-from line_profiler_pycharm import profile
+from Separate_data import parse_html
+from Graph_renderer import get_shared_renderer
+try:
+    from line_profiler_pycharm import profile
+except ImportError:
+    def profile(func):
+        return func
+
+if TYPE_CHECKING:
+    from Excel_writer import ExcelWriter
+    from Graph_renderer import GraphRenderer
 
 
 def custom_quit(msg: str) -> None:
@@ -468,163 +472,139 @@ class Report:
 
     Attributes
     ----------
-    workbook : Workbook
-        Класс, содержащий в себе функционал для работы с Excel таблицей.
     data : dict
         Словарь данных, получаемый из DataSet.
+    renderer : GraphRenderer
+        Рендерер изображения с графиками. По-умолчанию создаётся при первом обращении, см. get_renderer.
     """
-    workbook: Workbook
     data: dict
     ds: DataSet
+    renderer: 'GraphRenderer' = None
 
     def __init__(self, data: dict, data_set: DataSet, **kwargs):
         """
-        Инициализирует объект Report. Создаёт пустой Workbook, распаковывает kwargs.
+        Инициализирует объект Report, распаковывает kwargs.
 
         :param data: Словарь с данными из DataSet.
         """
-        self.workbook = Workbook()
         self.data = data
         self.ds = data_set
         for key, value in kwargs.items():
             self.__setattr__(key, value)
 
+    # region Outputs
+
+    def generate_outputs(self, directory: str, force: bool = False) -> bool:
+        """
+        Формирует Excel-файл, изображение с графиками и PDF-файл в папке отчётов. Если исходные данные отчётов
+        не изменились с прошлого формирования (см. Report_digest) и все файлы на месте, ничего не делает.
+
+        :param directory: Папка отчётов.
+        :param force: Формировать отчёты, даже если исходные данные не изменились. По-умолчанию False.
+        :returns: True, если отчёты сформированы, и False, если они пропущены.
+        """
+        from Report_digest import get_digest, is_up_to_date, clear_digest, save_digest
+
+        excel_file, image_file, pdf_file = \
+            f'{directory}/report.xlsx', self.get_image_file(directory), f'{directory}/report.pdf'
+        renderer = self.get_renderer()
+        digest = get_digest(self.data, self.ds.profession_name, renderer.image_format, renderer.dpi)
+        if not force and is_up_to_date(directory, digest, [excel_file, image_file, pdf_file]):
+            return False
+
+        clear_digest(directory)
+        self.generate_excel(excel_file)
+        self.generate_image(image_file)
+        self.generate_pdf(pdf_file)
+        save_digest(directory, digest)
+        return True
+
+    # endregion
     # region Excel
     def generate_excel(self, file_name: str) -> None:
         """
-        Генерирует и сохраняет Excel-файл.
+        Генерирует и сохраняет Excel-файл. Строки пишутся потоково через ExcelWriter.
 
         :param file_name: название Excel-файла с явно указанным расширением.
         """
-        self.fill_with_statistics()
-        self.workbook.save(file_name)
+        from Excel_writer import ExcelWriter
+
+        with ExcelWriter(file_name) as writer:
+            self.fill_with_statistics(writer)
 
-    def fill_with_statistics(self) -> None:
+    def fill_with_statistics(self, writer: 'ExcelWriter') -> None:
         """
-        Заполняет два листа Excel-файла статистикой.
+        Заполняет листы Excel-файла статистикой.
 
+        :param writer: Excel-файл, открытый на запись.
         """
-        self.fill_salaries_statistics()
-        # self.fill_cities_statistics()
+        self.fill_salaries_statistics(writer)
 
-    def fill_salaries_statistics(self) -> None:
+    def fill_salaries_statistics(self, writer: 'ExcelWriter') -> None:
         """
         Заполняет первую страницу данными о годах, зарплатах и количествах вакансий.
 
+        :param writer: Excel-файл, открытый на запись.
         """
-        ws = self.workbook.active
-        ws.title = 'Статистика по годам'
         salaries_by_years = self.data["Уровень зарплат по годам"][0]
         vacancies_by_years = self.data["Количество вакансий по годам"][0]
         profession_salaries_by_years = self.data["Уровень зарплат по годам"][1]
         profession_vacancies_by_years = self.data["Количество вакансий по годам"][1]
 
-        self.fill_column('Год', list(salaries_by_years.keys()),
-                         [cell[0] for cell in ws['A1':f'A{len(salaries_by_years) + 1}']])
-
-        self.fill_column('Средняя зарплата', list(salaries_by_years.values()),
-                         [cell[0] for cell in ws['B1':f'B{len(salaries_by_years) + 1}']])
-        self.fill_column(f'Средняя зарплата - {self.ds.profession_name}', list(profession_salaries_by_years.values()),
-                         [cell[0] for cell in ws['C1':f'C{len(profession_salaries_by_years) + 1}']])
-
-        self.fill_column('Количество вакансий', list(vacancies_by_years.values()),
-                         [cell[0] for cell in ws['D1':f'D{len(vacancies_by_years) + 1}']])
-        self.fill_column(f'Количество вакансий - {self.ds.profession_name}', list(profession_vacancies_by_years.values()),
-                         [cell[0] for cell in ws['E1':f'E{len(profession_vacancies_by_years) + 1}']])
+        sheet = writer.add_sheet('Статистика по годам',
+                                 ['Год', 'Средняя зарплата', f'Средняя зарплата - {self.ds.profession_name}',
+                                  'Количество вакансий', f'Количество вакансий - {self.ds.profession_name}'])
+        sheet.extend(zip_longest(salaries_by_years.keys(), salaries_by_years.values(),
+                                 profession_salaries_by_years.values(), vacancies_by_years.values(),
+                                 profession_vacancies_by_years.values()))
 
-        self.update_worksheet_settings(ws)
-
-
-    @staticmethod
-    def fill_column(header: str, data: list, column_cells: list) -> None:
-        """
-        Заполняет столбец данными.
-
-        :param header: Заголовок столбца, записывается в первой ячейке из списка клеток.
-        :param data: Данные для записи в клетки.
-        :param column_cells: Список клеток, в которые будут записаны данные.
-        """
-        column_cells[0].value = header
-        for cell, value in zip(column_cells[1:], data):
-            cell.value = value
-
-    # @staticmethod
-    # def set_column_percent(column: list) -> None:
-    #     """
-    #     Устанавливает процентный формат для всех ячеек в этом столбце.
-    #     """
-    #     for cell in column:
-    #         cell.number_format = FORMAT_PERCENTAGE_00
-
-    def update_worksheet_settings(self, ws) -> None:
-        """
-        Устанавливает границы и ширины для страницы Excel-файла.
+    # endregion
+    # region Plot
 
-        :param ws: страница Excel-файла.
+    def generate_image(self, file_name: str, show_result: bool = False) -> None:
         """
-        self.set_borders(ws)
-        self.set_column_width(ws)
+        Генерирует и сохраняет изображение с графиками, на основе данных data.
 
-    @staticmethod
-    def set_borders(ws) -> None:
+        :param file_name: Название для сохранения изображения.
+        :param show_result: Показывать ли изображение после генерации. По-умолчанию False.
         """
-        Устанавливает границы для всех непустых клеток и жирный шрифт для заголовков столбцов.
+        self.get_renderer().render(self.draw_graphs, file_name)
+        if show_result:
+            import matplotlib.pyplot as plt
 
-        :param ws: страница Excel-файла.
-        """
-        is_first_row = True
-        for row in ws.rows:
-            for cell in row:
-                if not cell.value:
-                    continue
-                cell.border = Border(top=Side(border_style="thin", color="000000"),
-                                     left=Side(border_style="thin", color="000000"),
-                                     right=Side(border_style="thin", color="000000"),
-                                     bottom=Side(border_style="thin", color="000000"))
-                if is_first_row:
-                    cell.font = Font(bold=True)
-            is_first_row = False
+            figure = plt.figure()
+            self.draw_graphs(figure)
+            figure.tight_layout()
+            plt.show()
+            plt.close(figure)
 
-    @staticmethod
-    def set_column_width(ws) -> None:
+    def get_renderer(self) -> 'GraphRenderer':
         """
-        Устанавливает ширину столбца, ориентируясь на максимально большую ячейку в нём.
-
-        :param ws: страница Excel-файла.
+        Возвращает рендерер изображения с графиками. Если он не передан в kwargs, создаёт рендерер с параметрами
+        по-умолчанию, без переиспользования фигуры.
         """
-        a = {0: "A", 1: "B", 2: "C", 3: "D", 4: "E", 6: "F", 7: "G"}
-        dims = {}
-        for row in ws.rows:
-            for cell in row:
-                if cell.value:
-                    dims[cell.column] = max((dims.get(cell.column, 0), len(str(cell.value)) + 1))
+        if self.renderer is None:
+            from Graph_renderer import GraphRenderer
 
-        for col, value in dims.items():
-            ws.column_dimensions[a[col - 1]].width = value
+            self.renderer = GraphRenderer()
+        return self.renderer
 
-    # endregion
-    # region Plot
-
-    def generate_image(self, file_name: str, show_result: bool = False) -> None:
+    def get_image_file(self, directory: str) -> str:
         """
-        Генерирует и сохраняет изображение с графиками, на основе данных data.
+        Возвращает путь до изображения с графиками в папке отчётов, с расширением по формату рендерера.
 
-        :param file_name: Название для сохранения изображения.
-        :param show_result: Показывать ли изображение после генерации. По-умолчанию False.
+        :param directory: Папка отчётов.
         """
-        self.draw_graphs()
-        plt.tight_layout()
-        plt.savefig(file_name, dpi=300)
-        if show_result:
-            plt.show()
+        return os.path.join(directory, f"graph.{self.get_renderer().image_format}")
 
-    def draw_graphs(self) -> None:
+    def draw_graphs(self, figure) -> None:
         """
         Рисует 4 графика на сетке 2x2. Каждый график строится на основании данных каждого ключа из data.
 
+        :param figure: Фигура matplotlib, на которой рисуются графики.
         """
-        figure, (ax1, ax2) = plt.subplots(2)
-        # figure, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2)
+        ax1, ax2 = figure.subplots(2)
+        # (ax1, ax2), (ax3, ax4) = figure.subplots(2, 2)
         self.draw_bar_graph(ax1, "Уровень зарплат по годам")
         self.draw_bar_graph(ax2, "Количество вакансий по годам")
         # self.draw_invert_bar_graph(ax3, "Уровень зарплат по городам")
@@ -637,6 +617,8 @@ class Report:
         :param subplot: Подобласть для отрисовки графика.
         :param name: Название графика. Должен соответствовать ключу из data.
         """
+        import numpy as np
+
         bar_width = 0.4
         first_label = 'средняя з/п'
         second_label = f'з/п {self.ds.profession_name}'
@@ -669,13 +651,14 @@ class Report:
 
         :param name: Название сохраняемого PDF-файла с явно указанным расширением.
         """
-        image_file = os.path.join(os.path.dirname(name), "graph.png")
+        import pdfkit
+
+        image_file = self.get_image_file(os.path.dirname(name))
         header_year = ["Год", "Средняя зарплата", f"Средняя зарплата - {self.ds.profession_name}", "Количество вакансий",
                        f"Количество вакансий - {self.ds.profession_name}"]
         # header_city = ["Город", "Уровень зарплат", '', "Город", "Доля вакансий"]
 
-        env = Environment(loader=FileSystemLoader('.'))
-        template = env.get_template("pdf_template.html")
+        template = get_pdf_template()
 
         salaries_by_years = self.data["Уровень зарплат по годам"][0]
         vacancies_by_years = self.data["Количество вакансий по годам"][0]
@@ -718,18 +701,6 @@ class Report:
     # endregion
 
 
-def parse_html(line: str) -> str:
-    """
-    Убирает HTML-теги из строки.
-
-    :param line: Строка для обработки.
-    :returns: Возвращает строку без HTML-тегов.
-    """
-    line = sub('<.*?>', '', line)
-    res = [' '.join(word.split()) for word in line.replace("\r\n", "\n").split('\n')]
-    return res[0] if len(res) == 1 else res  # Спасибо Яндекс.Контесту за еще один костыль!
-
-
 def parse_row_vacancy(header: list, row_vacs: list) -> dict:
     """
     Очищает строки от HTML-тегов и разбивает её на данные для вакансии.
@@ -805,6 +776,32 @@ def generate_csvs_by_years(vacs_by_years_dicts: list) -> None:
         generate_csv_vacancies(vacs, list(vacs.keys())[0], csvs_directory_name)
 
 
+def get_pdf_template():
+    """
+    Возвращает шаблон PDF-файла pdf_template.html из кэша шаблонов Templates. Шаблон компилируется один раз
+    в процессе, а при запуске через forkserver - один раз для всех рабочих процессов, при импорте модуля Preload.
+    """
+    from Templates import get_template
+    return get_template()
+
+
+def get_mp_context(start_method: str = 'forkserver', preload: bool = True) -> multiprocessing.context.BaseContext:
+    """
+    Возвращает контекст multiprocessing для рабочих процессов. При запуске через forkserver модуль Preload с тяжёлыми
+    библиотеками и шаблоном PDF-файла загружается один раз в процессе forkserver, а рабочие процессы получают их уже
+    загруженными через fork. Если способ запуска недоступен (forkserver на Windows), используется spawn.
+
+    :param start_method: Способ запуска процессов: forkserver, spawn или fork. По-умолчанию forkserver.
+    :param preload: Предзагружать ли библиотеки и шаблон в процессе forkserver.
+    """
+    if start_method not in multiprocessing.get_all_start_methods():
+        start_method = 'spawn'
+    context = multiprocessing.get_context(start_method)
+    if start_method == 'forkserver' and preload:
+        context.set_forkserver_preload(['Preload'])
+    return context
+
+
 @profile
 def process_csv_file(file_path: os.path, p_name: str):
     file_name = os.path.basename(file_path)
@@ -824,22 +821,20 @@ def process_csv_file(file_path: os.path, p_name: str):
     ds = DataSet(vacancies, p_name)
     statistics = ds.get_data()
 
-    report = Report(statistics, ds)
-    report.generate_excel(f'{final_path}/report.xlsx')
-    report.generate_image(f'{final_path}/graph.png')
-    report.generate_pdf(f'{final_path}/report.pdf')
+    Report(statistics, ds, renderer=get_shared_renderer()).generate_outputs(final_path)
 
 
 if __name__ == '__main__':
     start = time.perf_counter()
 
+    context = get_mp_context()
     ui = UserInterface()
     chunks_directory = "csvs_by_years"
     processes = []
 
     for f_name in filter(lambda name: name.endswith(".csv"), os.listdir(chunks_directory)):
         path_to_file = os.path.join(chunks_directory, f_name)
-        p = multiprocessing.Process(target=process_csv_file, args=(path_to_file, ui.profession_name))
+        p = context.Process(target=process_csv_file, args=(path_to_file, ui.profession_name))
         p.start()
         processes.append(p)
 
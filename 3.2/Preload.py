@@ -0,0 +1,15 @@
+"""
+Предзагрузка тяжёлых библиотек и шаблона PDF-файла для рабочих процессов.
+
+Модуль передаётся в set_forkserver_preload: процесс forkserver импортирует его один раз, и все рабочие процессы,
+создаваемые через fork от forkserver, получают библиотеки и скомпилированный шаблон уже загруженными. Forkserver
+ищет модуль относительно текущей папки, поэтому скрипты запускаются из папки 3.2.
+"""
+import matplotlib.backends.backend_agg
+import matplotlib.figure
+import numpy
+import openpyxl
+import pdfkit
+from Templates import get_template
+
+get_template()
@@ -0,0 +1,91 @@
+"""
+Пропуск повторного формирования отчётов, если их исходные данные не изменились.
+
+В папке отчётов хранится файл report.digest с хэшем всего, от чего зависят отчёты: статистики DataSet.get_data,
+названия профессии, версии формата отчётов REPORT_VERSION, шаблонов из модуля Templates и параметров изображения
+с графиками, в том числе встраивается ли оно в PDF-файл. Если хэш совпадает с сохранённым и все файлы отчётов
+на месте, отчёты не формируются заново. REPORT_VERSION нужно увеличивать при изменении кода, формирующего отчёты.
+"""
+import hashlib
+import json
+import os
+from typing import List
+
+DIGEST_FILE = 'report.digest'
+REPORT_VERSION = 1
+
+
+def get_templates_digest() -> dict:
+    """
+    Возвращает хэши содержимого шаблонов отчётов: {название шаблона: sha256}.
+    """
+    from Templates import TEMPLATE_DIRECTORY, TEMPLATES
+
+    digests = {}
+    for name in TEMPLATES:
+        with open(os.path.join(TEMPLATE_DIRECTORY, name), 'rb') as file:
+            digests[name] = hashlib.sha256(file.read()).hexdigest()
+    return digests
+
+
+def get_digest(statistics: dict, profession_name: str, image_format: str, dpi: int,
+               embed_image: bool = False) -> str:
+    """
+    Возвращает хэш исходных данных отчётов. Порядок ключей статистики учитывается, так как от него зависит порядок
+    строк в отчётах.
+
+    :param statistics: Статистика из DataSet.get_data.
+    :param profession_name: Название профессии.
+    :param image_format: Формат изображения с графиками.
+    :param dpi: Разрешение изображения с графиками.
+    :param embed_image: Встраивается ли изображение с графиками в PDF-файл.
+    """
+    data = {'version': REPORT_VERSION,
+            'profession': profession_name,
+            'statistics': statistics,
+            'image': [image_format, dpi, embed_image],
+            'templates': get_templates_digest()}
+    return hashlib.sha256(json.dumps(data, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def read_digest(directory: str) -> str or None:
+    """
+    Возвращает сохранённый в папке отчётов хэш или None, если его нет.
+    """
+    try:
+        with open(os.path.join(directory, DIGEST_FILE), encoding='utf-8') as file:
+            return file.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def is_up_to_date(directory: str, digest: str, outputs: List[str]) -> bool:
+    """
+    Проверяет, что отчёты в папке сформированы по тем же исходным данным и ни один из них не удалён.
+
+    :param directory: Папка отчётов.
+    :param digest: Хэш текущих исходных данных, см. get_digest.
+    :param outputs: Пути до файлов отчётов.
+    """
+    return read_digest(directory) == digest and all(map(os.path.exists, outputs))
+
+
+def clear_digest(directory: str) -> None:
+    """
+    Удаляет сохранённый хэш перед формированием отчётов, чтобы прерванное формирование не оставило частично
+    обновлённые отчёты со старым хэшем.
+    """
+    try:
+        os.remove(os.path.join(directory, DIGEST_FILE))
+    except FileNotFoundError:
+        pass
+
+
+def save_digest(directory: str, digest: str) -> None:
+    """
+    Сохраняет хэш после успешного формирования всех отчётов. Файл записывается целиком через временный файл.
+    """
+    temp_name = os.path.join(directory, DIGEST_FILE + '.tmp')
+    with open(temp_name, 'w', encoding='utf-8') as file:
+        file.write(digest)
+    os.replace(temp_name, os.path.join(directory, DIGEST_FILE))
@@ -1,6 +1,11 @@
 import csv
 from re import sub
 import os
+import argparse
+import shutil
+import tempfile
+import concurrent.futures
+from collections import OrderedDict
 # from typing import List
 # import matplotlib.pyplot as plt
 # import numpy as np
@@ -332,33 +337,16 @@ def parse_row_vacancy(header: list, row_vacs: list) -> dict:
     return dict(zip(header, map(parse_html, row_vacs)))
 
 
-def is_year_presented(dictionaries: list, year: str) -> {str: str or list} or None:
-    """
-    Определяет, существует ли словарь в списке словарей, в ключах которого есть переданный год.
-    :param dictionaries: Список словарей, в которых проводится поиск.
-    :param year: Год, который ищется среди ключей словарей.
-    """
-    for dictionary in dictionaries:
-        if year in dictionary.keys():
-            return dictionary
-    return None
-
-
 def get_vacancies_by_years(vacs_fields_dicts: list) -> list:
     """
     Обрабатывает список словарей с полями вакансии, возвращает список вакансий по годам.
     :param vacs_fields_dicts: Список словарей с полями вакансии.
     :returns: Список словарей типа {год: {поле вакансии: значение}}
     """
-    result = []
+    result = {}
     for vac_fields_dict in vacs_fields_dicts:
-        vac_year = vac_fields_dict['published_at'][:4]
-        existing_year_dict = is_year_presented(result, vac_year)
-        if existing_year_dict is None:
-            result.append({vac_year: [vac_fields_dict]})
-        else:
-            existing_year_dict[vac_year].append(vac_fields_dict)
-    return result
+        result.setdefault(vac_fields_dict['published_at'][:4], []).append(vac_fields_dict)
+    return [{year: vacs} for year, vacs in result.items()]
 
 
 def generate_csv_vacancies(year_vacancies: dict, year: str = None, path: str = None) -> None:
@@ -397,10 +385,344 @@ def generate_csvs_by_years(vacs_by_years_dicts: list) -> None:
         generate_csv_vacancies(vacs, list(vacs.keys())[0], csvs_directory_name)
 
 
+FORBIDDEN_FILE_NAME_CHARS = r'[\\/:*?"<>|]'
+PARTITION_KEYS = {
+    'year': lambda vacancy: vacancy['published_at'][:4],
+    'month': lambda vacancy: vacancy['published_at'][:7],
+    'region': lambda vacancy: vacancy['area_name'],
+    'currency': lambda vacancy: vacancy['salary_currency'],
+}
+
+
+def iter_vacancies(file_name: str):
+    """
+    Построчно читает CSV-файл и возвращает словари с полями вакансий, очищенными от HTML-тегов. Строки с пустыми
+    полями пропускаются, как и в классе CSV, но файл целиком в памяти не хранится.
+
+    :param file_name: Путь до CSV-файла.
+    :returns: Генератор словарей типа {поле вакансии: значение}.
+    """
+    with open(file_name, 'r', newline='', encoding='utf-8-sig') as file:
+        reader = csv.reader(file)
+        try:
+            title = next(reader)
+        except StopIteration:
+            custom_quit('Пустой файл')
+
+        is_empty = True
+        for row in reader:
+            if len([word for word in row if word != '']) == len(title):
+                is_empty = False
+                yield parse_row_vacancy(title, row)
+
+        if is_empty:
+            custom_quit('Нет данных')
+
+
+def get_partition_file_name(directory: str, partition: str) -> str:
+    """
+    Возвращает путь до CSV-файла раздела, заменяя недопустимые в именах файлов символы.
+
+    :param directory: Папка с CSV-файлами разделов.
+    :param partition: Название раздела.
+    """
+    return os.path.join(directory, f"vacancies_by_{sub(FORBIDDEN_FILE_NAME_CHARS, '_', partition)}.csv")
+
+
+class Partitioner:
+    """
+    Класс потоковой записи вакансий в CSV-файлы по разделам. Для каждого раздела держит открытый файл и csv.writer,
+    поэтому вакансии записываются сразу после прочтения и объём используемой памяти не зависит от размера файла.
+
+    Attributes
+    ----------
+    directory : str
+        Папка, в которую сохраняются CSV-файлы разделов.
+    fieldnames : list
+        Список заголовков столбцов CSV-файла.
+    key : callable
+        Функция, возвращающая раздел по словарю с полями вакансии.
+    max_open_files : int
+        Максимальное количество одновременно открытых файлов. Давно не использованные файлы закрываются и при
+        следующей записи открываются на дозапись.
+    write_header : bool
+        Записывать ли заголовки столбцов в начало каждого файла.
+    encoding : str
+        Кодировка создаваемых файлов.
+    counts : {str, int}
+        Раздел: количество записанных в него вакансий.
+    """
+
+    directory: str
+    fieldnames: list
+    key: callable
+    max_open_files: int
+    write_header: bool
+    encoding: str
+    counts: {str, int}
+
+    def __init__(self, directory: str, fieldnames: list, key: str or callable = 'year', max_open_files: int = 64,
+                 write_header: bool = True, encoding: str = 'utf-8-sig'):
+        """
+        Инициализирует объект Partitioner.
+
+        :param directory: Папка для CSV-файлов разделов. Создаётся, если её нет.
+        :param fieldnames: Список заголовков столбцов CSV-файла.
+        :param key: Название ключа из PARTITION_KEYS (year, month, region, currency) или функция от словаря
+            с полями вакансии.
+        :param max_open_files: Максимальное количество одновременно открытых файлов.
+        :param write_header: Записывать ли заголовки столбцов в начало каждого файла.
+        :param encoding: Кодировка создаваемых файлов. По-умолчанию 'utf-8-sig'.
+        """
+        self.directory = directory
+        self.fieldnames = fieldnames
+        self.key = PARTITION_KEYS[key] if isinstance(key, str) else key
+        self.max_open_files = max_open_files
+        self.write_header = write_header
+        self.encoding = encoding
+        self.counts = {}
+        self._writers = OrderedDict()
+        os.makedirs(directory, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def get_file_name(self, partition: str) -> str:
+        """
+        Возвращает путь до CSV-файла раздела.
+
+        :param partition: Название раздела.
+        """
+        return get_partition_file_name(self.directory, partition)
+
+    def get_writer(self, partition: str) -> csv.writer:
+        """
+        Возвращает csv.writer раздела, при необходимости открывая его файл и закрывая давно не использованный.
+
+        :param partition: Название раздела.
+        """
+        return self._get_file_and_writer(partition)[1]
+
+    def _get_file_and_writer(self, partition: str) -> tuple:
+        if partition in self._writers:
+            self._writers.move_to_end(partition)
+            return self._writers[partition]
+
+        if len(self._writers) >= self.max_open_files:
+            self._writers.popitem(last=False)[1][0].close()
+
+        is_new = partition not in self.counts
+        file = open(self.get_file_name(partition), 'w' if is_new else 'a', newline='', encoding=self.encoding)
+        writer = csv.writer(file)
+        if is_new:
+            self.counts[partition] = 0
+            if self.write_header:
+                writer.writerow(self.fieldnames)
+        self._writers[partition] = (file, writer)
+        return file, writer
+
+    def write(self, vacancy: dict) -> None:
+        """
+        Записывает вакансию в CSV-файл её раздела.
+
+        :param vacancy: Словарь с полями вакансии.
+        """
+        partition = self.key(vacancy)
+        self.get_writer(partition).writerow([vacancy[name] for name in self.fieldnames])
+        self.counts[partition] += 1
+
+    def append_shard(self, partition: str, shard_name: str, count: int) -> None:
+        """
+        Дописывает в CSV-файл раздела строки из временного файла без заголовков.
+
+        :param partition: Название раздела.
+        :param shard_name: Путь до временного файла в той же кодировке, но без BOM.
+        :param count: Количество вакансий во временном файле.
+        """
+        file = self._get_file_and_writer(partition)[0]
+        file.flush()
+        with open(shard_name, 'rb') as shard:
+            shutil.copyfileobj(shard, file.buffer, 1 << 20)
+        self.counts[partition] += count
+
+    def close(self) -> None:
+        """
+        Закрывает все открытые файлы разделов.
+        """
+        while self._writers:
+            self._writers.popitem()[1][0].close()
+
+
+def partition_csv(file_name: str, key: str or callable = 'year', directory: str = "csvs_by_years",
+                  max_open_files: int = 64) -> {str, int}:
+    """
+    Разбивает CSV-файл с вакансиями на CSV-файлы по разделам за один проход.
+
+    :param file_name: Путь до CSV-файла.
+    :param key: Ключ разбиения, см. Partitioner.
+    :param directory: Папка для CSV-файлов разделов. По-умолчанию "csvs_by_years".
+    :param max_open_files: Максимальное количество одновременно открытых файлов.
+    :returns: Словарь {раздел: количество вакансий}.
+    """
+    partitioner = None
+    try:
+        for vacancy in iter_vacancies(file_name):
+            if partitioner is None:
+                partitioner = Partitioner(directory, list(vacancy.keys()), key, max_open_files)
+            partitioner.write(vacancy)
+    finally:
+        if partitioner is not None:
+            partitioner.close()
+    return partitioner.counts
+
+
+def read_csv_title(file_name: str) -> (list, int):
+    """
+    Читает заголовки столбцов CSV-файла.
+
+    :param file_name: Путь до CSV-файла.
+    :returns: Список заголовков и смещение в байтах, с которого начинаются данные.
+    """
+    with open(file_name, 'rb') as file:
+        line = file.readline()
+        while line.count(b'"') % 2:
+            next_line = file.readline()
+            if not next_line:
+                break
+            line += next_line
+        if not line.strip():
+            custom_quit('Пустой файл')
+        return next(csv.reader([line.decode('utf-8-sig')])), file.tell()
+
+
+def get_chunks(file_name: str, data_start: int, chunk_size: int) -> list:
+    """
+    Разбивает данные CSV-файла на куски примерно по chunk_size байт. Границы кусков всегда приходятся на начало
+    записи: поля в кавычках с переводами строк внутри не разрываются, для этого учитывается чётность количества
+    кавычек от начала данных.
+
+    :param file_name: Путь до CSV-файла.
+    :param data_start: Смещение в байтах, с которого начинаются данные.
+    :param chunk_size: Примерный размер куска в байтах.
+    :returns: Список пар (начало, конец) в байтах.
+    """
+    file_size = os.path.getsize(file_name)
+    boundaries = [data_start]
+    quotes = 0
+    with open(file_name, 'rb') as file:
+        file.seek(data_start)
+        while file.tell() + chunk_size < file_size:
+            target = file.tell() + chunk_size
+            while file.tell() < target:
+                quotes += file.read(min(target - file.tell(), 1 << 20)).count(b'"')
+            line = file.readline()
+            quotes += line.count(b'"')
+            while quotes % 2 and line:
+                line = file.readline()
+                quotes += line.count(b'"')
+            if file.tell() >= file_size:
+                break
+            boundaries.append(file.tell())
+    boundaries.append(file_size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def iter_chunk_rows(file_name: str, start: int, end: int):
+    """
+    Читает записи CSV-файла, начинающиеся в промежутке [start, end) байт.
+
+    :param file_name: Путь до CSV-файла.
+    :param start: Смещение начала куска в байтах, должно приходиться на начало записи.
+    :param end: Смещение конца куска в байтах.
+    :returns: Генератор списков полей записей.
+    """
+    with open(file_name, 'rb') as file:
+        file.seek(start)
+        while file.tell() < end:
+            record = file.readline()
+            if not record:
+                break
+            while record.count(b'"') % 2:
+                line = file.readline()
+                if not line:
+                    break
+                record += line
+            yield next(csv.reader([record.decode('utf-8')]))
+
+
+def partition_chunk(file_name: str, title: list, start: int, end: int, shard_directory: str, key: str) -> {str, int}:
+    """
+    Разбивает кусок CSV-файла на временные CSV-файлы разделов без заголовков. Выполняется в дочернем процессе.
+
+    :param file_name: Путь до CSV-файла.
+    :param title: Список заголовков столбцов CSV-файла.
+    :param start: Смещение начала куска в байтах.
+    :param end: Смещение конца куска в байтах.
+    :param shard_directory: Папка для временных файлов этого куска.
+    :param key: Название ключа из PARTITION_KEYS.
+    :returns: Словарь {раздел: количество вакансий}.
+    """
+    with Partitioner(shard_directory, title, key, write_header=False, encoding='utf-8') as partitioner:
+        for row in iter_chunk_rows(file_name, start, end):
+            if len([word for word in row if word != '']) == len(title):
+                partitioner.write(parse_row_vacancy(title, row))
+    return partitioner.counts
+
+
+def partition_csv_parallel(file_name: str, key: str = 'year', directory: str = "csvs_by_years", workers: int = None,
+                           chunk_size: int = None, preserve_order: bool = True) -> {str, int}:
+    """
+    Разбивает CSV-файл с вакансиями на CSV-файлы по разделам в несколько процессов. Каждый процесс разбирает свой
+    кусок файла и пишет временные файлы разделов, а родительский процесс склеивает их в итоговые файлы.
+
+    :param file_name: Путь до CSV-файла.
+    :param key: Название ключа из PARTITION_KEYS.
+    :param directory: Папка для CSV-файлов разделов. По-умолчанию "csvs_by_years".
+    :param workers: Количество процессов. По-умолчанию количество ядер процессора.
+    :param chunk_size: Размер куска в байтах. По-умолчанию размер файла, делённый на четыре куска на процесс,
+        но не меньше 1 МБ.
+    :param preserve_order: Сохранять ли исходный порядок строк. Если False, куски склеиваются по мере готовности.
+    :returns: Словарь {раздел: количество вакансий}.
+    """
+    workers = workers or os.cpu_count()
+    title, data_start = read_csv_title(file_name)
+    chunk_size = chunk_size or max(os.path.getsize(file_name) // (workers * 4), 1 << 20)
+    chunks = get_chunks(file_name, data_start, chunk_size)
+
+    with Partitioner(directory, title, key) as partitioner, \
+            tempfile.TemporaryDirectory(dir=directory) as shards_directory, \
+            concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(partition_chunk, file_name, title, start, end,
+                                   os.path.join(shards_directory, str(index)), key): index
+                   for index, (start, end) in enumerate(chunks)}
+        for future in (futures if preserve_order else concurrent.futures.as_completed(futures)):
+            shard_directory = os.path.join(shards_directory, str(futures[future]))
+            for partition, count in future.result().items():
+                partitioner.append_shard(partition, get_partition_file_name(shard_directory, partition), count)
+
+    if sum(partitioner.counts.values()) == 0:
+        custom_quit('Нет данных')
+    return partitioner.counts
+
+
 if __name__ == '__main__':
-    ui = UserInterface()
-    csv_data = CSV(ui.file_name)
-    title, row_vacancies = csv_data.title, csv_data.rows
-    vacancies_fields_dictionaries = [parse_row_vacancy(title, row_vac) for row_vac in row_vacancies]
-    vacancies_by_years_dictionaries = get_vacancies_by_years(vacancies_fields_dictionaries)
-    generate_csvs_by_years(vacancies_by_years_dictionaries)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Разбиение CSV-файла с вакансиями на CSV-файлы по разделам.')
+    parser.add_argument('file_name', nargs='?', default=None, help='Путь до CSV-файла.')
+    parser.add_argument('--key', default='year', choices=list(PARTITION_KEYS.keys()), help='Ключ разбиения.')
+    parser.add_argument('--directory', default="csvs_by_years", help='Папка для CSV-файлов разделов.')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Разбивать файл в несколько процессов. 0 - по количеству ядер процессора.')
+    parser.add_argument('--chunk-size', type=int, default=None, help='Размер куска файла в мегабайтах.')
+    parser.add_argument('--unordered', action='store_true',
+                        help='Не сохранять исходный порядок строк при разбиении в несколько процессов.')
+    args = parser.parse_args()
+
+    ui = UserInterface(args.file_name)
+    if args.workers is None:
+        partition_csv(ui.file_name, args.key, args.directory)
+    else:
+        partition_csv_parallel(ui.file_name, args.key, args.directory, args.workers,
+                               args.chunk_size and args.chunk_size << 20, not args.unordered)
@@ -0,0 +1,68 @@
+"""
+Кэш шаблонов Jinja для отчётов.
+
+Шаблоны ищутся в папке этого модуля, а не в текущей папке, и компилируются один раз в процессе: окружение Jinja
+и каждый загруженный шаблон хранятся до конца работы процесса. Шаблоны можно заранее скомпилировать в модули Python
+(python Templates.py) - тогда процессы загружают готовый код, не разбирая шаблоны. Скомпилированные шаблоны
+используются, только если они новее исходных: после изменения шаблона без перекомпиляции он снова разбирается
+при загрузке.
+"""
+import os
+from functools import lru_cache
+
+TEMPLATE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+COMPILED_DIRECTORY = os.path.join(TEMPLATE_DIRECTORY, 'compiled_templates')
+PDF_TEMPLATE = 'pdf_template.html'
+TEMPLATES = [PDF_TEMPLATE]
+
+
+def is_compiled() -> bool:
+    """
+    Проверяет, что скомпилированные шаблоны есть и новее всех исходных шаблонов.
+    """
+    if not os.path.isdir(COMPILED_DIRECTORY):
+        return False
+    compiled_time = os.path.getmtime(COMPILED_DIRECTORY)
+    return all(os.path.getmtime(os.path.join(TEMPLATE_DIRECTORY, name)) <= compiled_time for name in TEMPLATES)
+
+
+@lru_cache(maxsize=None)
+def get_environment():
+    """
+    Возвращает окружение Jinja процесса. Загрузчик - скомпилированные шаблоны, если они актуальны, иначе папка
+    с шаблонами.
+    """
+    from jinja2 import Environment, FileSystemLoader, ModuleLoader
+
+    if is_compiled():
+        return Environment(loader=ModuleLoader(COMPILED_DIRECTORY))
+    return Environment(loader=FileSystemLoader(TEMPLATE_DIRECTORY))
+
+
+@lru_cache(maxsize=None)
+def get_template(name: str = PDF_TEMPLATE):
+    """
+    Возвращает шаблон, загруженный и скомпилированный один раз в процессе.
+
+    :param name: Название шаблона из TEMPLATES. По-умолчанию шаблон PDF-файла.
+    """
+    return get_environment().get_template(name)
+
+
+def compile_templates(target: str = COMPILED_DIRECTORY) -> None:
+    """
+    Компилирует шаблоны TEMPLATES в модули Python. Время изменения папки target обновляется, даже если
+    она уже существовала, поэтому перекомпилированные шаблоны считаются актуальными.
+
+    :param target: Папка для скомпилированных шаблонов.
+    """
+    from jinja2 import Environment, FileSystemLoader
+
+    environment = Environment(loader=FileSystemLoader(TEMPLATE_DIRECTORY))
+    environment.compile_templates(target, zip=None, filter_func=lambda name: name in TEMPLATES)
+    os.utime(target)
+
+
+if __name__ == '__main__':
+    compile_templates()
+    print(f'Шаблоны скомпилированы в {COMPILED_DIRECTORY}: {", ".join(TEMPLATES)}')
@@ -1,5 +1,25 @@
-from Separate_data import Translator, Salary, Vacancy, UserInterface
-from unittest import TestCase
+from Separate_data import Translator, Salary, Vacancy, UserInterface, Partitioner, partition_csv, \
+    partition_csv_parallel, get_vacancies_by_years
+from unittest import TestCase, mock, skipUnless
+import asyncio
+import csv
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+CONCURRENT_FUTURES_PATH = os.path.join(DIRECTORY, 'Concurrent futures.py')
+spec = importlib.util.spec_from_file_location('concurrent_futures_script', CONCURRENT_FUTURES_PATH)
+concurrent_futures_script = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(concurrent_futures_script)
+HAS_OPENPYXL = importlib.util.find_spec('openpyxl') is not None
+HAS_MATPLOTLIB = importlib.util.find_spec('matplotlib') is not None
+HAS_PYPDF = importlib.util.find_spec('pypdf') is not None
+HAS_JINJA2 = importlib.util.find_spec('jinja2') is not None
 
 
 class TranslatorTests(TestCase):
@@ -72,4 +92,394 @@ class UserInterfaceTests(TestCase):
         self.assertEqual(UserInterface().file_name, '../vacancies_medium.csv')
 
     def test_user_interface_file_name(self):
-        self.assertEqual(UserInterface(file_name='../vacancies_by_year.csv').file_name, '../vacancies_by_year.csv')
\ No newline at end of file
+        self.assertEqual(UserInterface(file_name='../vacancies_by_year.csv').file_name, '../vacancies_by_year.csv')
+
+
+class PartitionerTests(TestCase):
+    title = ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at']
+    rows = [['Программист', '100', '200', 'RUR', 'Москва', '2007-12-03T17:34:36+0300'],
+            ['Аналитик', '300', '', 'RUR', 'Москва', '2007-12-03T17:34:36+0300'],
+            ['<b>Тестировщик</b>', '100', '150', 'USD', 'Казань', '2008-01-10T10:00:00+0300'],
+            ['Программист', '50', '70', 'EUR', 'Москва', '2007-05-01T10:00:00+0300'],
+            ['Ведущий "Java"\nразработчик', '10', '20', 'KZT', 'Алматы', '2008-02-01T10:00:00+0600']]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.directory.name, 'vacancies.csv')
+        with open(self.file_name, 'w', newline='', encoding='utf-8-sig') as file:
+            writer = csv.writer(file)
+            writer.writerow(self.title)
+            writer.writerows(self.rows)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read_partition(self, directory, partition):
+        with open(os.path.join(directory, f'vacancies_by_{partition}.csv'), newline='', encoding='utf-8-sig') as file:
+            return list(csv.reader(file))
+
+    def test_partition_by_years_counts(self):
+        directory = os.path.join(self.directory.name, 'years')
+        self.assertEqual(partition_csv(self.file_name, 'year', directory), {'2007': 2, '2008': 2})
+
+    def test_partition_by_years_rows(self):
+        directory = os.path.join(self.directory.name, 'years')
+        partition_csv(self.file_name, 'year', directory)
+        self.assertEqual(self.read_partition(directory, '2008')[:2], [self.title, ['Тестировщик'] + self.rows[2][1:]])
+
+    def test_parallel_partition_matches_sequential(self):
+        sequential = os.path.join(self.directory.name, 'sequential')
+        parallel = os.path.join(self.directory.name, 'parallel')
+        partition_csv(self.file_name, 'year', sequential)
+        counts = partition_csv_parallel(self.file_name, 'year', parallel, workers=2, chunk_size=16)
+        self.assertEqual(counts, {'2007': 2, '2008': 2})
+        for year in counts:
+            self.assertEqual(self.read_partition(parallel, year), self.read_partition(sequential, year))
+
+    def test_partition_by_region(self):
+        directory = os.path.join(self.directory.name, 'regions')
+        self.assertEqual(partition_csv(self.file_name, 'region', directory), {'Москва': 2, 'Казань': 1, 'Алматы': 1})
+
+    def test_partition_reopened_files_keep_single_header(self):
+        directory = os.path.join(self.directory.name, 'months')
+        with Partitioner(directory, self.title, 'month', max_open_files=1) as partitioner:
+            for row in [self.rows[0], self.rows[3], self.rows[0]]:
+                partitioner.write(dict(zip(self.title, row)))
+        self.assertEqual(self.read_partition(directory, '2007-12'), [self.title, self.rows[0], self.rows[0]])
+
+    def test_vacancies_by_years(self):
+        vacancies = [dict(zip(self.title, row)) for row in self.rows]
+        self.assertEqual([list(year.keys())[0] for year in get_vacancies_by_years(vacancies)], ['2007', '2008'])
+
+
+class CoordinatorTests(TestCase):
+    profession = 'Программист'
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.directory.name, 'vacancies.csv')
+        with open(self.file_name, 'w', newline='', encoding='utf-8-sig') as file:
+            writer = csv.writer(file)
+            writer.writerow(PartitionerTests.title)
+            writer.writerows(PartitionerTests.rows)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def get_expected_statistics(self):
+        csv_data = concurrent_futures_script.CSV(self.file_name)
+        vacancies = [concurrent_futures_script.Vacancy(concurrent_futures_script.parse_row_vacancy(csv_data.title, row))
+                     for row in csv_data.rows]
+        return concurrent_futures_script.DataSet(vacancies, self.profession).get_data()
+
+    def start_worker(self, port):
+        return asyncio.create_subprocess_exec(sys.executable, CONCURRENT_FUTURES_PATH, '--worker', '--port', str(port),
+                                              cwd=DIRECTORY, stdout=subprocess.DEVNULL)
+
+    def test_tasks_split_file_into_chunks(self):
+        tasks = concurrent_futures_script.get_tasks([self.file_name], self.profession, chunk_size=16)
+        self.assertGreater(len(tasks), 1)
+        self.assertEqual([task['end'] for task in tasks[:-1]], [task['start'] for task in tasks[1:]])
+
+    def test_merged_aggregates_match_whole_file(self):
+        tasks = concurrent_futures_script.get_tasks([self.file_name], self.profession, chunk_size=16)
+        results = {task_id: json.loads(json.dumps(concurrent_futures_script.get_aggregates(
+            task['file'], task['profession'], task['start'], task['end']))) for task_id, task in enumerate(tasks)}
+        ds = concurrent_futures_script.merge_task_results(tasks, results)[self.file_name]
+        self.assertEqual(ds.profession_count, 2)
+        self.assertEqual(ds.get_data(), self.get_expected_statistics())
+
+    def test_local_workers(self):
+        merged = asyncio.run(concurrent_futures_script.run_coordinator([self.file_name], self.profession,
+                                                                       chunk_size=16, local_workers=2))
+        self.assertEqual(merged[self.file_name].get_data(), self.get_expected_statistics())
+
+    def test_exited_local_workers_fail_coordinator(self):
+        with mock.patch.object(sys, 'executable', shutil.which('true')):
+            with self.assertRaises(RuntimeError):
+                asyncio.run(asyncio.wait_for(concurrent_futures_script.run_coordinator(
+                    [self.file_name], self.profession, chunk_size=16, local_workers=2), 30))
+
+    def test_task_of_dead_worker_is_reassigned(self):
+        async def run():
+            tasks = concurrent_futures_script.get_tasks([self.file_name], self.profession, chunk_size=16)
+            coordinator = concurrent_futures_script.Coordinator(tasks)
+            await coordinator.start()
+            reader, writer = await asyncio.open_connection('127.0.0.1', coordinator.port)
+            self.assertEqual(json.loads(await reader.readline())['type'], 'task')
+            writer.close()
+            worker = await self.start_worker(coordinator.port)
+            results = await coordinator.wait()
+            await worker.wait()
+            return tasks, results, coordinator.reassigned
+
+        tasks, results, reassigned = asyncio.run(run())
+        self.assertEqual(reassigned, 1)
+        self.assertEqual(sorted(results), list(range(len(tasks))))
+        ds = concurrent_futures_script.merge_task_results(tasks, results)[self.file_name]
+        self.assertEqual(ds.get_data(), self.get_expected_statistics())
+
+
+@skipUnless(HAS_OPENPYXL, 'openpyxl не установлен')
+class ExcelWriterTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.directory.name, 'report.xlsx')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def load_sheet(self):
+        from openpyxl import load_workbook
+        return load_workbook(self.file_name).active
+
+    def test_styles_and_widths(self):
+        from Excel_writer import ExcelWriter
+        with ExcelWriter(self.file_name) as writer:
+            writer.add_sheet('Статистика по годам', ['Год', 'Средняя зарплата']).extend([[2007, 38916], [2008, 0]])
+        ws = self.load_sheet()
+        self.assertEqual([[cell.value for cell in row] for row in ws.iter_rows()],
+                         [['Год', 'Средняя зарплата'], [2007, 38916], [2008, 0]])
+        self.assertTrue(ws['A1'].font.b)
+        self.assertEqual(ws['B2'].border.left.style, 'thin')
+        self.assertIsNone(ws['B3'].border.left.style)
+        self.assertEqual(ws.column_dimensions['A'].width, 5)
+        self.assertEqual(ws.column_dimensions['B'].width, 17)
+
+    def test_rows_after_sample_are_streamed(self):
+        from Excel_writer import ExcelWriter
+        with ExcelWriter(self.file_name, sample_rows=10) as writer:
+            sheet = writer.add_sheet('Вакансии', ['name', 'salary'], [None, None])
+            sheet.extend([f'Программист {index}', index] for index in range(1, 101))
+        ws = self.load_sheet()
+        self.assertEqual(ws.max_row, 101)
+        self.assertEqual(ws['A101'].value, 'Программист 100')
+        self.assertEqual(ws.column_dimensions['A'].width, len('Программист 10') + 1)
+
+
+@skipUnless(HAS_MATPLOTLIB, 'matplotlib не установлен')
+class GraphRendererTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        data = {"Уровень зарплат по годам": [{2007: 38916, 2008: 43646}, {2007: 62500, 2008: 0}],
+                "Количество вакансий по годам": [{2007: 2196, 2008: 17549}, {2007: 5, 2008: 0}]}
+        self.report = concurrent_futures_script.Report(data, concurrent_futures_script.DataSet([], 'Программист'))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_reused_figure_is_not_registered_in_pyplot(self):
+        import matplotlib.pyplot as plt
+        from Graph_renderer import GraphRenderer
+        self.report.renderer = GraphRenderer(dpi=50, reuse_figure=True)
+        for _ in range(3):
+            self.report.generate_image(self.report.get_image_file(self.directory.name))
+        self.assertEqual(plt.get_fignums(), [])
+        self.assertEqual(len(self.report.renderer.get_figure().axes), 0)
+        with open(os.path.join(self.directory.name, 'graph.png'), 'rb') as file:
+            self.assertEqual(file.read(8), b'\x89PNG\r\n\x1a\n')
+
+    def test_svg_format(self):
+        from Graph_renderer import GraphRenderer
+        self.report.renderer = GraphRenderer(image_format='svg')
+        image_file = self.report.get_image_file(self.directory.name)
+        self.report.generate_image(image_file)
+        self.assertTrue(image_file.endswith('graph.svg'))
+        with open(image_file, encoding='utf-8') as file:
+            self.assertIn('<svg', file.read())
+
+    def test_unknown_format(self):
+        from Graph_renderer import GraphRenderer
+        with self.assertRaises(ValueError):
+            GraphRenderer(image_format='jpg')
+
+    def test_shared_renderer_options(self):
+        from Graph_renderer import get_shared_renderer
+        renderer = get_shared_renderer('svg', 100)
+        self.assertIs(get_shared_renderer('svg', 100), renderer)
+        self.assertEqual((renderer.image_format, renderer.dpi, renderer.reuse_figure), ('svg', 100, True))
+        self.assertEqual((get_shared_renderer().image_format, get_shared_renderer().dpi), ('png', 300))
+
+    @skipUnless(HAS_JINJA2, 'jinja2 не установлен')
+    def test_embedded_image(self):
+        import base64
+        from Graph_renderer import GraphRenderer
+        self.report.renderer = GraphRenderer(dpi=50)
+        self.report.embed_image = True
+        html = self.report.render_pdf_template(os.path.join(self.directory.name, 'report.pdf'))
+        data = html.split('src="data:image/png;base64,')[1].split('"')[0]
+        self.assertEqual(base64.b64decode(data)[:8], b'\x89PNG\r\n\x1a\n')
+        self.assertNotIn('graph.png', html)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+
+class PdfBundleTests(TestCase):
+    def test_bundle_html(self):
+        pages = [f'<html><head><title>Report</title></head><body><h1>{year}</h1></body></html>'
+                 for year in (2007, 2008)]
+        self.assertEqual(concurrent_futures_script.get_bundle_html(pages),
+                         '<html><head><title>Report</title></head><body><h1>2007</h1>'
+                         + concurrent_futures_script.PAGE_BREAK + '<h1>2008</h1></body></html>')
+
+    @skipUnless(HAS_PYPDF, 'pypdf не установлен')
+    def test_split_by_outline(self):
+        from pypdf import PdfReader, PdfWriter
+        with tempfile.TemporaryDirectory() as directory:
+            bundle_name = os.path.join(directory, 'bundle.pdf')
+            writer = PdfWriter()
+            for _ in range(5):
+                writer.add_blank_page(100, 100)
+            for page in (0, 2, 3):
+                parent = writer.add_outline_item('Аналитика по зарплатам', page)
+                writer.add_outline_item('Статистика по годам', page, parent=parent)
+            writer.write(bundle_name)
+
+            pdf_names = [os.path.join(directory, f'{year}.pdf') for year in (2007, 2008, 2009)]
+            concurrent_futures_script.split_pdf_bundle(bundle_name, pdf_names)
+            self.assertEqual([len(PdfReader(name).pages) for name in pdf_names], [2, 1, 2])
+            with self.assertRaises(ValueError):
+                concurrent_futures_script.split_pdf_bundle(bundle_name, pdf_names[:2])
+
+    def test_split_requires_pypdf(self):
+        argv = ['Concurrent futures.py', '--bundle-pdf', 'bundle.pdf', '--split-pdf']
+        with mock.patch.object(sys, 'argv', argv), mock.patch('importlib.util.find_spec', return_value=None), \
+                mock.patch('sys.stderr'):
+            with self.assertRaises(SystemExit):
+                concurrent_futures_script.parse_arguments()
+        with mock.patch.object(sys, 'argv', argv[:3]), mock.patch('importlib.util.find_spec', return_value=None):
+            self.assertEqual(concurrent_futures_script.parse_arguments().bundle_pdf, 'bundle.pdf')
+
+
+@skipUnless(HAS_JINJA2, 'jinja2 не установлен')
+class TemplatesTests(TestCase):
+    def test_template_is_cached_and_independent_of_cwd(self):
+        import Templates
+        with tempfile.TemporaryDirectory() as directory:
+            cwd = os.getcwd()
+            os.chdir(directory)
+            try:
+                template = Templates.get_template()
+            finally:
+                os.chdir(cwd)
+        self.assertIs(template, Templates.get_template())
+        self.assertIn('Программист', template.render(profession_name='Программист', salary_data={}))
+
+    def test_compile_templates(self):
+        import Templates
+        from jinja2 import Environment, ModuleLoader
+        with tempfile.TemporaryDirectory() as directory:
+            Templates.compile_templates(directory)
+            self.assertEqual(len(os.listdir(directory)), len(Templates.TEMPLATES))
+            compiled = Environment(loader=ModuleLoader(directory)).get_template(Templates.PDF_TEMPLATE)
+            self.assertEqual(compiled.render(profession_name='Программист', salary_data={}),
+                             Templates.get_template().render(profession_name='Программист', salary_data={}))
+
+
+class ReportDigestTests(TestCase):
+    statistics = {"Уровень зарплат по годам": [{2007: 38916}, {2007: 62500}],
+                  "Количество вакансий по годам": [{2007: 2196}, {2007: 5}]}
+
+    def test_digest_depends_on_inputs(self):
+        from Report_digest import get_digest
+        digest = get_digest(self.statistics, 'Программист', 'png', 300)
+        self.assertEqual(digest, get_digest(self.statistics, 'Программист', 'png', 300))
+        self.assertNotEqual(digest, get_digest(self.statistics, 'Аналитик', 'png', 300))
+        self.assertNotEqual(digest, get_digest(self.statistics, 'Программист', 'svg', 300))
+        changed = {**self.statistics, "Количество вакансий по годам": [{2007: 2197}, {2007: 5}]}
+        self.assertNotEqual(digest, get_digest(changed, 'Программист', 'png', 300))
+
+    def test_up_to_date(self):
+        from Report_digest import is_up_to_date, save_digest, clear_digest
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'report.xlsx')
+            open(output, 'w').close()
+            self.assertFalse(is_up_to_date(directory, 'digest', [output]))
+            save_digest(directory, 'digest')
+            self.assertTrue(is_up_to_date(directory, 'digest', [output]))
+            self.assertFalse(is_up_to_date(directory, 'other', [output]))
+            self.assertFalse(is_up_to_date(directory, 'digest', [output, os.path.join(directory, 'report.pdf')]))
+            clear_digest(directory)
+            self.assertFalse(is_up_to_date(directory, 'digest', [output]))
+
+
+def touch(name: str) -> None:
+    open(name, 'w').close()
+
+
+class IncrementalPdfTests(TestCase):
+    years = ['2007', '2008']
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.statistics = {year: dict(ReportDigestTests.statistics) for year in self.years}
+        self.paths = [os.path.join(self.directory.name, f'vacancies_by_{year}.csv') for year in self.years]
+        self.pdf_names = [os.path.join(self.directory.name, year, 'report.pdf') for year in self.years]
+        for year in self.years:
+            os.mkdir(os.path.join(self.directory.name, year))
+        script = concurrent_futures_script
+        patches = [mock.patch.object(script, 'get_statistics', side_effect=self.get_statistics),
+                   mock.patch.object(script.Report, 'generate_excel', autospec=True,
+                                     side_effect=lambda report, name: touch(name)),
+                   mock.patch.object(script.Report, 'generate_image', autospec=True,
+                                     side_effect=lambda report, name: touch(name)),
+                   mock.patch.object(script.Report, 'render_pdf_template', return_value='<body></body>'),
+                   mock.patch.object(script.concurrent.futures, 'ProcessPoolExecutor',
+                                     lambda mp_context=None: script.concurrent.futures.ThreadPoolExecutor())]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def get_statistics(self, file_path, p_name):
+        year = file_path[-8:-4]
+        return (os.path.join(self.directory.name, year), self.statistics[year],
+                concurrent_futures_script.DataSet([], p_name))
+
+    def test_prepare_pdf_skips_up_to_date_year(self):
+        from Report_digest import save_digest, read_digest
+        pdf_name, html, digest = concurrent_futures_script.prepare_pdf(self.paths[0], 'Программист')
+        self.assertEqual((pdf_name, html), (self.pdf_names[0], '<body></body>'))
+        touch(pdf_name)
+        save_digest(os.path.dirname(pdf_name), digest)
+        self.assertEqual(concurrent_futures_script.prepare_pdf(self.paths[0], 'Программист'),
+                         (pdf_name, None, digest))
+        self.assertEqual(concurrent_futures_script.prepare_pdf(self.paths[0], 'Программист', True)[1],
+                         '<body></body>')
+        self.assertIsNone(read_digest(os.path.dirname(pdf_name)))
+
+    def test_async_renders_only_changed_years(self):
+        async def render_pdf_async(html, name, semaphore):
+            touch(name)
+            return 1.0
+
+        with mock.patch.object(concurrent_futures_script, 'render_pdf_async', side_effect=render_pdf_async):
+            def run(force=False):
+                return asyncio.run(concurrent_futures_script.process_csv_files_async(self.paths, 'Программист',
+                                                                                     force=force))
+
+            self.assertEqual(run(), dict.fromkeys(self.pdf_names, 1.0))
+            self.assertEqual(run(), {})
+            self.statistics['2008']["Количество вакансий по годам"] = [{2008: 1}, {2008: 1}]
+            self.assertEqual(run(), {self.pdf_names[1]: 1.0})
+            self.assertEqual(run(True), dict.fromkeys(self.pdf_names, 1.0))
+
+    def test_bundle_is_rendered_only_when_a_year_changed(self):
+        bundle_name = os.path.join(self.directory.name, 'bundle.pdf')
+        script = concurrent_futures_script
+        with mock.patch.object(script, 'render_pdf', side_effect=lambda html, name, options: touch(name)) \
+                as render_pdf, \
+                mock.patch.object(script, 'split_pdf_bundle', side_effect=lambda _, names: list(map(touch, names))):
+            def run(split=True):
+                return script.process_csv_files_bundled(self.paths, 'Программист', bundle_name, split)
+
+            self.assertEqual(run(), self.pdf_names)
+            self.assertEqual(run(), self.pdf_names)
+            self.assertEqual(render_pdf.call_count, 1)
+            self.statistics['2007']["Количество вакансий по годам"] = [{2007: 1}, {2007: 1}]
+            run()
+            self.assertEqual(render_pdf.call_count, 2)
+            self.assertEqual(render_pdf.call_args.args[0], script.get_bundle_html(['<body></body>'] * 2))
+            run(split=False)
+            self.assertEqual(render_pdf.call_count, 3)
@@ -0,0 +1,597 @@
+from unittest import TestCase, mock, skipUnless
+from array import array
+import contextlib
+import csv
+import importlib.util
+import io
+import mmap
+import os
+import random
+import re
+import tempfile
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+spec = importlib.util.spec_from_file_location('script_2_2_2', os.path.join(DIRECTORY, '2.2.2.py'))
+script = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(script)
+HAS_OPENPYXL = importlib.util.find_spec('openpyxl') is not None
+HAS_PRETTYTABLE = importlib.util.find_spec('prettytable') is not None
+
+TITLE = ['name', 'description', 'key_skills', 'experience_id', 'premium', 'employer_name', 'salary_from', 'salary_to',
+         'salary_gross', 'salary_currency', 'area_name', 'published_at']
+NAMES = ['Программист Python', 'Аналитик данных', 'Тестировщик', 'DevOps инженер', 'Дизайнер']
+SKILLS = ['Git', 'Linux', 'SQL', 'Python', 'Docker', 'Excel']
+WORDS = ['опыт', 'работы', 'разработка', 'сервисов', 'команда', 'задачи', 'python', 'django', 'аналитика']
+EXPERIENCE = ['noExperience', 'between1And3', 'between3And6', 'moreThan6']
+EMPLOYERS = ['Сбер', 'Тинькофф', 'Яндекс', 'Лаборатория Касперского']
+CURRENCIES = ['RUR', 'RUR', 'USD', 'EUR', 'KZT']
+AREAS = ['Москва', 'Санкт-Петербург', 'Екатеринбург', 'Новосибирск']
+PREDICATES = [('Название', ['Тестировщик']), ('Название', ['Нет такой вакансии']), ('Название региона', ['Москва']),
+              ('Компания', ['Яндекс']), ('Опыт работы', ['Нет опыта']), ('Опыт работы', ['От 3 до 6 лет']),
+              ('Премиум-вакансия', ['Да']), ('Идентификатор валюты оклада', ['Рубли']), ('Оклад', ['100000']),
+              ('Оклад', ['50000-90000']), ('Дата публикации вакансии', ['01.01.2015-31.12.2018']),
+              ('Навыки', ['Git']), ('Навыки', ['Git, Linux']), ('Поиск', ['python']),
+              ('Поиск', ['"опыт работы"'])]
+
+
+def get_rows(count, seed=0):
+    rand = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        words = ' '.join(rand.choice(WORDS) for _ in range(rand.randint(3, 12)))
+        salary_from = rand.randrange(10000, 200000, 5000)
+        rows.append([rand.choice(NAMES), f'<p>Требования: <strong>{words}</strong></p> <ul><li>{words}</li></ul>',
+                     '\n'.join(rand.sample(SKILLS, rand.randint(1, 3))), rand.choice(EXPERIENCE),
+                     rand.choice(['True', 'False']), rand.choice(EMPLOYERS), str(salary_from),
+                     str(salary_from + rand.randrange(0, 100000, 5000)), rand.choice(['True', 'False']),
+                     rand.choice(CURRENCIES), rand.choice(AREAS),
+                     f'{rand.randint(2007, 2022)}-{rand.randint(1, 12):02}-{rand.randint(1, 28):02}T10:00:00+0300'])
+    return rows
+
+
+def write_vacancies(file_name, rows):
+    with open(file_name, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(TITLE)
+        writer.writerows(rows)
+
+
+def scan(ds, query):
+    return [pos for pos, vacancy in enumerate(ds.vacancies_objects)
+            if any(all(script.get_filter(script.DIC_FILTER[filter_key], filter_key, *filter_val)(vacancy)
+                       for filter_key, filter_val in clause) for clause in query)]
+
+
+class DataSetTestCase(TestCase):
+    rows_count = 240
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.directory.name, 'vacancies.csv')
+        write_vacancies(self.file_name, get_rows(self.rows_count))
+        self.ds = script.DataSet(self.file_name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+
+class PlannerTests(DataSetTestCase):
+    def test_single_predicates_match_scan(self):
+        for predicate in PREDICATES:
+            self.assertEqual(self.ds.select_positions([[predicate]]), scan(self.ds, [[predicate]]), predicate)
+
+    def test_compound_queries_match_scan(self):
+        for text in ['Опыт работы: Нет опыта && Оклад: 50000-150000',
+                     'Навыки: Git, Linux && Премиум-вакансия: Да || Название региона: Москва && Компания: Сбер',
+                     'Поиск: python && Название: Тестировщик || Дата публикации вакансии: 01.01.2020-31.12.2022',
+                     'Название: Нет такой вакансии || Название: Нет такой вакансии']:
+            query = script.parse_filter_query(text)
+            self.assertEqual(self.ds.select_positions(query), scan(self.ds, query), text)
+
+    def test_random_queries_match_scan(self):
+        rand = random.Random(1)
+        for _ in range(100):
+            query = [rand.sample(PREDICATES, rand.randint(1, 3)) for _ in range(rand.randint(1, 3))]
+            self.assertEqual(self.ds.select_positions(query), scan(self.ds, query), query)
+
+    def test_empty_filter(self):
+        self.assertEqual(self.ds.select_positions([[('', [])]]), list(range(len(self.ds.vacancies_objects))))
+
+    def test_selective_predicate_leads(self):
+        plan = self.ds.plan_clause([('Идентификатор валюты оклада', ['Рубли']), ('Компания', ['Яндекс']),
+                                    ('Название', ['Нет такой вакансии'])])
+        self.assertEqual(plan[0], ('Название', ['Нет такой вакансии']))
+
+    def test_wrappers_do_not_replace_vacancies(self):
+        vacancies = list(self.ds.vacancies_objects)
+        query = [[('Название', ['Тестировщик'])]]
+        self.assertEqual(self.ds.filter_vacancies(query), [vacancies[pos] for pos in scan(self.ds, query)])
+        self.assertEqual(self.ds.sort_vacancies('Оклад'), sorted(vacancies, key=script.dic_sorters['Оклад']))
+        self.assertEqual(self.ds.prettify_vacancies(query, 'Оклад', True),
+                         sorted(self.ds.filter_vacancies(query), key=script.dic_sorters['Оклад'], reverse=True))
+        self.assertEqual(self.ds.vacancies_objects, vacancies)
+        self.assertEqual(vacancies[0].to_dict()['salary_from'], vacancies[0].salary.salary_from)
+
+    def test_search_estimate_does_not_load_text_index(self):
+        self.ds.select_positions([[('Поиск', ['python']), ('Название', ['Тестировщик'])]])
+        self.assertNotIn('Поиск', self.ds.indexes)
+        self.assertFalse(os.path.exists(self.file_name + script.TEXT_INDEX_SUFFIX))
+
+
+class IntervalIndexTests(TestCase):
+    def setUp(self):
+        rand = random.Random(2)
+        self.intervals = []
+        for _ in range(300):
+            start = rand.randint(0, 1000)
+            self.intervals.append((start, start + rand.choice([0, rand.randint(0, 200)])))
+        self.index = script.IntervalIndex(self.intervals)
+
+    def get_overlap(self, low, high):
+        return [pos for pos, (start, end) in enumerate(self.intervals) if start <= high and low <= end]
+
+    def test_overlap_and_count(self):
+        rand = random.Random(3)
+        for _ in range(200):
+            low = rand.randint(-50, 1250)
+            high = low + rand.choice([0, rand.randint(0, 300)])
+            expected = self.get_overlap(low, high)
+            self.assertEqual(self.index.overlap(low, high), expected, (low, high))
+            self.assertEqual(self.index.count(low, high), len(expected), (low, high))
+
+    def test_stab(self):
+        for point in (0, 500, 1000, 1200):
+            self.assertEqual(self.index.stab(point), self.get_overlap(point, point))
+
+    def test_empty(self):
+        index = script.IntervalIndex([])
+        self.assertEqual(index.overlap(0, 10), [])
+        self.assertEqual(index.count(0, 10), 0)
+
+
+class TextIndexTests(DataSetTestCase):
+    def test_mmap_round_trip(self):
+        built = self.ds.get_index('Поиск')
+        self.assertTrue(os.path.exists(self.file_name + script.TEXT_INDEX_SUFFIX))
+        with mock.patch.object(script, 'build_text_index', side_effect=AssertionError('индекс построен заново')):
+            loaded = script.DataSet(self.file_name).get_index('Поиск')
+        self.assertIsInstance(loaded.terms.obj, mmap.mmap)
+        self.assertEqual(loaded.header, built.header)
+        for text in ('python', 'разработка сервисов', '"опыт работы"', 'нет_такого_слова'):
+            self.assertEqual(loaded.search(text), built.search(text), text)
+
+    def test_stale_index_is_rebuilt(self):
+        self.ds.get_index('Поиск')
+        write_vacancies(self.file_name, get_rows(self.rows_count + 10))
+        ds = script.DataSet(self.file_name)
+        index = ds.get_index('Поиск')
+        self.assertEqual(len(index.lengths), self.rows_count + 10)
+        self.assertEqual(index.header['source'], script.get_source_stamp(self.file_name))
+        self.assertEqual(script.TextIndex.open(self.file_name + script.TEXT_INDEX_SUFFIX).header, index.header)
+
+    def test_stale_index_is_closed_before_replace(self):
+        self.ds.get_index('Поиск')
+        write_vacancies(self.file_name, get_rows(self.rows_count + 10))
+        opened, open_index = [], script.TextIndex.open
+        with mock.patch.object(script.TextIndex, 'open', side_effect=lambda path: opened.append(open_index(path))
+                               or opened[-1]):
+            script.DataSet(self.file_name).get_index('Поиск')
+        self.assertTrue(opened[0].buffer.closed)
+
+    def test_failed_save_leaves_no_temporary_file(self):
+        with mock.patch.object(script.os, 'replace', side_effect=PermissionError):
+            index = self.ds.get_index('Поиск')
+        self.assertEqual(index.match('python'), scan(self.ds, [[('Поиск', ['python'])]]))
+        self.assertEqual(os.listdir(self.directory.name), ['vacancies.csv'])
+
+    def test_close(self):
+        index = self.ds.get_index('Поиск')
+        index.close()
+        self.assertTrue(index.buffer.closed)
+        with self.assertRaises(ValueError):
+            index.search('python')
+
+    def test_match_equals_search_filter(self):
+        index = self.ds.get_index('Поиск')
+        for text in ('python', 'Python Django', 'сервисы', '"опыт работы"', '"работы опыт" задачи', 'тестировщик',
+                     'нет_такого_слова', '!!!'):
+            expected = [pos for pos, vacancy in enumerate(self.ds.vacancies_objects)
+                        if script.search_filter(vacancy, 'Поиск', text)]
+            self.assertEqual(index.match(text), expected, text)
+
+    def test_bm25_ordering(self):
+        index = script.TextIndex(script.build_text_index(['python django flask', 'python python django',
+                                                          'python django flask redis kafka docker linux',
+                                                          'django flask'], stem=False))
+        scores = index.search('python')
+        self.assertEqual(sorted(scores, key=scores.get, reverse=True), [1, 0, 2])
+        scores = index.search('python flask')
+        self.assertEqual(set(scores), {0, 2})
+        self.assertGreater(scores[0], scores[2])
+
+    def test_search_vacancies_order(self):
+        found = self.ds.search_vacancies('python django')
+        self.assertEqual(found, sorted(found, key=lambda item: (-item[1], item[0])))
+        self.assertEqual(self.ds.search_vacancies('python django', 5), found[:5])
+
+
+class SkillIndexTests(DataSetTestCase):
+    def test_filtering_matches_skills_filter(self):
+        index = self.ds.get_index('Навыки')
+        for skills in SKILLS + ['Git, Linux', 'SQL, Python, Docker', 'Excel, Git']:
+            expected = [pos for pos, vacancy in enumerate(self.ds.vacancies_objects)
+                        if script.skills_filter(vacancy, 'Навыки', skills)]
+            self.assertEqual(index.match(skills), expected, skills)
+            self.assertEqual(index.count(skills), len(expected), skills)
+
+    def test_single_skill_rows(self):
+        index = script.SkillIndex([['Git', 'Linux'], 'Git', ['SQL'], 'PostgreSQL'])
+        self.assertEqual(index.match('Git'), [0, 1])
+        self.assertEqual(index.match('SQL'), [2, 3])
+        self.assertEqual(index.match('Git, Linux'), [0])
+
+    def test_co_occurrence(self):
+        index = script.SkillIndex([['Git', 'Linux', 'SQL'], ['Git', 'SQL'], 'Git', ['Linux'], ['Git', 'Docker']])
+        self.assertEqual(index.co_occurrence('Git'), {'Linux': 1, 'SQL': 2, 'Docker': 1})
+        self.assertEqual(index.co_occurrence('Git, SQL'), {'Linux': 1})
+
+    def test_co_occurrence_matches_scan(self):
+        matched = [vacancy for vacancy in self.ds.vacancies_objects if script.skills_filter(vacancy, 'Навыки', 'Git')]
+        expected = {}
+        for vacancy in matched:
+            if type(vacancy.key_skills) == list:
+                for skill in vacancy.key_skills:
+                    if skill != 'Git':
+                        expected[skill] = expected.get(skill, 0) + 1
+        found = self.ds.get_skill_co_occurrence('Git')
+        self.assertEqual(dict(found), expected)
+        self.assertEqual(found, sorted(expected.items(), key=lambda item: (-item[1], item[0])))
+        self.assertEqual(self.ds.get_skill_co_occurrence('Git', 2), found[:2])
+
+    def test_unknown_skill(self):
+        index = self.ds.get_index('Навыки')
+        self.assertEqual(index.match('Cobol'), [])
+        self.assertEqual(index.match('Git, Cobol'), [])
+        self.assertEqual(index.count('Cobol'), 0)
+        self.assertEqual(index.co_occurrence('Cobol'), {})
+        self.assertEqual(self.ds.get_skill_co_occurrence('Cobol'), [])
+        self.assertEqual(self.ds.select_positions([[('Навыки', ['Cobol'])]]), [])
+
+
+class QueryCacheTests(TestCase):
+    @staticmethod
+    def get_entry(size):
+        return array('I', range(size)), array('I', range(size))
+
+    def test_lru_eviction(self):
+        cache = script.QueryCache(max_entries=2)
+        cache.put('a', *self.get_entry(1))
+        cache.put('b', *self.get_entry(1))
+        cache.get('a')
+        cache.put('c', *self.get_entry(1))
+        self.assertEqual(list(cache.entries), ['a', 'c'])
+
+    def test_byte_cap_eviction(self):
+        cache = script.QueryCache(max_bytes=48)
+        cache.put('a', *self.get_entry(2))
+        cache.put('b', *self.get_entry(3))
+        self.assertEqual((list(cache.entries), cache.size), (['a', 'b'], 40))
+        cache.put('c', *self.get_entry(2))
+        self.assertEqual((list(cache.entries), cache.size), (['b', 'c'], 40))
+        cache.put('d', *self.get_entry(7))
+        self.assertEqual((list(cache.entries), cache.size), (['b', 'c'], 40))
+        cache.put('b', *self.get_entry(1))
+        self.assertEqual((list(cache.entries), cache.size), (['c', 'b'], 24))
+
+    def test_counters(self):
+        cache = script.QueryCache()
+        self.assertIsNone(cache.get('a'))
+        cache.put('a', *self.get_entry(4))
+        self.assertEqual(cache.get('a'), self.get_entry(4))
+        cache.get('a')
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+        self.assertIn('попаданий 2, промахов 1, записей 1', cache.stats())
+        cache.clear()
+        self.assertEqual((len(cache.entries), cache.size), (0, 0))
+
+
+class CachedQueryTests(DataSetTestCase):
+    query = [[('Идентификатор валюты оклада', ['Рубли'])]]
+
+    def get_positions(self, vacancies):
+        return [self.ds.vacancies_objects.index(vacancy) for vacancy in vacancies]
+
+    def test_pages_are_served_from_cache(self):
+        expected = self.ds.sort_positions(self.ds.select_positions(self.query), 'Оклад')
+        vacancies, total = self.ds.get_sorted_vacancies(self.query, 'Оклад', count=10)
+        self.assertEqual((self.get_positions(vacancies), total), (expected[:10], len(expected)))
+        with mock.patch.object(self.ds, 'sort_positions', side_effect=AssertionError('повторная сортировка')), \
+                mock.patch.object(self.ds, 'select_positions', side_effect=AssertionError('повторный отбор')):
+            vacancies, total = self.ds.get_sorted_vacancies(self.query, 'Оклад', count=5)
+        self.assertEqual((self.get_positions(vacancies), total), (expected[:5], len(expected)))
+        self.assertEqual((self.ds.query_cache.hits, self.ds.query_cache.misses), (1, 1))
+
+    def test_longer_page_sorts_all_matches(self):
+        expected = self.ds.sort_positions(self.ds.select_positions(self.query), 'Оклад')
+        self.ds.get_sorted_vacancies(self.query, 'Оклад', count=5)
+        vacancies, _ = self.ds.get_sorted_vacancies(self.query, 'Оклад', count=20)
+        self.assertEqual(self.get_positions(vacancies), expected[:20])
+        key = self.ds.get_query_key(self.query, 'Оклад', False)
+        self.assertEqual(list(self.ds.query_cache.entries[key][1]), expected)
+        with mock.patch.object(self.ds, 'sort_positions', side_effect=AssertionError('повторная сортировка')):
+            vacancies, _ = self.ds.get_sorted_vacancies(self.query, 'Оклад')
+        self.assertEqual(self.get_positions(vacancies), expected)
+
+
+class SortTests(DataSetTestCase):
+    specs = ['Оклад', 'Оклад по убыванию', 'Название', 'Описание', 'Опыт работы, Оклад по убыванию',
+             'Премиум-вакансия по убыванию, Название, Дата публикации вакансии',
+             'Название региона по возрастанию, Навыки по убыванию, Компания']
+
+    def get_expected(self, positions, sort_spec, reverse=False):
+        vacancies = self.ds.vacancies_objects
+        for sort_name, descending in reversed(script.parse_sort_spec(sort_spec)):
+            positions = sorted(positions, key=lambda pos: script.dic_sorters[sort_name](vacancies[pos]),
+                               reverse=descending != reverse)
+        return positions
+
+    def test_sorts_match_chained_sorted(self):
+        positions = list(range(len(self.ds.vacancies_objects)))
+        for sort_spec in self.specs:
+            for reverse in (False, True):
+                self.assertEqual(self.ds.sort_positions(positions, sort_spec, reverse),
+                                 self.get_expected(positions, sort_spec, reverse), (sort_spec, reverse))
+
+    def test_top_rows_match_chained_sorted(self):
+        query = [[('Опыт работы', ['От 1 года до 3 лет'])]]
+        positions = self.ds.select_positions(query)
+        for sort_spec in self.specs:
+            for reverse in (False, True):
+                vacancies, _ = self.ds.get_sorted_vacancies(query, sort_spec, reverse, 7)
+                self.assertEqual([self.ds.vacancies_objects.index(vacancy) for vacancy in vacancies],
+                                 self.get_expected(positions, sort_spec, reverse)[:7], (sort_spec, reverse))
+
+    def test_mixed_multiline_descriptions(self):
+        rows = get_rows(self.rows_count)
+        for row in rows[::3]:
+            row[1] += '\n<p>Условия: удалённая работа</p>'
+        write_vacancies(self.file_name, rows)
+        self.ds = script.DataSet(self.file_name)
+        self.assertTrue(any(type(vacancy.description) == list for vacancy in self.ds.vacancies_objects))
+        positions = list(range(len(self.ds.vacancies_objects)))
+        for reverse in (False, True):
+            self.assertEqual(self.ds.sort_positions(positions, 'Описание', reverse),
+                             self.get_expected(positions, 'Описание', reverse))
+        query = [[('Название', ['Программист Python'])]]
+        vacancies, total = self.ds.get_sorted_vacancies(query, 'Описание, Оклад')
+        self.assertEqual([self.ds.vacancies_objects.index(vacancy) for vacancy in vacancies],
+                         self.get_expected(self.ds.select_positions(query), 'Описание, Оклад'))
+
+    def test_small_selection_is_sorted_directly(self):
+        query = [[('Компания', ['Яндекс']), ('Название', ['Тестировщик']), ('Название региона', ['Москва'])]]
+        positions = self.ds.select_positions(query)
+        self.assertLess(len(positions) * script.SORT_RANKS_MIN_SHARE, len(self.ds.vacancies_objects))
+        for reverse in (False, True):
+            vacancies, _ = self.ds.get_sorted_vacancies(query, 'Опыт работы, Оклад по убыванию', reverse)
+            self.assertEqual([self.ds.vacancies_objects.index(vacancy) for vacancy in vacancies],
+                             self.get_expected(positions, 'Опыт работы, Оклад по убыванию', reverse))
+        self.assertEqual(self.ds.sort_ranks, {})
+
+
+@skipUnless(HAS_OPENPYXL, 'openpyxl не установлен')
+class ExportTests(DataSetTestCase):
+    naming = {'№': '№', 'name': 'Название', 'salary': 'Оклад', 'area_name': 'Название региона'}
+
+    def setUp(self):
+        super().setUp()
+        self.xlsx_name = os.path.join(self.directory.name, 'vacancies.xlsx')
+
+    def load_sheets(self):
+        from openpyxl import load_workbook
+        workbook = load_workbook(self.xlsx_name)
+        return [(sheet.title, [[cell.value for cell in row] for row in sheet.iter_rows()], sheet['A1'].font.b)
+                for sheet in workbook.worksheets]
+
+    def export(self, filter_query, row_indexes=None, max_rows=script.EXCEL_MAX_ROWS):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            exported = self.ds.export_vacancies(self.xlsx_name, filter_query, 'Оклад', self.naming, False, row_indexes,
+                                                max_rows)
+        return exported, output.getvalue()
+
+    def test_split_sheets(self):
+        rows = [[number, f'Вакансия {number}'] for number in range(1, 8)]
+        self.assertEqual(script.save_split_sheets(self.xlsx_name, 'Вакансии', ['№', 'Название'], iter(rows), [8, 30],
+                                                  max_rows=4), (7, 3))
+        self.assertEqual(self.load_sheets(), [('Вакансии', [['№', 'Название']] + rows[:3], True),
+                                              ('Вакансии 2', [['№', 'Название']] + rows[3:6], True),
+                                              ('Вакансии 3', [['№', 'Название']] + rows[6:], True)])
+
+    def test_export_window(self):
+        query = [[('Опыт работы', ['Нет опыта'])]]
+        vacancies, _ = self.ds.get_sorted_vacancies(query, 'Оклад')
+        self.assertEqual(self.export(query, [3, 10], max_rows=5), (7, 'Выгружено вакансий: 7, листов: 2\n'))
+        header = list(self.naming.values())
+        expected = [[number] + [script.excel_val(vacancy.to_pretty_dict()[key]) for key in list(self.naming)[1:]]
+                    for number, vacancy in enumerate(vacancies[2:9], 3)]
+        self.assertEqual(self.load_sheets(), [('Вакансии', [header] + expected[:4], True),
+                                              ('Вакансии 2', [header] + expected[4:], True)])
+
+    def test_export_all_rows(self):
+        query = [[('Название региона', ['Москва'])]]
+        exported, _ = self.export(query)
+        self.assertEqual(exported, len(self.ds.select_positions(query)))
+        (title, rows, _), = self.load_sheets()
+        self.assertEqual((title, len(rows)), ('Вакансии', exported + 1))
+        self.assertEqual([row[0] for row in rows[1:]], list(range(1, exported + 1)))
+
+    def test_empty_result_writes_no_file(self):
+        self.assertEqual(self.export([[('Название', ['Нет такой вакансии'])]]), (0, 'Ничего не найдено\n'))
+        self.assertFalse(os.path.exists(self.xlsx_name))
+
+    def test_long_cell_is_truncated(self):
+        value = script.excel_val('а' * (script.EXCEL_MAX_CELL_LENGTH + 10))
+        self.assertEqual(len(value), script.EXCEL_MAX_CELL_LENGTH)
+        self.assertTrue(value.endswith('...'))
+        self.assertEqual(script.excel_val(['первая строка', 'вторая строка']), 'первая строка\nвторая строка')
+
+
+@skipUnless(HAS_PRETTYTABLE, 'prettytable не установлен')
+class SessionTests(DataSetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.session = script.Session(self.ds)
+
+    def execute(self, command):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.session.execute(command)
+        return output.getvalue()
+
+    def get_numbers(self, output):
+        return [int(number) for number in re.findall(r'^\| (\d+) ', output, re.MULTILINE)]
+
+    def test_query_prints_table_and_latency(self):
+        output = self.execute('Фильтр: Название региона: Москва && Опыт работы: Нет опыта')
+        expected = scan(self.ds, [[('Название региона', ['Москва']), ('Опыт работы', ['Нет опыта'])]])
+        self.assertEqual(self.get_numbers(output), list(range(1, len(expected) + 1)))
+        self.assertRegex(output.splitlines()[-1], r'^Запрос выполнен за \d+\.\d мс$')
+        self.assertRegex(self.execute('Обратный порядок: Нет').splitlines()[-1],
+                         r'^Запрос выполнен за \d+\.\d мс \(из кэша\)$')
+
+    def test_settings_are_kept_between_commands(self):
+        self.execute('Фильтр: Компания: Яндекс')
+        self.execute('Сортировка: Оклад по убыванию')
+        self.execute('Столбцы: Название, Оклад')
+        output = self.execute('Диапазон: 2 5')
+        vacancies, _ = self.ds.get_sorted_vacancies([[('Компания', ['Яндекс'])]], 'Оклад по убыванию')
+        self.assertEqual(self.get_numbers(output), [2, 3, 4])
+        self.assertIn(vacancies[1].to_pretty_dict()['name'], output)
+        self.assertNotIn('Название региона', output)
+
+    def test_paging(self):
+        self.execute('Диапазон: 1 6')
+        self.assertEqual(self.get_numbers(self.execute('Далее')), [6, 7, 8, 9, 10])
+        self.assertEqual(self.get_numbers(self.execute('Назад')), [1, 2, 3, 4, 5])
+        self.assertEqual(self.get_numbers(self.execute('Назад')), [1, 2, 3, 4, 5])
+
+    def test_errors_keep_previous_settings(self):
+        self.execute('Фильтр: Название: Тестировщик')
+        for command, message in [('Фильтр: Оклад: много', 'Значение параметра поиска некорректно'),
+                                 ('Фильтр: Город: Москва', 'Параметр поиска некорректен'),
+                                 ('Фильтр: Название', 'Формат ввода некорректен'),
+                                 ('Сортировка: Зарплата', 'Параметр сортировки некорректен'),
+                                 ('Обратный порядок: Иногда', 'Порядок сортировки задан некорректно'),
+                                 ('Диапазон: с начала', 'Диапазон вывода задан некорректно'),
+                                 ('Столбцы: Город', 'Столбцы заданы некорректно'),
+                                 ('Покажи всё', 'Неизвестная команда')]:
+            self.assertEqual(self.execute(command), message + '\n', command)
+        self.assertEqual(self.session.settings.filter_query, [[('Название', ['Тестировщик'])]])
+        self.assertEqual(self.execute('Кэш'), self.ds.query_cache.stats() + '\n')
+
+    def test_indexes_are_built_once(self):
+        with mock.patch.object(self.ds, 'build_index', wraps=self.ds.build_index) as build_index:
+            for command in ('Фильтр: Название региона: Москва', 'Фильтр: Название региона: Новосибирск',
+                            'Фильтр: Оклад: 50000-90000', 'Фильтр: Название региона: Москва && Оклад: 60000',
+                            'Сортировка: Оклад', 'Обратный порядок: Да'):
+                self.execute(command)
+        self.assertEqual(sorted(call.args[0] for call in build_index.call_args_list), ['Название региона', 'Оклад'])
+
+    def test_run_reads_commands_until_exit(self):
+        output = io.StringIO()
+        with mock.patch('builtins.input', side_effect=['Фильтр: Название: Нет такой вакансии', '', 'Выход',
+                                                       'Кэш']), contextlib.redirect_stdout(output):
+            self.session.run()
+        lines = output.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith('Команды: Фильтр: ...'))
+        self.assertEqual(lines[1], 'Ничего не найдено')
+        self.assertEqual(len(lines), 3)
+        with mock.patch('builtins.input', side_effect=EOFError), contextlib.redirect_stdout(io.StringIO()):
+            self.session.run()
+
+
+class HashIndexTests(DataSetTestCase):
+    def test_indexes_group_equal_values(self):
+        for index_key, key in script.DIC_INDEX.items():
+            index = self.ds.get_index(index_key)
+            expected = {}
+            for pos, vacancy in enumerate(self.ds.vacancies_objects):
+                expected.setdefault(key(vacancy), []).append(pos)
+            self.assertEqual(index, expected, index_key)
+            for value in list(expected)[:3] + ['Нет такого значения']:
+                self.assertEqual(self.ds.get_positions(index_key, [value]), scan(self.ds, [[(index_key, [value])]]))
+
+    def test_indexes_are_built_lazily(self):
+        self.assertEqual(self.ds.indexes, {})
+        index = self.ds.get_index('Название региона')
+        self.assertEqual(list(self.ds.indexes), ['Название региона'])
+        self.assertIs(self.ds.get_index('Название региона'), index)
+
+
+class SalaryIndexTests(DataSetTestCase):
+    def test_index_matches_salary_filter(self):
+        index = self.ds.get_index('Оклад')
+        for value in ['100000', '10000', '300000', '50000-90000', '0-9999', '150000-150000']:
+            expected = scan(self.ds, [[('Оклад', [value])]])
+            low, high = script.parse_salary_range(value)
+            self.assertEqual(index.overlap(low, high), expected, value)
+            self.assertEqual(self.ds.get_positions('Оклад', [value]), expected, value)
+            self.assertEqual(self.ds.estimate_filter('Оклад', [value]), len(expected), value)
+
+    def test_stab_finds_vacancies_containing_salary(self):
+        index = self.ds.get_index('Оклад')
+        for salary in (10000, 75000, 199999):
+            self.assertEqual(index.stab(salary), [pos for pos, vacancy in enumerate(self.ds.vacancies_objects)
+                                                  if int(vacancy.salary.salary_from) <= salary <=
+                                                  int(vacancy.salary.salary_to)])
+
+
+class DateIndexTests(DataSetTestCase):
+    def test_range_matches_publish_filter(self):
+        index = self.ds.get_index('Дата публикации вакансии')
+        for value in ['01.01.2015-31.12.2018', '01.06.2010', '01.01.2000-31.12.2006', '01.01.2007-31.12.2022']:
+            expected = scan(self.ds, [[('Дата публикации вакансии', [value])]])
+            self.assertEqual(index.range(*script.parse_date_range(value)), expected, value)
+            self.assertEqual(self.ds.get_positions('Дата публикации вакансии', [value]), expected, value)
+            self.assertEqual(self.ds.estimate_filter('Дата публикации вакансии', [value]), len(expected), value)
+
+    def test_dates_are_parsed_once(self):
+        vacancy = self.ds.vacancies_objects[0]
+        published = script.datetime.strptime(vacancy.published_at, '%Y-%m-%dT%H:%M:%S%z')
+        self.assertEqual(vacancy.published_date, published.toordinal())
+        self.assertEqual(vacancy.published_timestamp, int(published.timestamp()))
+        self.assertEqual(script.dic_sorters['Дата публикации вакансии'](vacancy), vacancy.published_timestamp)
+
+    def test_malformed_date(self):
+        rows = get_rows(self.rows_count)
+        rows[5][-1] = 'вчера'
+        write_vacancies(self.file_name, rows)
+        self.ds = script.DataSet(self.file_name)
+        vacancy = self.ds.vacancies_objects[5]
+        self.assertEqual(len(self.ds.vacancies_objects), self.rows_count)
+        self.assertEqual((vacancy.published_date, vacancy.published_timestamp),
+                         (script.UNKNOWN_PUBLISHED, script.UNKNOWN_PUBLISHED))
+        self.assertNotIn(5, self.ds.get_positions('Дата публикации вакансии', ['01.01.2007-31.12.2022']))
+        self.assertEqual(self.ds.sort_positions(range(self.rows_count), 'Дата публикации вакансии')[0], 5)
+
+
+class WindowTests(DataSetTestCase):
+    def test_top_positions_use_heap(self):
+        positions = list(range(len(self.ds.vacancies_objects)))
+        for sort_spec in ('Оклад', 'Название, Дата публикации вакансии'):
+            for reverse in (False, True):
+                full = self.ds.sort_positions(positions, sort_spec, reverse)
+                with mock.patch.object(script, 'sorted', create=True, side_effect=AssertionError) as sort:
+                    self.assertEqual(self.ds.sort_positions(positions, sort_spec, reverse, 10), full[:10])
+                sort.assert_not_called()
+
+    @skipUnless(HAS_PRETTYTABLE, 'prettytable не установлен')
+    def test_print_prettifies_only_window(self):
+        to_pretty_dict = script.Vacancy.to_pretty_dict
+        with mock.patch.object(script.Vacancy, 'to_pretty_dict', autospec=True, side_effect=to_pretty_dict) as pretty, \
+                mock.patch.object(self.ds, 'get_sorted_vacancies', wraps=self.ds.get_sorted_vacancies) as get_sorted, \
+                contextlib.redirect_stdout(io.StringIO()) as output:
+            self.ds.print_vacancies([[]], 'Оклад', {'№': '№', 'Название': 'Название'}, row_indexes=[3, 8])
+        get_sorted.assert_called_once_with([[]], 'Оклад', False, 7)
+        self.assertEqual(pretty.call_count, 6)
+        self.assertEqual(re.findall(r'^\| (\d+) ', output.getvalue(), re.M), ['3', '4', '5', '6', '7'])
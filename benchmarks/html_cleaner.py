@@ -0,0 +1,95 @@
+"""
+Замер очистки полей вакансий от HTML-тегов и лишних пробелов (DataSet.fill_vacancies в скриптах 2.1.2, 2.1.3
+и 2.2.2).
+
+Сравниваются прежний цикл find/replace, который на каждый тег заново ищет и копирует всю строку, и функция
+clean_html из 2.2.2.py - одна замена по регулярному выражению и разбиение по пробельным символам. Описания
+вакансий генерируются нужной длины: абзацы и списки с тегами, двойными пробелами и переводами строк. Перед
+замером проверяется, что оба способа дают одинаковый результат.
+
+Запуск: python benchmarks/html_cleaner.py [--lengths 1000 10000 100000] [--repeat 3]
+"""
+import argparse
+import importlib.util
+import os
+import random
+import time
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, '2.2.2.py')
+WORDS = ['Python', 'Django', 'опыт', 'работы', 'разработка', 'сервисов', 'команда', 'задачи', 'SQL', 'Docker']
+TAGS = [('<p>', '</p>'), ('<strong>', '</strong>'), ('<em>', '</em>'), ('<li>', '</li>'),
+        ('<a href="/vacancy/{}">', '</a>')]
+
+
+def load_clean_html():
+    """
+    Загружает функцию clean_html из скрипта 2.2.2.py.
+    """
+    spec = importlib.util.spec_from_file_location('script_2_2_2', SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.clean_html
+
+
+def clean_html_loop(text: str):
+    """
+    Прежняя очистка поля из DataSet.fill_vacancies.
+    """
+    append_item = text.strip()
+    tag_start = append_item.find("<")
+    while tag_start != -1:
+        tag_end = append_item.find(">", tag_start)
+        append_item = append_item.replace(append_item[tag_start: tag_end + 1], "")
+        tag_start = append_item.find("<", tag_start)
+    append_item = append_item.strip()
+    while append_item.find("  ") != -1:
+        append_item = append_item.replace("  ", " ")
+    if append_item.find("\n") != -1:
+        return [" ".join(i.split()) for i in append_item.split("\n")]
+    return " ".join(append_item.split())
+
+
+def get_description(length: int, seed: int = 0) -> str:
+    """
+    Генерирует HTML-описание вакансии длиной не меньше length символов. Ссылки в описании разные, как
+    в настоящих вакансиях, поэтому их теги не удаляются из строки все разом одной заменой.
+    """
+    rand = random.Random(seed)
+    parts, size = [], 0
+    while size < length:
+        opening, closing = rand.choice(TAGS)
+        words = '  '.join(rand.choice(WORDS) for _ in range(rand.randint(2, 8)))
+        part = f'{opening.format(len(parts))}{words}{closing}' + rand.choice([' ', '  ', '\n', '\r\n'])
+        parts.append(part)
+        size += len(part)
+    return '<ul>' + ''.join(parts) + '</ul>'
+
+
+def measure(func, text: str, repeat: int) -> float:
+    """
+    Возвращает лучшее из repeat время очистки текста в миллисекундах.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Замер очистки полей вакансий от HTML-тегов.')
+    parser.add_argument('--lengths', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Длины описаний в символах.')
+    parser.add_argument('--repeat', type=int, default=3, help='Количество повторов замера.')
+    args = parser.parse_args()
+
+    clean_html = load_clean_html()
+    for length in args.lengths:
+        text = get_description(length)
+        if clean_html(text) != clean_html_loop(text):
+            raise SystemExit(f'Результаты очистки различаются для описания длиной {len(text)}')
+        loop_time, regex_time = measure(clean_html_loop, text, args.repeat), measure(clean_html, text, args.repeat)
+        print(f'{len(text):8} символов: find/replace {loop_time:9.2f} мс, clean_html {regex_time:7.2f} мс, '
+              f'в {loop_time / regex_time:6.1f} раз быстрее')
@@ -0,0 +1,107 @@
+"""
+Замер времени запуска скриптов по данным python -X importtime.
+
+Каждый скрипт загружается в отдельном интерпретаторе без запуска блока if __name__ == '__main__', поэтому
+замеряются только импорты уровня модуля. Из отчёта importtime берутся модули верхнего уровня, которых нет
+при пустом запуске интерпретатора, и суммируется их накопленное время. Для сравнения отдельно замеряется
+импорт всех библиотек вывода (matplotlib, numpy, openpyxl, pdfkit, jinja2, prettytable) - столько стоил
+запуск скриптов, когда они импортировались на уровне модуля.
+
+Запуск: python benchmarks/import_time.py [--repeat 5] [--top 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+SCRIPTS = ['2.1.1.py', '2.1.2.py', '2.1.3.py', '2.2.2.py',
+           os.path.join('2.3', '2.3.1.py'), os.path.join('2.3', '2_3_3.py'), os.path.join('2.3', 'Test_2_3_2.py'),
+           os.path.join('3.2', 'Concurrent futures.py'), os.path.join('3.2', 'Multiprocessing.py'),
+           os.path.join('3.2', 'Separate_data.py')]
+BACKENDS = ['matplotlib', 'numpy', 'openpyxl', 'pdfkit', 'jinja2', 'prettytable']
+BACKENDS_CODE = 'import matplotlib.pyplot, numpy, openpyxl, pdfkit, jinja2, prettytable'
+
+
+def get_import_times(code: str, cwd: str = ROOT) -> dict:
+    """
+    Запускает код в новом интерпретаторе с -X importtime и возвращает накопленное время импорта в микросекундах
+    каждого модуля верхнего уровня. Вложенные модули попадают в словарь со значением None - их время входит
+    во время модуля, который их импортировал.
+
+    :param code: Код, передаваемый интерпретатору через -c.
+    :param cwd: Рабочая папка интерпретатора.
+    """
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=cwd, stdin=subprocess.DEVNULL,
+                            capture_output=True, text=True, check=True).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative) if not name.startswith('  ') else None
+    return times
+
+
+def measure(code: str, baseline: dict, cwd: str = ROOT) -> dict:
+    """
+    Возвращает модули верхнего уровня, загруженные кодом сверх пустого запуска интерпретатора.
+
+    :param code: Код, передаваемый интерпретатору через -c.
+    :param baseline: Результат get_import_times для пустого запуска.
+    :param cwd: Рабочая папка интерпретатора.
+    """
+    return {name: value for name, value in get_import_times(code, cwd).items() if name not in baseline}
+
+
+def get_total(run: dict) -> int:
+    """
+    Возвращает суммарное время импорта модулей верхнего уровня в микросекундах.
+    """
+    return sum(value for value in run.values() if value is not None)
+
+
+def get_script_code(script: str) -> str:
+    """
+    Возвращает код загрузки скрипта без запуска блока if __name__ == '__main__'.
+    """
+    return f'import runpy; runpy.run_path({os.path.basename(script)!r}, run_name="import_time")'
+
+
+def format_result(runs: list, top: int) -> str:
+    """
+    Формирует строку отчёта: медиана суммарного времени, загруженные библиотеки вывода и самые долгие импорты.
+
+    :param runs: Результаты measure для нескольких запусков.
+    :param top: Количество самых долгих импортов в отчёте.
+    """
+    total = statistics.median(get_total(run) for run in runs) / 1000
+    loaded = [name for name in BACKENDS if any(module.split('.')[0] == name for module in runs[-1])]
+    heaviest = sorted(((name, value) for name, value in runs[-1].items() if value is not None),
+                      key=lambda item: item[1], reverse=True)[:top]
+    return (f'{total:8.1f} мс, библиотеки вывода: {", ".join(loaded) or "нет"}; '
+            f'самые долгие: {", ".join(f"{name} {value / 1000:.1f} мс" for name, value in heaviest)}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Замер времени импорта скриптов.')
+    parser.add_argument('--repeat', type=int, default=5, help='Количество запусков каждого скрипта.')
+    parser.add_argument('--top', type=int, default=5, help='Количество самых долгих импортов в отчёте.')
+    args = parser.parse_args()
+
+    baseline = get_import_times('import runpy, pkgutil')
+    for script in SCRIPTS:
+        cwd = os.path.join(ROOT, os.path.dirname(script))
+        try:
+            runs = [measure(get_script_code(script), baseline, cwd) for _ in range(args.repeat)]
+        except subprocess.CalledProcessError as error:
+            print(f'{script:28} ошибка импорта: {error.stderr.strip().splitlines()[-1]}')
+            continue
+        print(f'{script:28} {format_result(runs, args.top)}')
+
+    try:
+        runs = [measure(BACKENDS_CODE, baseline) for _ in range(args.repeat)]
+        print(f'{"библиотеки вывода":28} {format_result(runs, args.top)}')
+    except subprocess.CalledProcessError:
+        print(f'{"библиотеки вывода":28} не установлены')
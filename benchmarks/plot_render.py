@@ -0,0 +1,118 @@
+"""
+Замер отрисовки изображения с графиками отчёта (Report.generate_image из папки 3.2).
+
+Для каждого способа отрисовки формируется подряд несколько изображений по одним и тем же данным, как в рабочем
+процессе, который формирует отчёты для многих годов:
+
+- pyplot - прежний способ: фигура создаётся через plt.subplots и не закрывается;
+- agg - новая фигура с холстом Agg для каждого изображения;
+- agg + reuse - одна фигура с холстом Agg, очищаемая перед каждым изображением.
+
+Для каждого способа выводятся среднее время отрисовки одного изображения и память процесса (RSS) после первого
+и после последнего изображения. Каждый способ замеряется в отдельном интерпретаторе.
+
+Запуск: python benchmarks/plot_render.py [--reports 100] [--dpi 300] [--format png]
+"""
+import argparse
+import importlib.util
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, '3.2')
+MODES = ['pyplot', 'agg', 'agg + reuse']
+
+
+def get_rss() -> float:
+    """
+    Возвращает текущий размер памяти процесса в мегабайтах. Если /proc недоступен - пиковый размер.
+    """
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10
+
+
+def get_report():
+    """
+    Загружает Report из скрипта Concurrent futures.py и создаёт его по синтетической статистике за 16 лет.
+    """
+    sys.path.insert(0, DIRECTORY)
+    spec = importlib.util.spec_from_file_location('concurrent_futures_script',
+                                                  os.path.join(DIRECTORY, 'Concurrent futures.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    years = range(2007, 2023)
+    data = {"Уровень зарплат по годам": [{year: 40000 + 1500 * (year - 2007) for year in years},
+                                         {year: 60000 + 2500 * (year - 2007) for year in years}],
+            "Количество вакансий по годам": [{year: 5000 + 800 * (year - 2007) for year in years},
+                                             {year: 300 + 90 * (year - 2007) for year in years}]}
+    return module.Report(data, SimpleNamespace(profession_name='Программист'))
+
+
+def render_pyplot(report, file_name: str, dpi: int, image_format: str) -> None:
+    """
+    Формирует изображение прежним способом - через глобальное состояние pyplot.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    figure, (ax1, ax2) = plt.subplots(2)
+    report.draw_bar_graph(ax1, "Уровень зарплат по годам")
+    report.draw_bar_graph(ax2, "Количество вакансий по годам")
+    plt.tight_layout()
+    plt.savefig(file_name, dpi=dpi, format=image_format)
+
+
+def measure(mode: str, reports: int, dpi: int, image_format: str) -> (list, list):
+    """
+    Формирует reports изображений выбранным способом.
+
+    :returns: Время отрисовки каждого изображения в секундах и RSS процесса в мегабайтах после каждого изображения.
+    """
+    report = get_report()
+    from Graph_renderer import GraphRenderer
+
+    renderer = GraphRenderer(dpi=dpi, image_format=image_format, reuse_figure=mode == 'agg + reuse')
+    times, rss = [], []
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, f'graph.{image_format}')
+        for _ in range(reports):
+            start = time.perf_counter()
+            if mode == 'pyplot':
+                render_pyplot(report, file_name, dpi, image_format)
+            else:
+                report.renderer = renderer
+                report.generate_image(file_name)
+            times.append(time.perf_counter() - start)
+            rss.append(get_rss())
+    return times, rss
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Замер отрисовки изображения с графиками.')
+    parser.add_argument('--reports', type=int, default=100, help='Количество изображений подряд.')
+    parser.add_argument('--dpi', type=int, default=300, help='Разрешение изображения.')
+    parser.add_argument('--format', default='png', choices=['png', 'svg'], help='Формат изображения.')
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode is not None:
+        times, rss = measure(args.mode, args.reports, args.dpi, args.format)
+        print(' '.join(map(str, times)))
+        print(' '.join(map(str, rss)))
+    else:
+        for mode in MODES:
+            output = subprocess.run([sys.executable, __file__, '--reports', str(args.reports), '--dpi', str(args.dpi),
+                                     '--format', args.format, '--mode', mode],
+                                    capture_output=True, text=True, check=True).stdout.splitlines()
+            times, rss = list(map(float, output[0].split())), list(map(float, output[1].split()))
+            print(f'{mode:12} {sum(times) / len(times) * 1000:7.1f} мс на изображение, '
+                  f'RSS после первого {rss[0]:6.1f} МБ, после последнего {rss[-1]:6.1f} МБ')
@@ -0,0 +1,71 @@
+"""
+Замер задержки запуска рабочих процессов скриптов из папки 3.2.
+
+Для каждого способа запуска (spawn, forkserver без предзагрузки, forkserver с предзагрузкой модуля Preload)
+запускается несколько процессов, каждый из которых импортирует Preload - все библиотеки и шаблон, нужные для
+формирования отчётов. Задержка процесса - время от Process.start() до готовности процесса к работе.
+Каждый способ замеряется в отдельном интерпретаторе, так как forkserver запускается один раз на процесс.
+
+Запуск: python benchmarks/worker_startup.py [--workers 8]
+"""
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, '3.2')
+CONFIGURATIONS = {'spawn': ('spawn', False),
+                  'forkserver': ('forkserver', False),
+                  'forkserver + preload': ('forkserver', True)}
+
+
+def worker(queue: multiprocessing.Queue) -> None:
+    """
+    Импортирует всё, что нужно для формирования отчётов, и сообщает время готовности.
+    """
+    import Preload
+    queue.put(time.time())
+
+
+def measure(start_method: str, preload: bool, workers: int) -> list:
+    """
+    Запускает workers процессов по очереди и возвращает задержку запуска каждого в секундах.
+    """
+    os.chdir(DIRECTORY)
+    sys.path.insert(0, DIRECTORY)
+    context = multiprocessing.get_context(start_method)
+    if preload:
+        context.set_forkserver_preload(['Preload'])
+
+    queue = context.Queue()
+    latencies = []
+    for _ in range(workers):
+        start = time.time()
+        process = context.Process(target=worker, args=(queue,))
+        process.start()
+        latencies.append(queue.get() - start)
+        process.join()
+    return latencies
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Замер задержки запуска рабочих процессов.')
+    parser.add_argument('--workers', type=int, default=8, help='Количество запускаемых процессов.')
+    parser.add_argument('--configuration', choices=list(CONFIGURATIONS.keys()), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.configuration is not None:
+        print(' '.join(map(str, measure(*CONFIGURATIONS[args.configuration], args.workers))))
+    else:
+        for name in CONFIGURATIONS:
+            if CONFIGURATIONS[name][0] not in multiprocessing.get_all_start_methods():
+                print(f'{name}: недоступен')
+                continue
+            output = subprocess.run([sys.executable, __file__, '--workers', str(args.workers), '--configuration', name],
+                                    capture_output=True, text=True, check=True).stdout
+            latencies = list(map(float, output.split()))
+            print(f'{name}: первый процесс {latencies[0] * 1000:.1f} мс, '
+                  f'остальные в среднем {sum(latencies[1:]) / max(len(latencies) - 1, 1) * 1000:.1f} мс, '
+                  f'максимум {max(latencies[1:] or latencies) * 1000:.1f} мс')